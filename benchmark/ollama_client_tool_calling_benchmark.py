@@ -0,0 +1,43 @@
+from friday.llm_integration.ollama_client import OllamaClient
+from friday.memory.in_memory_conversation_memory import InMemoryConversationMemory
+from friday.utils.benchmark import benchmark_function
+import os
+from datetime import datetime
+
+def run_agent_with_routing_mode(client: OllamaClient, prompt: str):
+    requests_before = client.get_stats()["requests"]
+    response = client.handle_input(prompt)
+    return {"response": response, "model_calls": client.get_stats()["requests"] - requests_before}
+
+if __name__ == "__main__":
+    prompts = [
+        "Explain quantum entanglement in simple terms",
+        "Could you explain if there is any concerns or mistakes in base_client.py implementation?",
+        "Provide a contrast on in_memory_conversation_memory.py and sqlite_conversation_memory.py"
+    ]
+
+    results = {}
+    for routing_mode in ["json", "tools"]:
+        # The local fast path and the cache are disabled so both modes pay for their model calls
+        client = OllamaClient(memory=InMemoryConversationMemory(), routing_mode=routing_mode, local_router=False)
+        client.cache = None
+        results[routing_mode] = benchmark_function(run_agent_with_routing_mode, prompts, client)
+
+    # Save results
+    benchmark_dir = os.path.join(os.path.dirname(__file__), "results")
+    os.makedirs(benchmark_dir, exist_ok=True)
+    filename = os.path.join(benchmark_dir, f"benchmark_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt")
+
+    with open(filename, "w") as f:
+        f.write("Tool Calling vs JSON Routing Ollama Client Benchmark Results:\n\n")
+        for routing_mode, mode_results in results.items():
+            total = sum(stats['time_taken'] for stats in mode_results)
+            calls = sum(stats['result']['model_calls'] for stats in mode_results)
+            f.write(f"Routing mode: {routing_mode} (total {total:.4f}s, {calls} model calls)\n\n")
+            for stats in mode_results:
+                f.write(f"Prompt: {stats['prompt']}\n")
+                f.write(f"  Time taken: {stats['time_taken']:.4f}s\n")
+                f.write(f"  Model calls: {stats['result']['model_calls']}\n")
+                f.write(f"  Result: {stats['result']['response']}\n\n")
+
+    print(f"Benchmark results saved to {filename}")
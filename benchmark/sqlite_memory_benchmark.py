@@ -0,0 +1,69 @@
+from friday.memory.hybrid_conversation_memory import HybridConversationMemory
+from friday.memory.sqlite_conversation_memory import SqliteConversationMemory
+from friday.memory.sqlite_pool import SqliteConnectionPool
+from friday.memory.write_behind import WriteBehindQueue
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+from datetime import datetime
+
+class PerOperationConnections(SqliteConnectionPool):
+    """The previous behaviour: a fresh connection, with default PRAGMAs, for every operation."""
+    def connection(self):
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True) if os.path.dirname(self.db_path) else None
+        return sqlite3.connect(self.db_path)
+
+def measure(memory, operations: int):
+    start = time.perf_counter()
+    for i in range(operations):
+        memory.add_to_history("user" if i % 2 == 0 else "assistant", f"message {i} " + "lorem ipsum " * 20, {"action": "read_file", "file": f"file_{i % 10}.py"})
+    add_seconds = time.perf_counter() - start
+    # Write-behind: adds are timed on the request path; queued writes land before the reads
+    memory.flush()
+    start = time.perf_counter()
+    for _ in range(operations):
+        memory.get_messages(limit=20)
+    get_seconds = time.perf_counter() - start
+    return operations / add_seconds, operations / get_seconds
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Add/get throughput of the SQLite memory backends: per-operation connections, pooled connections and write-behind")
+    parser.add_argument("--operations", type=int, default=2000)
+    parser.add_argument("--journal-mode", default="wal")
+    parser.add_argument("--synchronous", default="normal")
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend_name, backend in (("sqlite", SqliteConversationMemory), ("hybrid", HybridConversationMemory)):
+            for mode, pool_class in (("per-operation", PerOperationConnections), ("pooled", SqliteConnectionPool), ("write-behind", SqliteConnectionPool)):
+                db_path = os.path.join(tmp, f"{backend_name}_{mode}.db")
+                pool = pool_class(db_path, journal_mode=args.journal_mode, synchronous=args.synchronous)
+                queue = WriteBehindQueue() if mode == "write-behind" else None
+                # Hybrid only writes on eviction: keep a small window so most adds reach the database
+                kwargs = {"max_context_messages": 4} if backend is HybridConversationMemory else {}
+                memory = backend(db_path=db_path, pool=pool, write_behind=queue, **kwargs)
+                results[(backend_name, mode)] = measure(memory, args.operations)
+                if queue is not None:
+                    queue.close()
+                pool.close()
+
+    # Save results
+    benchmark_dir = os.path.join(os.path.dirname(__file__), "results")
+    os.makedirs(benchmark_dir, exist_ok=True)
+    filename = os.path.join(benchmark_dir, f"benchmark_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt")
+
+    with open(filename, "w") as f:
+        f.write("Friday SQLite Memory Benchmark Results:\n\n")
+        f.write(f"{args.operations} operations each, journal_mode={args.journal_mode}, synchronous={args.synchronous} (pooled)\n\n")
+        for (backend_name, mode), (adds, gets) in results.items():
+            f.write(f"{backend_name} / {mode}: {adds:.0f} add_to_history/s, {gets:.0f} get_messages/s\n")
+        for backend_name in ("sqlite", "hybrid"):
+            before, after = results[(backend_name, "per-operation")], results[(backend_name, "pooled")]
+            f.write(f"\n{backend_name} speedup: add x{after[0] / before[0]:.1f}, get x{after[1] / before[1]:.1f}")
+            f.write(f", write-behind add x{results[(backend_name, 'write-behind')][0] / after[0]:.1f} over pooled")
+        f.write("\n")
+
+    print(f"Benchmark results saved to {filename}")
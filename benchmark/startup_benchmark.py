@@ -0,0 +1,61 @@
+from friday.utils.benchmark import import_times
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+# Modules the entry point must not import before it knows which path it takes
+LAZY_MODULES = ["rich", "pyfiglet", "requests", "yaml", "httpx"]
+
+def measure_cli(args, runs: int):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-m", "friday.main", *args], capture_output=True, check=True)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import-time and startup benchmark for the friday entry point")
+    parser.add_argument("--runs", type=int, default=10)
+    # Regression budgets, in milliseconds; the script exits with status 1 when one is exceeded
+    parser.add_argument("--import-budget-ms", type=float, default=30.0)
+    parser.add_argument("--startup-budget-ms", type=float, default=150.0)
+    args = parser.parse_args()
+
+    samples = [import_times("import friday.main") for _ in range(args.runs)]
+    import_ms = statistics.median(sample["friday.main"][1] for sample in samples) / 1000
+    slowest = sorted(samples[-1].items(), key=lambda item: item[1][0], reverse=True)[:15]
+    eager = [module for module in LAZY_MODULES if module in samples[-1]]
+    help_ms = measure_cli(["--help"], args.runs) * 1000
+
+    failures = []
+    if import_ms > args.import_budget_ms:
+        failures.append(f"import friday.main took {import_ms:.1f} ms (budget {args.import_budget_ms} ms)")
+    if help_ms > args.startup_budget_ms:
+        failures.append(f"friday --help took {help_ms:.1f} ms (budget {args.startup_budget_ms} ms)")
+    if eager:
+        failures.append(f"imported eagerly: {', '.join(eager)}")
+
+    # Save results
+    benchmark_dir = os.path.join(os.path.dirname(__file__), "results")
+    os.makedirs(benchmark_dir, exist_ok=True)
+    filename = os.path.join(benchmark_dir, f"benchmark_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt")
+
+    with open(filename, "w") as f:
+        f.write("Friday Startup Benchmark Results:\n\n")
+        f.write(f"Median of {args.runs} runs\n")
+        f.write(f"  import friday.main: {import_ms:.1f} ms\n")
+        f.write(f"  friday --help (process start to exit): {help_ms:.1f} ms\n\n")
+        f.write("Slowest imports (self / cumulative, ms):\n")
+        for module, (self_us, cumulative_us) in slowest:
+            f.write(f"  {module}: {self_us / 1000:.2f} / {cumulative_us / 1000:.2f}\n")
+        f.write("\n" + ("\n".join(failures) if failures else "Within budget") + "\n")
+
+    print(f"Benchmark results saved to {filename}")
+    if failures:
+        print("\n".join(failures))
+        sys.exit(1)
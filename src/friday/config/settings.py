@@ -0,0 +1,200 @@
+import copy
+import importlib.resources as pkg_resources
+import os
+import threading
+import yaml
+from dotenv import dotenv_values
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+from friday import config
+from friday.utils.logger import setup_logger
+
+# "json": a routing call that returns action JSON, then an answer call
+# "tools": one call with native tool definitions; a second call only when file contents are needed
+ROUTING_MODES = ("json", "tools")
+# "none": load the model on the first request, "blocking": during construction, "background": in a daemon thread
+WARM_UP_MODES = ("none", "blocking", "background")
+
+# Conversation memory backends friday serve can host sessions on
+MEMORY_BACKENDS = ("memory", "sqlite", "hybrid", "none")
+
+# FRIDAY_<SECTION>_<KEY> overrides any scalar setting, e.g. FRIDAY_HTTP_READ_TIMEOUT=60
+ENV_PREFIX = "FRIDAY_"
+# Variables other Ollama tooling already uses
+ENV_ALIASES = {
+    "OLLAMA_HOST": ("client", "base_endpoint"),
+    "OLLAMA_MODEL": ("client", "model"),
+}
+
+
+class ConfigError(ValueError):
+    """Raised when ollama_config.yml, the environment or the overrides contain invalid settings."""
+
+
+_lock = threading.Lock()
+_config: Optional[Dict] = None
+
+
+def get_config(overrides: Optional[Dict] = None) -> Dict:
+    """
+    Return the process-wide configuration, loading and validating it on first use.
+    Args:
+        overrides (Dict, optional): Nested settings merged on top, e.g. {"http": {"read_timeout": 60}}.
+    Returns:
+        Dict: A copy the caller may modify.
+    """
+    global _config
+    with _lock:
+        if _config is None:
+            _config = _load()
+        data = copy.deepcopy(_config)
+    if overrides:
+        data = merge(data, overrides)
+        validate_config(data)
+    return data
+
+
+def reload_config() -> Dict:
+    """Re-read ollama_config.yml, .env and the environment; clients created afterwards see the new values."""
+    global _config
+    with _lock:
+        _config = _load()
+    return get_config()
+
+
+def _load() -> Dict:
+    with pkg_resources.files(config).joinpath("ollama_config.yml").open("r") as file:
+        data = yaml.safe_load(file) or {}
+    data = merge(data, env_overrides({**dotenv_values(".env"), **os.environ}, data))
+    validate_config(data)
+    return data
+
+
+def env_overrides(environ: Dict[str, str], defaults: Optional[Dict] = None) -> Dict:
+    """
+    Settings given as FRIDAY_<SECTION>_<KEY> variables (and the Ollama aliases) as nested overrides.
+    Section names may contain underscores (FRIDAY_SEMANTIC_CACHE_THRESHOLD): a variable belongs to the
+    longest section of defaults its name starts with. Variables naming no known section or key are
+    skipped with a warning rather than silently merged under a wrong key.
+    Args:
+        environ (Dict[str, str]): Environment variables, e.g. os.environ merged with .env.
+        defaults (Dict, optional): The parsed ollama_config.yml, which defines the known sections and keys.
+    """
+    if defaults is None:
+        with pkg_resources.files(config).joinpath("ollama_config.yml").open("r") as file:
+            defaults = yaml.safe_load(file) or {}
+    # Longest first, so "semantic_cache" wins over a hypothetical "semantic"
+    sections = sorted((name for name, value in defaults.items() if isinstance(value, dict)), key=len, reverse=True)
+    overrides: Dict = {}
+    for name, (section, key) in ENV_ALIASES.items():
+        if environ.get(name):
+            value = environ[name]
+            if name == "OLLAMA_HOST" and "://" not in value:
+                value = f"http://{value}"
+            overrides.setdefault(section, {})[key] = value
+    for name, value in environ.items():
+        if not name.startswith(ENV_PREFIX) or value is None:
+            continue
+        setting_name = name[len(ENV_PREFIX):].lower()
+        section = next((section for section in sections if setting_name.startswith(section + "_")), None)
+        key = setting_name[len(section) + 1:] if section else ""
+        if not key or key not in defaults[section]:
+            if setting_name:
+                setup_logger('friday').warning(f"Ignoring {name}: no setting {setting_name!r} in ollama_config.yml")
+            continue
+        # YAML parsing turns "60" into 60, "true" into True and "[1, 2]" into a list, like the config file
+        try:
+            value = yaml.safe_load(value)
+        except yaml.YAMLError:
+            pass
+        overrides.setdefault(section, {})[key] = value
+    return overrides
+
+
+def merge(base: Dict, overrides: Dict) -> Dict:
+    merged = dict(base)
+    for key, value in overrides.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def validate_config(data: Dict):
+    """Check every setting the clients read, reporting all problems at once."""
+    errors: List[str] = []
+
+    def setting(section: str, key: str, default=None):
+        return (data.get(section) or {}).get(key, default)
+
+    def check(condition: bool, message: str):
+        if not condition:
+            errors.append(message)
+
+    def positive_number(section: str, key: str, integer: bool = False, allow_zero: bool = False):
+        value = setting(section, key)
+        if value is None:
+            return
+        kinds = int if integer else (int, float)
+        valid = isinstance(value, kinds) and not isinstance(value, bool) and (value >= 0 if allow_zero else value > 0)
+        check(valid, f"{section}.{key} must be a {'non-negative' if allow_zero else 'positive'} {'integer' if integer else 'number'}, got {value!r}")
+
+    endpoint = setting("client", "base_endpoint")
+    check(isinstance(endpoint, str) and urlparse(endpoint).scheme in ("http", "https") and bool(urlparse(endpoint).netloc),
+          f"client.base_endpoint must be an http(s) URL, got {endpoint!r}")
+    endpoints = setting("client", "endpoints") or []
+    check(isinstance(endpoints, list) and all(isinstance(e, str) and urlparse(e).scheme in ("http", "https") and bool(urlparse(e).netloc) for e in endpoints),
+          f"client.endpoints must be a list of http(s) URLs, got {endpoints!r}")
+    check(isinstance(setting("client", "chat_completion"), str), "client.chat_completion must be a path such as /api/chat")
+    check(isinstance(setting("client", "model"), str) and bool(setting("client", "model")), "client.model must be a model name")
+    for key in ["connect_timeout", "read_timeout", "backoff_factor"]:
+        positive_number("http", key, allow_zero=key == "backoff_factor")
+    for key in ["pool_connections", "pool_maxsize"]:
+        positive_number("http", key, integer=True)
+    positive_number("http", "max_retries", integer=True, allow_zero=True)
+    for key in ["read_files", "batch"]:
+        positive_number("concurrency", key, integer=True)
+    for key in ["max_entries", "ttl_seconds", "max_persistent_entries"]:
+        positive_number("cache", key, integer=True)
+    for key in ["threshold_bytes", "chunk_tokens", "reduce_tokens", "concurrency"]:
+        positive_number("chunking", key, integer=True)
+    for key in ["cache_entries", "max_prompt_tokens", "context_message_tokens"]:
+        positive_number("tokens", key, integer=True)
+    for key in ["max_entries", "save_every"]:
+        positive_number("semantic_cache", key, integer=True)
+    threshold = setting("semantic_cache", "threshold")
+    check(threshold is None or (isinstance(threshold, (int, float)) and 0 < threshold <= 1), f"semantic_cache.threshold must be in (0, 1], got {threshold!r}")
+    for key in ["limit", "max_tokens", "candidates"]:
+        positive_number("recall", key, integer=True)
+    positive_number("compaction", "keep_recent", integer=True, allow_zero=True)
+    positive_number("code_index", "workers", integer=True, allow_zero=True)
+    for key in ["parallel_threshold", "chunk_tokens", "max_tokens"]:
+        positive_number("code_index", key, integer=True)
+    max_ratio = setting("code_index", "max_ratio")
+    check(max_ratio is None or (isinstance(max_ratio, (int, float)) and 0 < max_ratio <= 1), f"code_index.max_ratio must be in (0, 1], got {max_ratio!r}")
+    for key in ["batch", "max_tokens"]:
+        positive_number("compaction", key, integer=True)
+    for key in ["max_pending", "batch_size"]:
+        positive_number("write_behind", key, integer=True)
+    positive_number("write_behind", "flush_interval_ms", allow_zero=True)
+    trim_ratio = setting("tokens", "trim_ratio")
+    check(trim_ratio is None or (isinstance(trim_ratio, (int, float)) and 0 < trim_ratio <= 1), f"tokens.trim_ratio must be in (0, 1], got {trim_ratio!r}")
+    check(setting("router", "mode", "json") in ROUTING_MODES, f"router.mode must be one of {ROUTING_MODES}, got {setting('router', 'mode')!r}")
+    check(setting("runtime", "warm_up", "none") in WARM_UP_MODES, f"runtime.warm_up must be one of {WARM_UP_MODES}, got {setting('runtime', 'warm_up')!r}")
+    buckets = setting("runtime", "num_ctx_buckets") or []
+    check(isinstance(buckets, list) and all(isinstance(b, int) and b > 0 for b in buckets), f"runtime.num_ctx_buckets must be a list of positive integers, got {buckets!r}")
+    positive_number("runtime", "response_tokens", integer=True, allow_zero=True)
+    for key in ["port"]:
+        positive_number("server", key, integer=True, allow_zero=True)
+    for key in ["workers", "max_sessions"]:
+        positive_number("server", key, integer=True)
+    check(setting("server", "memory", "hybrid") in MEMORY_BACKENDS, f"server.memory must be one of {MEMORY_BACKENDS}, got {setting('server', 'memory')!r}")
+    for key in ["health_interval", "health_timeout"]:
+        positive_number("pool", key)
+    for key in ["affinity_penalty", "hedge_min_samples"]:
+        positive_number("pool", key, integer=True, allow_zero=True)
+    percentile = setting("pool", "hedge_percentile")
+    check(percentile is None or (isinstance(percentile, (int, float)) and 0 < percentile < 100), f"pool.hedge_percentile must be in (0, 100) or null, got {percentile!r}")
+    if errors:
+        raise ConfigError("Invalid configuration:\n  " + "\n  ".join(errors))
@@ -2,11 +2,13 @@ import sys
 from pathlib import Path
 sys.path.append(str(Path(__file__).resolve().parent.parent.parent))
 import time
+from concurrent.futures import Future
+from typing import Union
 
 from rich.console import Console
+from rich.live import Live
 from rich.panel import Panel
 from rich.prompt import Prompt
-import pyfiglet
 from friday.llm_integration.base_client import AgentClient
 from friday.utils.logger import setup_logger
 
@@ -15,11 +17,20 @@ console = Console()
 logger = setup_logger('friday')
 
 
-def driver(client: AgentClient):
-
+def print_banner():
+    # pyfiglet loads its font files on import, so it is only imported when the banner is shown
+    import pyfiglet
     ascii_title = pyfiglet.figlet_format("Friday", font="slant")
     console.print(Panel.fit(ascii_title, border_style="blue"))
 
+
+def driver(client: Union[AgentClient, "Future[AgentClient]"], stream: bool = False, banner: bool = True):
+    """
+    Interactive loop. client may be a Future, so the backend can be created while the banner and the first prompt are shown.
+    """
+    if banner:
+        print_banner()
+
     while True:
         user_input = Prompt.ask("\n[bold cyan]Friday [/bold cyan]")
         start = time.perf_counter()
@@ -30,9 +41,31 @@ def driver(client: AgentClient):
             logger.info("[CLI] Session ended by user.")
             break
 
+        if isinstance(client, Future):
+            client = client.result()
+
+        if stream:
+            stream_response(client, user_input, start)
+            continue
+
         response = client.handle_input(user_input)
         end = time.perf_counter()
         logger.info(f"[CLI] Response sent to user: {response}")
 
         console.print(Panel(response, title=f"Response {end - start:.3f} s", border_style="green"))
 
+
+def stream_response(client: AgentClient, user_input: str, start: float):
+    response = ""
+    first_token = None
+    with Live(Panel("", title="Response ...", border_style="green"), console=console, refresh_per_second=12) as live:
+        for token in client.handle_input_stream(user_input):
+            if first_token is None:
+                first_token = time.perf_counter() - start
+            response += token
+            live.update(Panel(response, title=f"Response (first token {first_token:.3f} s) ...", border_style="green"))
+        end = time.perf_counter()
+        first_token = end - start if first_token is None else first_token
+        live.update(Panel(response, title=f"Response {end - start:.3f} s (first token {first_token:.3f} s)", border_style="green"))
+    logger.info(f"[CLI] Streamed response sent to user: {response}")
+    logger.info(f"[CLI] Time to first token: {first_token:.3f} s, total: {end - start:.3f} s")
@@ -0,0 +1,372 @@
+import asyncio
+import json
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs
+from rich.console import Console
+from friday.config.settings import MEMORY_BACKENDS, get_config
+from friday.llm_integration.async_ollama_client import AsyncOllamaClient
+from friday.memory.base_conversation_memory import BaseConversationMemory
+from friday.memory.hybrid_conversation_memory import HybridConversationMemory
+from friday.memory.in_memory_conversation_memory import InMemoryConversationMemory
+from friday.memory.no_memory_conversation_memory import NoMemoryConversationMemory
+from friday.memory.sqlite_conversation_memory import SqliteConversationMemory
+from friday.memory.sqlite_pool import SqliteConnectionPool
+from friday.utils.logger import setup_logger
+
+MAX_BODY_BYTES = 1 << 20
+REASONS = {200: "OK", 400: "Bad Request", 403: "Forbidden", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class Session:
+    """One conversation hosted by the server: a client copy with its own memory, and a lock that orders its turns."""
+    def __init__(self, session_id: str, user_id: Optional[str], client: AsyncOllamaClient):
+        self.session_id = session_id
+        self.user_id = user_id
+        self.client = client
+        self.lock = asyncio.Lock()
+        self.last_used = time.monotonic()
+
+
+class SessionManager:
+    """
+    Creates sessions on first use and keeps the most recently used max_sessions of them.
+    A session of a persistent backend (sqlite, hybrid) is closed when it is evicted: its queued writes are flushed
+    and a hybrid session's in-context messages archived, so using it again reopens it from the database, where
+    earlier turns are recalled from the archive. Evicted sessions of the in-process backends are lost.
+    A session that has an owner can only be used by requests with the same user_id.
+
+    Session ids: the persistent backends number sessions in the database, so a session_id they did not hand out
+    is unknown (404). The in-process backends (memory, none) keep nothing to check against and start a new session
+    under a session_id the caller chooses.
+    """
+    def __init__(self, client: AsyncOllamaClient, backend: str = "hybrid", db_path: str = "db/conversation_memory.db", max_sessions: int = 1000):
+        if backend not in MEMORY_BACKENDS:
+            raise ValueError(f"Unknown memory backend {backend!r}, expected one of {MEMORY_BACKENDS}")
+        self.client = client
+        self.backend = backend
+        self.db_path = db_path
+        self.max_sessions = max_sessions
+        self.sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self._lock = asyncio.Lock()
+        # Evicted sessions being closed in the background, by session id
+        self._retiring: Dict[str, asyncio.Task] = {}
+        # All persistent sessions share one connection per worker thread instead of opening their own
+        self.pool = SqliteConnectionPool(db_path) if backend in ("sqlite", "hybrid") else None
+
+    def _create_memory(self, session_id: Optional[str], user_id: Optional[str]) -> BaseConversationMemory:
+        if self.backend == "sqlite":
+            return SqliteConversationMemory(session_id=session_id, user_id=user_id, db_path=self.db_path, pool=self.pool, write_behind=self.client.write_behind)
+        if self.backend == "hybrid":
+            return HybridConversationMemory(session_id=session_id, user_id=user_id, db_path=self.db_path, max_context_tokens=self.client.max_prompt_tokens, token_counter=self.client.token_counter, pool=self.pool, write_behind=self.client.write_behind)
+        if self.backend == "memory":
+            memory = InMemoryConversationMemory(max_context_tokens=self.client.max_prompt_tokens, token_counter=self.client.token_counter)
+        else:
+            memory = NoMemoryConversationMemory()
+        memory.session_id = session_id or uuid.uuid4().hex
+        memory.user_id = user_id
+        return memory
+
+    def _open_memory(self, session_id: Optional[str], user_id: Optional[str]) -> Tuple[BaseConversationMemory, Optional[str]]:
+        """The memory of a new or reopened session and the session's owner."""
+        if session_id is not None and self.pool is not None:
+            row = self.pool.connection().execute("SELECT user_id FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+            if row is None:
+                raise HTTPError(404, f"Unknown session {session_id}")
+            self._check_owner(session_id, row[0], user_id)
+            return self._create_memory(session_id, row[0]), row[0]
+        return self._create_memory(session_id, user_id), user_id
+
+    @staticmethod
+    def _check_owner(session_id: str, owner: Optional[str], user_id: Optional[str]):
+        if owner is not None and user_id != owner:
+            raise HTTPError(403, f"Session {session_id} belongs to another user")
+
+    @staticmethod
+    def _retire(session: Session):
+        memory = session.client.memory.memory
+        if isinstance(memory, HybridConversationMemory):
+            memory.archive_context()
+        memory.close()
+
+    async def _retire_evicted(self, session: Session):
+        try:
+            # Waits for a turn the evicted session may still be running
+            async with session.lock:
+                await asyncio.to_thread(self._retire, session)
+        except Exception as e:
+            setup_logger('friday').error(f"[Server] Closing evicted session {session.session_id} failed: {e}")
+        finally:
+            self._retiring.pop(session.session_id, None)
+
+    async def get(self, session_id: Optional[str], user_id: Optional[str], create: bool = True) -> Session:
+        """
+        The session with session_id, opened or reopened if needed, or a new session when session_id is None.
+        With create=False, an in-process backend's unknown session_id is a 404 instead of a new session.
+        """
+        if session_id in self._retiring:
+            # Reopen only once the evicted session's messages are stored
+            await asyncio.wait([self._retiring[session_id]])
+        evicted = []
+        async with self._lock:
+            session = self.sessions.get(session_id) if session_id is not None else None
+            if session is None:
+                if not create and self.pool is None:
+                    raise HTTPError(404, f"Unknown session {session_id}")
+                # Persistent backends touch the database while opening a session
+                memory, owner = await asyncio.to_thread(self._open_memory, session_id, user_id)
+                session = Session(str(memory.session_id), owner, self.client.with_memory(memory))
+                self.sessions[session.session_id] = session
+                while len(self.sessions) > self.max_sessions:
+                    evicted.append(self.sessions.popitem(last=False)[1])
+            else:
+                self._check_owner(session_id, session.user_id, user_id)
+            self.sessions.move_to_end(session.session_id)
+            session.last_used = time.monotonic()
+        # Closed outside the manager lock: an evicted session may be in the middle of a long turn
+        for retired in evicted:
+            self._retiring[retired.session_id] = asyncio.create_task(self._retire_evicted(retired))
+        return session
+
+    def remove(self, session_id: str):
+        self.sessions.pop(session_id, None)
+
+    async def wait_retired(self):
+        """Wait until the sessions evicted so far are closed."""
+        if self._retiring:
+            await asyncio.gather(*self._retiring.values(), return_exceptions=True)
+
+    def close(self):
+        for session in self.sessions.values():
+            self._retire(session)
+        if self.pool is not None:
+            # Sessions' queued writes go to this pool's database
+            if self.client.write_behind is not None:
+                self.client.write_behind.flush()
+            self.pool.close()
+
+
+class FridayServer:
+    """
+    HTTP/JSON API that hosts many conversations in one process on top of AsyncOllamaClient.
+
+    POST /chat            {"prompt", "session_id"?, "user_id"?, "stream"?, "bypass_cache"?}
+                          -> {"session_id", "response"}, or NDJSON lines {"session_id", "token"} ending in {"done": true}
+    GET /sessions/<id>?user_id=<owner>    summary and messages of a session
+    DELETE /sessions/<id>?user_id=<owner> clears a session's history and forgets it
+    GET /health, GET /stats
+
+    Turns of one session run one after another; at most `workers` turns run at the same time across all sessions,
+    the rest wait for a free worker.
+    """
+    def __init__(self, client: AsyncOllamaClient, host: str = "127.0.0.1", port: int = 8080, workers: int = 4, memory: str = "hybrid", db_path: str = "db/conversation_memory.db", max_sessions: int = 1000):
+        self.client = client
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.sessions = SessionManager(client, memory, db_path, max_sessions)
+        self.logger = setup_logger('friday')
+        self._semaphore = asyncio.Semaphore(workers)
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._stats = {"http_requests": 0, "turns": 0, "active_turns": 0, "waiting_turns": 0, "errors": 0}
+
+    async def start(self) -> Tuple[str, int]:
+        """Start listening and return the bound (host, port); port 0 picks a free port."""
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.host, self.port = self._server.sockets[0].getsockname()[:2]
+        self.logger.info(f"Friday server listening on http://{self.host}:{self.port} with {self.workers} workers")
+        return self.host, self.port
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        await self.sessions.wait_retired()
+        await asyncio.to_thread(self.sessions.close)
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            # HTTP/1.1 keep-alive: serve requests on this connection until the client closes it
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                self._stats["http_requests"] += 1
+                await self._dispatch(writer, method, path, body)
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except HTTPError as e:
+            await self._write_json(writer, e.status, {"error": str(e)})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Optional[Tuple[str, str, Dict[str, str], bytes]]:
+        request_line = await reader.readline()
+        if not request_line.strip():
+            return None
+        try:
+            method, path, _ = request_line.decode("latin-1").split(" ", 2)
+        except ValueError:
+            raise HTTPError(400, "Malformed request line")
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        length = int(headers.get("content-length", 0) or 0)
+        if length > MAX_BODY_BYTES:
+            raise HTTPError(413, f"Request body exceeds {MAX_BODY_BYTES} bytes")
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), path, headers, body
+
+    async def _dispatch(self, writer: asyncio.StreamWriter, method: str, target: str, body: bytes):
+        path, _, query = target.partition("?")
+        try:
+            if path == "/chat":
+                if method != "POST":
+                    raise HTTPError(405, "Use POST /chat")
+                await self._chat(writer, self._parse_body(body))
+            elif path.startswith("/sessions/"):
+                user_id = parse_qs(query).get("user_id", [None])[0]
+                await self._session(writer, method, path[len("/sessions/"):], user_id)
+            elif path == "/health" and method == "GET":
+                await self._write_json(writer, 200, {"status": "ok"})
+            elif path == "/stats" and method == "GET":
+                await self._write_json(writer, 200, self.get_stats())
+            else:
+                raise HTTPError(404, f"No route for {method} {path}")
+        except HTTPError as e:
+            await self._write_json(writer, e.status, {"error": str(e)})
+        except Exception as e:
+            self._stats["errors"] += 1
+            self.logger.error(f"[Server] {method} {path} failed: {e}")
+            await self._write_json(writer, 500, {"error": str(e)})
+
+    @staticmethod
+    def _parse_body(body: bytes) -> Dict:
+        try:
+            request = json.loads(body or b"{}")
+        except json.JSONDecodeError as e:
+            raise HTTPError(400, f"Invalid JSON: {e}")
+        if not isinstance(request, dict) or not isinstance(request.get("prompt"), str) or not request["prompt"].strip():
+            raise HTTPError(400, "Body must be a JSON object with a non-empty \"prompt\"")
+        for key in ("session_id", "user_id"):
+            if request.get(key) is not None:
+                request[key] = str(request[key])
+        return request
+
+    async def _chat(self, writer: asyncio.StreamWriter, request: Dict):
+        session = await self.sessions.get(request.get("session_id"), request.get("user_id"))
+        bypass_cache = bool(request.get("bypass_cache", False))
+        self._stats["waiting_turns"] += 1
+        async with session.lock:
+            async with self._semaphore:
+                self._stats["waiting_turns"] -= 1
+                self._stats["active_turns"] += 1
+                self._stats["turns"] += 1
+                try:
+                    if not request.get("stream"):
+                        response = await session.client.handle_input(request["prompt"], bypass_cache)
+                        await self._write_json(writer, 200, {"session_id": session.session_id, "response": response})
+                        return
+                    await self._stream(writer, session, request["prompt"], bypass_cache)
+                finally:
+                    self._stats["active_turns"] -= 1
+
+    async def _stream(self, writer: asyncio.StreamWriter, session: Session, prompt: str, bypass_cache: bool):
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson\r\nTransfer-Encoding: chunked\r\n\r\n")
+        try:
+            async for token in session.client.handle_input_stream(prompt, bypass_cache):
+                await self._write_chunk(writer, {"session_id": session.session_id, "token": token})
+            await self._write_chunk(writer, {"session_id": session.session_id, "done": True})
+        except (ConnectionError, asyncio.CancelledError):
+            raise
+        except Exception as e:
+            # The status line is already sent, so the error travels in the stream like Ollama's own errors
+            self._stats["errors"] += 1
+            self.logger.error(f"[Server] Stream for session {session.session_id} failed: {e}")
+            await self._write_chunk(writer, {"session_id": session.session_id, "error": str(e), "done": True})
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    async def _session(self, writer: asyncio.StreamWriter, method: str, session_id: str, user_id: Optional[str]):
+        if method not in ("GET", "DELETE"):
+            raise HTTPError(405, "Use GET or DELETE /sessions/<id>")
+        # Same ownership rules as /chat; an evicted session of a persistent backend is reopened
+        session = await self.sessions.get(session_id, user_id, create=False)
+        if method == "GET":
+            summary = await session.client.get_conversation_summary()
+            messages = await session.client.get_context_messages()
+            await self._write_json(writer, 200, {"session_id": session_id, "user_id": session.user_id, "summary": summary, "messages": messages})
+        elif method == "DELETE":
+            async with session.lock:
+                await session.client.clear_context()
+                self.sessions.remove(session_id)
+            await self._write_json(writer, 200, {"session_id": session_id, "deleted": True})
+
+    @staticmethod
+    async def _write_json(writer: asyncio.StreamWriter, status: int, data: Dict):
+        body = json.dumps(data, default=str).encode()
+        writer.write(f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\nContent-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+        await writer.drain()
+
+    @staticmethod
+    async def _write_chunk(writer: asyncio.StreamWriter, data: Dict):
+        line = json.dumps(data).encode() + b"\n"
+        writer.write(f"{len(line):X}\r\n".encode() + line + b"\r\n")
+        await writer.drain()
+
+    def get_stats(self) -> Dict:
+        stats = dict(self._stats)
+        stats["sessions"] = len(self.sessions.sessions)
+        stats["workers"] = self.workers
+        stats["client"] = self.client.get_stats()
+        return stats
+
+
+def serve(host: Optional[str] = None, port: Optional[int] = None, workers: Optional[int] = None, memory: Optional[str] = None):
+    """Run the server until interrupted; unset arguments come from the server section of ollama_config.yml."""
+    server_config = get_config().get("server", {})
+
+    async def run():
+        client = AsyncOllamaClient()
+        server = FridayServer(
+            client,
+            host=host or server_config.get("host", "127.0.0.1"),
+            port=port if port is not None else server_config.get("port", 8080),
+            workers=workers or server_config.get("workers", 4),
+            memory=memory or server_config.get("memory", "hybrid"),
+            db_path=server_config.get("db_path", "db/conversation_memory.db"),
+            max_sessions=server_config.get("max_sessions", 1000),
+        )
+        host_bound, port_bound = await server.start()
+        Console().print(f"[bold blue]Friday is serving on http://{host_bound}:{port_bound}[/bold blue]")
+        try:
+            await server.serve_forever()
+        finally:
+            await server.close()
+            await client.aclose()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,157 @@
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, Callable, List, Dict, Tuple, Union
+from friday.memory.async_conversation_memory import AsyncConversationMemory
+from friday.memory.base_conversation_memory import BaseConversationMemory
+
+class AsyncAgentClient(ABC):
+    """
+    Abstract base class for asyncio-native LLM agent clients.
+    Mirrors AgentClient, but every operation that talks to the LLM or the memory backend is a coroutine,
+    so a single event loop can drive many conversations concurrently.
+    """
+    def __init__(self, conversation_memory: AsyncConversationMemory):
+        self.conversation_memory = conversation_memory
+
+    @abstractmethod
+    async def handle_input(self, user_input: str):
+        """
+        Handle user input, update context, and return a response.
+        Args:
+            user_input (str): The user's input or question.
+        Returns:
+            Any: The agent's response.
+        """
+        pass
+
+    @abstractmethod
+    def handle_input_stream(self, user_input: str) -> AsyncIterator[str]:
+        """
+        Handle user input like handle_input, but yield the response tokens as they are generated.
+        Args:
+            user_input (str): The user's input or question.
+        Yields:
+            str: Response tokens in generation order.
+        """
+        pass
+
+    async def handle_inputs(self, prompts: List[str], concurrency: int = None, memory_factory: Callable[[], BaseConversationMemory] = None, bypass_cache: bool = False, return_exceptions: bool = False) -> List[Union[str, Exception]]:
+        """
+        Handle many independent prompts and return the responses in the same order as the prompts.
+        Args:
+            prompts (List[str]): The user inputs.
+            concurrency (int, optional): Maximum number of prompts in flight.
+            memory_factory (Callable, optional): Creates the conversation memory for each prompt.
+            bypass_cache (bool): Skip the response cache.
+            return_exceptions (bool): Return a failing prompt's exception instead of raising it.
+        Returns:
+            List[Union[str, Exception]]: The responses, in the same order as the prompts.
+        """
+        results = [None] * len(prompts)
+        async for index, result in self.handle_inputs_as_completed(prompts, concurrency, memory_factory, bypass_cache, return_exceptions):
+            results[index] = result
+        return results
+
+    async def handle_inputs_as_completed(self, prompts: List[str], concurrency: int = None, memory_factory: Callable[[], BaseConversationMemory] = None, bypass_cache: bool = False, return_exceptions: bool = False) -> AsyncIterator[Tuple[int, Union[str, Exception]]]:
+        """
+        Like handle_inputs, but yield (index, response) pairs as soon as each prompt is answered.
+        Clients that cannot run prompts concurrently in their own memories answer them one after another
+        with handle_input, in this conversation; concurrency and memory_factory are then not used.
+        Args:
+            prompts (List[str]): The user inputs.
+            concurrency (int, optional): Maximum number of prompts in flight.
+            memory_factory (Callable, optional): Creates the conversation memory for each prompt.
+            bypass_cache (bool): Skip the response cache.
+            return_exceptions (bool): Yield a failing prompt's exception instead of raising it.
+        Yields:
+            Tuple[int, Union[str, Exception]]: Index of the prompt and its response, in completion order.
+        """
+        for index, prompt in enumerate(prompts):
+            try:
+                response = await (self.handle_input(prompt, bypass_cache) if bypass_cache else self.handle_input(prompt))
+            except Exception as e:
+                if not return_exceptions:
+                    raise
+                response = e
+            yield index, response
+
+    @abstractmethod
+    async def generate_action(self, user_input: str, include_history: bool = False):
+        """
+        Generate a structured action from user input, optionally including conversation history.
+        Args:
+            user_input (str): The user's input or question.
+            include_history (bool): Whether to include conversation history in the prompt.
+        Returns:
+            Any: The LLM's response or action.
+        """
+        pass
+
+    @abstractmethod
+    async def read_file(self, user_input: str, file_path: str):
+        """
+        Analyze or process a file in the context of a user query.
+        Args:
+            user_input (str): The user's question about the file.
+            file_path (str): Path to the file to analyze.
+        Returns:
+            str: The LLM's analysis.
+        """
+        pass
+
+    @abstractmethod
+    async def generate_natural_response(self, user_input: str):
+        """
+        Generate a natural language response from the LLM, given user input and context.
+        Args:
+            user_input (str): The user's input or question.
+        Returns:
+            str: The LLM's response.
+        """
+        pass
+
+    @abstractmethod
+    async def get_conversation_summary(self) -> Dict:
+        """
+        Get a summary of the current conversation/session.
+        Returns:
+            Dict: Summary information (e.g., message count, last action).
+        """
+        pass
+
+    @abstractmethod
+    async def clear_context(self):
+        """
+        Clear the conversation context/history for the current session.
+        """
+        pass
+
+    @abstractmethod
+    async def get_context_messages(self, limit: int = None) -> List[Dict]:
+        """
+        Retrieve messages from the conversation context/history.
+        Args:
+            limit (int, optional): Maximum number of recent messages to return.
+        Returns:
+            List[Dict]: List of message dicts.
+        """
+        pass
+
+    @abstractmethod
+    async def set_context_limits(self, max_messages: int = None, max_tokens_per_message: int = None, max_context_tokens: int = None):
+        """
+        Set limits for context size and message length.
+        Args:
+            max_messages (int, optional): Maximum number of messages to keep in context.
+            max_tokens_per_message (int, optional): Maximum tokens per message (for truncation).
+            max_context_tokens (int, optional): Maximum total tokens of the messages kept in context.
+        """
+        pass
+
+    @abstractmethod
+    def get_stats(self) -> Dict:
+        """
+        Get request statistics for this client (e.g., request count, latency, retries).
+        Returns:
+            Dict: Statistics collected since the client was created.
+        """
+        pass
@@ -0,0 +1,644 @@
+from friday.llm_integration.async_base_client import AsyncAgentClient
+from friday.config.settings import ROUTING_MODES
+from friday.llm_integration.ollama_request_builder import OllamaRequestBuilder
+from friday.llm_integration.endpoint_pool import is_replica_failure
+from friday.llm_integration.http_session import RETRY_STATUS_CODES
+from friday.llm_integration.response_cache import ResponseCache, cache_key, create_response_cache
+from friday.llm_integration.single_flight import AsyncSingleFlight
+from friday.llm_integration.local_router import LocalRouter
+from friday.tooling.code_index import create_code_index
+from friday.tooling.workspace_index import WorkspaceFileIndex, create_workspace_index
+import asyncio
+import copy
+import json
+from collections import deque
+import time
+import httpx
+from friday.utils.parse_json import parse_json_from_model
+from friday.utils.chunking import group_by_budget, iter_line_chunks
+from friday.utils.tokens import TokenCounter
+from pathlib import Path
+from typing import AsyncIterator, Callable, List, Dict, Optional, Tuple, Union
+from friday.memory.base_conversation_memory import BaseConversationMemory
+from friday.memory.async_conversation_memory import AsyncConversationMemory
+from friday.memory.hybrid_conversation_memory import HybridConversationMemory, rank_by_similarity
+from friday.memory.write_behind import create_write_behind
+from friday.memory.in_memory_conversation_memory import InMemoryConversationMemory
+from friday.utils.logger import setup_logger
+
+
+def create_async_http_client(pool_maxsize: int = 16, connect_timeout: float = 5, read_timeout: float = 300, max_retries: int = 3) -> httpx.AsyncClient:
+    """
+    Create a non-blocking HTTP client with a bounded keep-alive connection pool.
+    Connection failures are retried by the transport; retryable status codes are retried by the caller.
+    """
+    return httpx.AsyncClient(
+        limits=httpx.Limits(max_connections=pool_maxsize, max_keepalive_connections=pool_maxsize),
+        timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+        transport=httpx.AsyncHTTPTransport(retries=max_retries),
+    )
+
+
+class AsyncOllamaClient(AsyncAgentClient, OllamaRequestBuilder):
+    def __init__(self, max_context_messages: int = 20, max_tokens_per_message: int = 2000, memory: Union[BaseConversationMemory, AsyncConversationMemory] = None, http_client: httpx.AsyncClient = None, read_files_concurrency: int = None, cache: ResponseCache = None, file_index: WorkspaceFileIndex = None, local_router: bool = None, routing_mode: str = None, warm_up: str = None, token_counter: TokenCounter = None, config_overrides: Dict = None):
+        self.logger = setup_logger('friday')
+        self.root_dir = Path.cwd()
+        # Load configuration
+        data = self._load_config(config_overrides)
+
+        # Non-blocking HTTP pool, share one http_client between sessions to reuse connections
+        http_config = data.get("http", {})
+        self.max_retries = http_config.get("max_retries", 3)
+        self.backoff_factor = http_config.get("backoff_factor", 0.5)
+        self._owns_http_client = http_client is None
+        if http_client is None:
+            self.http_client = create_async_http_client(
+                pool_maxsize=http_config.get("pool_maxsize", 16),
+                connect_timeout=http_config.get("connect_timeout", 5),
+                read_timeout=http_config.get("read_timeout", 300),
+                max_retries=self.max_retries,
+            )
+        else:
+            self.http_client = http_client
+        concurrency_config = data.get("concurrency", {})
+        self.read_files_concurrency = read_files_concurrency or concurrency_config.get("read_files", 4)
+        self.batch_concurrency = concurrency_config.get("batch", 4)
+        self._load_token_config(data, token_counter)
+        self._load_chunking_config(data)
+        # There is no running loop during construction, so "blocking" and "background" warm-ups
+        # are started by the caller with `await client.warm_up()` or asyncio.create_task(client.warm_up())
+        self._load_runtime_config(data, warm_up)
+        self.cache = create_response_cache(data.get("cache", {})) if cache is None else cache
+        self._load_semantic_cache_config(data)
+        self._load_recall_config(data)
+        self._load_compaction_config(data)
+        # Background summarization tasks, shared with the copies made by with_memory
+        self._compaction_tasks = set()
+        self.single_flight = AsyncSingleFlight() if data.get("cache", {}).get("coalesce", True) else None
+        self.file_index = create_workspace_index(self.root_dir, data.get("workspace", {})) if file_index is None else file_index
+        self.code_index = create_code_index(self.file_index, data.get("code_index", {}), self.token_counter.count_fn)
+        # Conversation writes of the default memory (and the server's sessions) are committed in the background
+        self.write_behind = create_write_behind(data.get("write_behind", {}))
+        if local_router is None:
+            local_router = data.get("router", {}).get("local_fast_path", True)
+        self.router = LocalRouter(self.file_index) if local_router else None
+        self.routing_mode = routing_mode or data.get("router", {}).get("mode", "json")
+        if self.routing_mode not in ROUTING_MODES:
+            raise ValueError(f"Unknown routing mode {self.routing_mode!r}, expected one of {ROUTING_MODES}")
+        self._stats = {"requests": 0, "errors": 0, "retries": 0, "total_request_time": 0.0, "streamed_requests": 0, "total_time_to_first_token": 0.0, "warm_up_time": None, "prompt_tokens": 0, "prompt_eval_count": 0, "prompt_eval_duration": 0, "recalled_messages": 0, "compactions": 0, "compacted_messages": 0, "compaction_errors": 0}
+
+        if memory is None:
+            memory = HybridConversationMemory(max_context_messages, max_tokens_per_message, max_context_tokens=self.max_prompt_tokens, token_counter=self.token_counter, write_behind=self.write_behind)
+        if isinstance(memory, AsyncConversationMemory):
+            self.memory = memory
+        else:
+            self.memory = AsyncConversationMemory(memory)
+
+    async def warm_up(self) -> bool:
+        """Load the model into Ollama ahead of the first prompt, pinned for keep_alive."""
+        start = time.perf_counter()
+        try:
+            for url in self._chat_urls():
+                response = await self.http_client.post(url, json=self._warm_up_payload())
+                response.raise_for_status()
+        except httpx.HTTPError as e:
+            self.logger.warning(f"Model warm-up failed: {e}")
+            return False
+        self._stats["warm_up_time"] = time.perf_counter() - start
+        self.logger.info(f"Model {self.model} warmed up in {self._stats['warm_up_time']:.2f}s")
+        return True
+
+    async def _build_context_prompt(self, current_prompt: str) -> str:
+        return self._build_context_prompt_from(await self.memory.get_messages(), current_prompt)
+
+    async def handle_input(self, user_input: str, bypass_cache: bool = False):
+        return "".join([token async for token in self._respond(user_input, stream=False, bypass_cache=bypass_cache)])
+
+    async def handle_input_stream(self, user_input: str, bypass_cache: bool = False) -> AsyncIterator[str]:
+        async for token in self._respond(user_input, stream=True, bypass_cache=bypass_cache):
+            yield token
+
+    async def handle_inputs(self, prompts: List[str], concurrency: int = None, memory_factory: Callable[[], BaseConversationMemory] = None, bypass_cache: bool = False, return_exceptions: bool = False) -> List[Union[str, Exception]]:
+        """
+        Answer independent prompts concurrently, returning the responses in input order.
+        See handle_inputs_as_completed for the arguments.
+        """
+        results = [None] * len(prompts)
+        async for index, result in self.handle_inputs_as_completed(prompts, concurrency, memory_factory, bypass_cache, return_exceptions):
+            results[index] = result
+        return results
+
+    async def handle_inputs_as_completed(self, prompts: List[str], concurrency: int = None, memory_factory: Callable[[], BaseConversationMemory] = None, bypass_cache: bool = False, return_exceptions: bool = False) -> AsyncIterator[Tuple[int, Union[str, Exception]]]:
+        """
+        Answer independent prompts concurrently and yield (index, response) pairs as each one finishes.
+        Every prompt runs in its own conversation; the HTTP pool, cache, file index and stats are shared.
+        Args:
+            prompts (List[str]): Independent user inputs.
+            concurrency (int, optional): Maximum prompts in flight; defaults to concurrency.batch in the config.
+            memory_factory (Callable, optional): Creates the memory for each prompt; defaults to InMemoryConversationMemory.
+            bypass_cache (bool): Skip the response cache.
+            return_exceptions (bool): Yield a failing prompt's exception instead of raising it.
+        """
+        memory_factory = memory_factory or InMemoryConversationMemory
+        semaphore = asyncio.Semaphore(concurrency or self.batch_concurrency)
+
+        async def answer(index: int, prompt: str):
+            async with semaphore:
+                try:
+                    return index, await self._handle_isolated_input(prompt, memory_factory, bypass_cache)
+                except Exception as e:
+                    if not return_exceptions:
+                        raise
+                    self.logger.error(f"Batch prompt {index} failed: {e}")
+                    return index, e
+
+        tasks = [asyncio.create_task(answer(index, prompt)) for index, prompt in enumerate(prompts)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _handle_isolated_input(self, user_input: str, memory_factory: Callable[[], BaseConversationMemory], bypass_cache: bool = False) -> str:
+        return await self.with_memory(memory_factory()).handle_input(user_input, bypass_cache)
+
+    def with_memory(self, memory: Union[BaseConversationMemory, AsyncConversationMemory]) -> "AsyncOllamaClient":
+        """
+        Client for another conversation. The copy shares the HTTP client, cache, file index, router and stats
+        with this client, but has its own memory and prompt prefix.
+        """
+        client = copy.copy(self)
+        client.memory = memory if isinstance(memory, AsyncConversationMemory) else AsyncConversationMemory(memory)
+        client.prompt_assembler = self.prompt_assembler.fork()
+        return client
+
+    async def _respond(self, user_input: str, stream: bool = False, bypass_cache: bool = False) -> AsyncIterator[str]:
+        self.logger.info(f"User query: {user_input}")
+        await self.memory.add_to_history("user", user_input)
+        if self.compaction_enabled:
+            self._summary = await self.memory.get_running_summary()
+        await self._recall(user_input)
+        decision_parsed = await self._decide(user_input, bypass_cache)
+        if not decision_parsed:
+            error_msg = "Failed to parse decision from model"
+            await self.memory.add_to_history("assistant", error_msg, {"error": "parse_failure"})
+            self.logger.error(error_msg)
+            yield error_msg
+            return
+        action = decision_parsed.get("action")
+        parts = []
+        if action == "read_file":
+            file_name = decision_parsed.get("file")
+            question = decision_parsed.get("question")
+            matches = await self._find_file(file_name)
+            if len(matches) != 1:
+                parts.append(await asyncio.to_thread(self._unresolved_message, file_name, matches))
+                yield parts[-1]
+            else:
+                async for token in self._read_file_tokens(question, matches[0], stream, bypass_cache):
+                    parts.append(token)
+                    yield token
+            metadata = {
+                "action": "read_file",
+                "file": file_name,
+                "found": len(matches) == 1,
+                "ambiguous": len(matches) > 1
+            }
+        elif action == "read_files":
+            file_names = decision_parsed.get("files", [])
+            question = decision_parsed.get("question")
+            found_files = []
+            not_found_files = []
+            ambiguous_files = []
+            file_paths = []
+            for file_name in file_names:
+                matches = await self._find_file(file_name)
+                if len(matches) != 1:
+                    (ambiguous_files if matches else not_found_files).append(file_name)
+                    file_paths.append(None)
+                else:
+                    found_files.append(file_name)
+                    file_paths.append(matches[0])
+            async for token in self._read_files_tokens(question, file_names, file_paths, stream, bypass_cache):
+                parts.append(token)
+                yield token
+            metadata = {
+                "action": "read_files",
+                "files": file_names,
+                "found": found_files,
+                "not_found": not_found_files,
+                "ambiguous": ambiguous_files
+            }
+        elif action == "generate_action":
+            # The stored turn is answered, so the answer prompt is a prefix of the routing prompt
+            if "answer" in decision_parsed:
+                # Tool-calling mode: the model already answered in the routing call
+                parts.append(decision_parsed["answer"])
+                yield parts[-1]
+            elif stream:
+                async for token in self.stream_natural_response(user_input, bypass_cache=bypass_cache):
+                    parts.append(token)
+                    yield token
+            else:
+                parts.append(await self.generate_natural_response(user_input, bypass_cache=bypass_cache))
+                yield parts[-1]
+            metadata = {"action": "generate_action"}
+            if "semantic_similarity" in decision_parsed:
+                metadata["semantic_cache"] = round(decision_parsed["semantic_similarity"], 4)
+            entry = self._semantic_entry(decision_parsed, user_input, "".join(parts))
+            if entry is not None:
+                if self.semantic_cache.performs_io:
+                    await asyncio.to_thread(self.semantic_cache.store, *entry)
+                else:
+                    self.semantic_cache.store(*entry)
+        else:
+            parts.append(f"Unknown action: {action}")
+            yield parts[-1]
+            metadata = {"error": "unknown_action"}
+        response = "".join(parts)
+        await self.memory.add_to_history("assistant", response, metadata)
+        self.logger.info(f"Final response to user: {response}")
+        self._recalled = []
+        self._schedule_compaction()
+
+    async def _decide(self, user_input: str, bypass_cache: bool = False) -> Optional[Dict]:
+        if self.router is not None:
+            decision_parsed = await asyncio.to_thread(self.router.route, user_input)
+            if decision_parsed:
+                self.logger.info(f"Local router decision: {decision_parsed}")
+                return decision_parsed
+        vector = None
+        if self.semantic_cache is not None and not bypass_cache and self._semantic_cache_applies(await self.memory.get_messages()):
+            vector = await self._embed_question(user_input)
+            if vector is not None:
+                decision_parsed = self._semantic_decision(user_input, vector)
+                if decision_parsed:
+                    return decision_parsed
+        if self.routing_mode == "tools":
+            payload = self._tools_payload(self._tool_messages(await self.memory.get_messages()))
+            self.logger.info(f"Payload sent to agent (tools): {payload}")
+            message = (await self._post_chat(payload, bypass_cache))["message"]
+            self.logger.info(f"Agent raw response: {message}")
+            decision_parsed = self._decision_from_tool_message(message, user_input)
+        else:
+            decision = await self.generate_action(user_input, include_history=True, bypass_cache=bypass_cache)
+            self.logger.info(f"Agent raw response: {decision}")
+            decision_parsed = parse_json_from_model(decision)
+        if decision_parsed and vector is not None:
+            decision_parsed["embedding"] = vector
+        return decision_parsed
+
+    def _schedule_compaction(self) -> Optional[asyncio.Task]:
+        """Fold old turns into the running summary in a background task; at most one per conversation at a time."""
+        if not self.compaction_enabled or id(self.memory) in self._compacting:
+            return None
+        self._compacting.add(id(self.memory))
+        task = asyncio.ensure_future(self._compact(self.memory))
+        self._compaction_tasks.add(task)
+        task.add_done_callback(self._compaction_tasks.discard)
+        return task
+
+    async def _compact(self, memory: AsyncConversationMemory):
+        try:
+            summary = await memory.get_running_summary()
+            pending = self._compaction_pending(summary, await memory.get_messages(), await memory.get_evicted())
+            if not pending:
+                return
+            content = self._summary_from_response(await self._post_chat(self._compaction_payload(summary, pending), bypass_cache=True))
+            await memory.set_running_summary(content, pending[-1]["timestamp"])
+            self.logger.info(f"Compacted {len(pending)} messages into the running summary")
+            self._stats["compactions"] += 1
+            self._stats["compacted_messages"] += len(pending)
+        except Exception as e:
+            self.logger.warning(f"Summarization failed: {e}")
+            self._stats["compaction_errors"] += 1
+        finally:
+            self._compacting.discard(id(memory))
+
+    async def _embed_question(self, text: str) -> Optional[List[float]]:
+        vectors = await self._embed([text])
+        return vectors[0] if vectors else None
+
+    async def _embed(self, texts: List[str]) -> Optional[List[List[float]]]:
+        start = time.perf_counter()
+        try:
+            response = await self.http_client.post(self.embed_endpoint, json=self._embed_payload(texts))
+            response.raise_for_status()
+            vectors = response.json()["embeddings"]
+        except (httpx.HTTPError, KeyError, ValueError) as e:
+            self.logger.warning(f"Embedding request failed: {e}")
+            vectors = None
+        if self.semantic_cache is not None:
+            self.semantic_cache.record_embedding(time.perf_counter() - start, failed=vectors is None)
+        return vectors
+
+    async def _recall(self, user_input: str):
+        self._recalled = []
+        if not self.recall_enabled:
+            return
+        limit = self.recall_candidates if self.recall_rerank else self.recall_limit
+        recalled = await self.memory.retrieve(user_input, limit)
+        if self.recall_rerank and len(recalled) > 1:
+            vectors = await self._embed([user_input] + [msg["content"] for msg in recalled])
+            if vectors:
+                recalled = rank_by_similarity(vectors[0], recalled, vectors[1:], self.recall_limit)
+        self._recalled = recalled[:self.recall_limit]
+        if self._recalled:
+            self.logger.info(f"Recalled {len(self._recalled)} archived messages")
+            self._stats["recalled_messages"] += len(self._recalled)
+
+    async def _find_file(self, file_name: str) -> List[Path]:
+        return await asyncio.to_thread(self.file_index.resolve, file_name)
+
+    async def _read_files_tokens(self, question: str, file_names: List[str], file_paths: List[Optional[Path]], stream: bool, bypass_cache: bool = False) -> AsyncIterator[str]:
+        found = [index for index, file_path in enumerate(file_paths) if file_path is not None]
+        concurrent = self.read_files_concurrency > 1 and len(found) > 1
+        tasks = {}
+        if concurrent:
+            semaphore = asyncio.Semaphore(self.read_files_concurrency)
+
+            async def analyze(file_path):
+                async with semaphore:
+                    return await self.read_file(question, file_path, bypass_cache)
+
+            tasks = {index: asyncio.create_task(analyze(file_paths[index])) for index in found}
+        try:
+            for index, file_name in enumerate(file_names):
+                if index:
+                    yield "\n\n"
+                if file_paths[index] is None:
+                    yield await asyncio.to_thread(self._unresolved_message, file_name)
+                    continue
+                yield f"--- {file_name} ---\n"
+                try:
+                    if concurrent:
+                        yield await tasks[index]
+                    else:
+                        async for token in self._read_file_tokens(question, file_paths[index], stream, bypass_cache):
+                            yield token
+                except Exception as e:
+                    self.logger.error(f"Failed to analyze {file_name}: {e}")
+                    yield f"Error reading {file_name}: {e}"
+        finally:
+            for task in tasks.values():
+                task.cancel()
+
+    async def _read_file_tokens(self, user_input: str, file_path: Path, stream: bool, bypass_cache: bool = False) -> AsyncIterator[str]:
+        if stream:
+            async for token in self.stream_read_file(user_input, file_path, bypass_cache):
+                yield token
+        else:
+            yield await self.read_file(user_input, file_path, bypass_cache)
+
+    async def generate_natural_response(self, user_input: str, bypass_cache: bool = False):
+        payload = self._chat_payload(self._natural_response_messages(user_input, await self.memory.get_messages()))
+        self.logger.info(f"Payload sent to agent (generate_natural_response): {payload}")
+        return (await self._post_chat(payload, bypass_cache))["message"]["content"]
+
+    async def stream_natural_response(self, user_input: str, bypass_cache: bool = False) -> AsyncIterator[str]:
+        payload = self._chat_payload(self._natural_response_messages(user_input, await self.memory.get_messages()), stream=True)
+        self.logger.info(f"Payload sent to agent (stream_natural_response): {payload}")
+        async for token in self._stream_chat(payload, bypass_cache):
+            yield token
+
+    async def generate_action(self, user_input: str, include_history: bool = False, bypass_cache: bool = False):
+        payload = self._chat_payload(self._action_messages(user_input, await self.memory.get_messages(), include_history))
+        self.logger.info(f"Payload sent to agent (generate_action): {payload}")
+        return (await self._post_chat(payload, bypass_cache))["message"]["content"]
+
+    async def _read_file_messages(self, user_input: str, file_path: Path) -> List[Dict]:
+        file_content = await asyncio.to_thread(Path(file_path).read_text)
+        return self._file_messages(user_input, file_content, await self.memory.get_messages())
+
+    async def read_file(self, user_input: str, file_path: Path, bypass_cache: bool = False):
+        payload = await self._read_file_payload(user_input, file_path, False, bypass_cache)
+        return (await self._post_chat(payload, bypass_cache))["message"]["content"]
+
+    async def stream_read_file(self, user_input: str, file_path: Path, bypass_cache: bool = False) -> AsyncIterator[str]:
+        payload = await self._read_file_payload(user_input, file_path, True, bypass_cache)
+        async for token in self._stream_chat(payload, bypass_cache):
+            yield token
+
+    async def _read_file_payload(self, user_input: str, file_path: Path, stream: bool, bypass_cache: bool = False) -> Dict:
+        excerpt = await asyncio.to_thread(self._file_excerpt, user_input, file_path)
+        if excerpt is not None:
+            return self._chat_payload(self._file_messages(user_input, excerpt["content"], await self.memory.get_messages()), stream=stream)
+        if not await asyncio.to_thread(self._is_large_file, file_path):
+            return self._chat_payload(await self._read_file_messages(user_input, file_path), stream=stream)
+        file_name = Path(file_path).name
+        partials = await self._map_file_chunks(user_input, file_path, bypass_cache)
+        partials = await self._reduce_partials(user_input, partials, file_name, bypass_cache)
+        return self._chat_payload(self._reduce_messages(user_input, partials, file_name, await self.memory.get_messages()), stream=stream)
+
+    async def _map_file_chunks(self, user_input: str, file_path: Path, bypass_cache: bool = False) -> List[str]:
+        # Chunks are read off the event loop and at most chunk_concurrency are in flight
+        file_name = Path(file_path).name
+        chunks = iter_line_chunks(file_path, self.chunk_tokens, self.token_counter.count_fn)
+        partials = []
+        pending = deque()
+        try:
+            while True:
+                chunk = await asyncio.to_thread(next, chunks, None)
+                if chunk is None:
+                    break
+                if len(pending) >= self.chunk_concurrency:
+                    partials.append(await pending.popleft())
+                start_line, end_line, text = chunk
+                payload = self._chat_payload(self._chunk_messages(user_input, text, start_line, end_line, file_name))
+                pending.append(asyncio.create_task(self._chunk_answer(payload, start_line, end_line, bypass_cache)))
+            while pending:
+                partials.append(await pending.popleft())
+        finally:
+            for task in pending:
+                task.cancel()
+            chunks.close()
+        return partials
+
+    async def _chunk_answer(self, payload: Dict, start_line: int, end_line: int, bypass_cache: bool = False) -> str:
+        return f"Lines {start_line}-{end_line}:\n" + (await self._post_chat(payload, bypass_cache))["message"]["content"]
+
+    async def _reduce_partials(self, user_input: str, partials: List[str], file_name: str, bypass_cache: bool = False) -> List[str]:
+        semaphore = asyncio.Semaphore(self.chunk_concurrency)
+
+        async def reduce(group):
+            async with semaphore:
+                payload = self._chat_payload(self._reduce_messages(user_input, group, file_name, []))
+                return (await self._post_chat(payload, bypass_cache))["message"]["content"]
+
+        while len(partials) > 1 and sum(self.token_counter.count(p) for p in partials) > self.reduce_tokens:
+            groups = group_by_budget(partials, self.reduce_tokens, self.token_counter.count)
+            if len(groups) == len(partials):
+                break
+            partials = list(await asyncio.gather(*(reduce(group) for group in groups)))
+        return partials
+
+    async def _cache_get(self, payload: Dict) -> Optional[Dict]:
+        if self.cache.performs_io:
+            return await asyncio.to_thread(self.cache.get, payload)
+        return self.cache.get(payload)
+
+    async def _cache_set(self, payload: Dict, response: Dict):
+        if self.cache.performs_io:
+            await asyncio.to_thread(self.cache.set, payload, response)
+        else:
+            self.cache.set(payload, response)
+
+    async def _post_chat(self, payload: Dict, bypass_cache: bool = False) -> Dict:
+        use_cache = self.cache is not None and not bypass_cache
+        if use_cache:
+            cached = await self._cache_get(payload)
+            if cached is not None:
+                return cached
+        if self.single_flight is None:
+            return await self._fetch_chat(payload, use_cache)
+        return await self.single_flight.call(cache_key(payload), lambda: self._fetch_chat(payload, use_cache))
+
+    async def _fetch_chat(self, payload: Dict, use_cache: bool) -> Dict:
+        start = time.perf_counter()
+        failed = False
+        data = None
+        try:
+            data = await self._send_chat(payload)
+            if use_cache:
+                await self._cache_set(payload, data)
+            return data
+        except (httpx.HTTPError, ValueError):
+            # ValueError: a response that is not JSON
+            failed = True
+            raise
+        finally:
+            self._record_request(time.perf_counter() - start, failed, prompt_eval=self._prompt_eval(payload, data))
+
+    async def _send_chat(self, payload: Dict) -> Dict:
+        async def send(url: str) -> Dict:
+            for attempt in range(self.max_retries + 1):
+                response = await self.http_client.post(url, json=payload)
+                if response.status_code in RETRY_STATUS_CODES and attempt < self.max_retries:
+                    self._stats["retries"] += 1
+                    await asyncio.sleep(self.backoff_factor * (2 ** attempt))
+                    continue
+                response.raise_for_status()
+                return response.json()
+
+        if self.endpoint_pool is None:
+            return await send(self.endpoint)
+        return await self.endpoint_pool.apost(send, self.model)
+
+    async def _stream_chat(self, payload: Dict, bypass_cache: bool = False) -> AsyncIterator[str]:
+        use_cache = self.cache is not None and not bypass_cache
+        if use_cache:
+            cached = await self._cache_get(payload)
+            if cached is not None:
+                yield cached["message"]["content"]
+                return
+        if self.single_flight is None:
+            tokens = self._fetch_stream(payload, use_cache)
+        else:
+            tokens = self.single_flight.stream(cache_key(payload), lambda: self._fetch_stream(payload, use_cache))
+        async for token in tokens:
+            yield token
+
+    async def _fetch_stream(self, payload: Dict, use_cache: bool) -> AsyncIterator[str]:
+        tokens = []
+        start = time.perf_counter()
+        first_token_time = None
+        failed = False
+        replica_failed = False
+        final_chunk = None
+        replica = self.endpoint_pool.acquire(self.model) if self.endpoint_pool is not None else None
+        url = self.endpoint if replica is None else self.endpoint_pool.chat_url(replica)
+        try:
+            async with self.http_client.stream("POST", url, json=payload) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    if "error" in chunk:
+                        raise RuntimeError(f"Ollama stream error: {chunk['error']}")
+                    token = chunk.get("message", {}).get("content", "")
+                    if token:
+                        if first_token_time is None:
+                            first_token_time = time.perf_counter() - start
+                        tokens.append(token)
+                        yield token
+                    if chunk.get("done"):
+                        final_chunk = chunk
+                        if use_cache:
+                            await self._cache_set(payload, {"message": {"role": "assistant", "content": "".join(tokens)}})
+                        break
+        except (httpx.HTTPError, RuntimeError) as e:
+            failed = True
+            replica_failed = is_replica_failure(e)
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            if replica is not None:
+                self.endpoint_pool.release(replica, elapsed, failed and replica_failed)
+            self._record_request(elapsed, failed, first_token_time, self._prompt_eval(payload, final_chunk))
+
+    def _record_request(self, elapsed: float, failed: bool, time_to_first_token: Optional[float] = None, prompt_eval: Optional[Tuple[Optional[int], int, int]] = None):
+        # Only ever called from the event loop thread, so no lock is needed
+        self._stats["requests"] += 1
+        self._stats["total_request_time"] += elapsed
+        if failed:
+            self._stats["errors"] += 1
+        if time_to_first_token is not None:
+            self._stats["streamed_requests"] += 1
+            self._stats["total_time_to_first_token"] += time_to_first_token
+        if prompt_eval is not None:
+            prompt_tokens, eval_count, eval_duration = prompt_eval
+            if prompt_tokens is not None:
+                self._stats["prompt_tokens"] += prompt_tokens
+            self._stats["prompt_eval_count"] += eval_count
+            # Nanoseconds, as Ollama reports it
+            self._stats["prompt_eval_duration"] += eval_duration
+
+    def get_stats(self) -> Dict:
+        stats = dict(self._stats)
+        stats["avg_request_time"] = stats["total_request_time"] / stats["requests"] if stats["requests"] else 0.0
+        stats["avg_time_to_first_token"] = stats["total_time_to_first_token"] / stats["streamed_requests"] if stats["streamed_requests"] else 0.0
+        stats["prompt_cache_reuse"] = self._prompt_cache_reuse(stats)
+        if self.cache is not None:
+            stats["cache"] = self.cache.get_stats()
+        if self.router is not None:
+            stats["router"] = self.router.get_stats()
+        stats["tokens"] = self.token_counter.get_stats()
+        if self.single_flight is not None:
+            stats["single_flight"] = self.single_flight.get_stats()
+        if self.semantic_cache is not None:
+            stats["semantic_cache"] = self.semantic_cache.get_stats()
+        if self.endpoint_pool is not None:
+            stats["endpoint_pool"] = self.endpoint_pool.get_stats()
+        if self.code_index is not None:
+            stats["code_index"] = self.code_index.get_stats()
+        if self.write_behind is not None:
+            stats["write_behind"] = self.write_behind.get_stats()
+        return stats
+
+    async def aclose(self):
+        # Unfinished summaries are dropped; their turns are folded in again next time
+        for task in list(self._compaction_tasks):
+            task.cancel()
+        await asyncio.gather(*self._compaction_tasks, return_exceptions=True)
+        if self.semantic_cache is not None:
+            await asyncio.to_thread(self.semantic_cache.save)
+        if self.code_index is not None:
+            await asyncio.to_thread(self.code_index.save)
+        if self.write_behind is not None:
+            await asyncio.to_thread(self.write_behind.close)
+        if self.endpoint_pool is not None:
+            self.endpoint_pool.close()
+        if self._owns_http_client:
+            await self.http_client.aclose()
+
+    # Context management methods
+    async def get_conversation_summary(self) -> Dict:
+        return await self.memory.get_summary()
+    async def clear_context(self):
+        await self.memory.clear()
+    async def get_context_messages(self, limit: int = None) -> List[Dict]:
+        return await self.memory.get_messages(limit)
+    async def set_context_limits(self, max_messages: int = None, max_tokens_per_message: int = None, max_context_tokens: int = None):
+        await self.memory.set_limits(max_messages, max_tokens_per_message, max_context_tokens)
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict
+from typing import Callable, Iterator, List, Dict, Tuple, Union
 from friday.memory.base_conversation_memory import BaseConversationMemory
 
 class AgentClient(ABC):
@@ -55,6 +55,59 @@ class AgentClient(ABC):
         """
         pass
     
+    def handle_input_stream(self, user_input: str) -> Iterator[str]:
+        """
+        Handle user input like handle_input, but yield the response tokens as they are generated.
+        The complete response is written to the conversation context once the stream ends.
+        Clients that cannot stream yield the whole response of handle_input as a single chunk.
+        Args:
+            user_input (str): The user's input or question.
+        Yields:
+            str: Response tokens in generation order.
+        """
+        yield self.handle_input(user_input)
+    
+    def handle_inputs(self, prompts: List[str], concurrency: int = None, memory_factory: Callable[[], BaseConversationMemory] = None, bypass_cache: bool = False, return_exceptions: bool = False) -> List[Union[str, Exception]]:
+        """
+        Handle many independent prompts and return the responses in the same order as the prompts.
+        Args:
+            prompts (List[str]): The user inputs.
+            concurrency (int, optional): Maximum number of prompts in flight.
+            memory_factory (Callable, optional): Creates the conversation memory for each prompt.
+            bypass_cache (bool): Skip the response cache.
+            return_exceptions (bool): Return a failing prompt's exception instead of raising it.
+        Returns:
+            List[Union[str, Exception]]: The responses, in the same order as the prompts.
+        """
+        results = [None] * len(prompts)
+        for index, result in self.handle_inputs_as_completed(prompts, concurrency, memory_factory, bypass_cache, return_exceptions):
+            results[index] = result
+        return results
+
+    def handle_inputs_as_completed(self, prompts: List[str], concurrency: int = None, memory_factory: Callable[[], BaseConversationMemory] = None, bypass_cache: bool = False, return_exceptions: bool = False) -> Iterator[Tuple[int, Union[str, Exception]]]:
+        """
+        Like handle_inputs, but yield (index, response) pairs as soon as each prompt is answered.
+        Clients that cannot run prompts concurrently in their own memories answer them one after another
+        with handle_input, in this conversation; concurrency and memory_factory are then not used.
+        Args:
+            prompts (List[str]): The user inputs.
+            concurrency (int, optional): Maximum number of prompts in flight.
+            memory_factory (Callable, optional): Creates the conversation memory for each prompt.
+            bypass_cache (bool): Skip the response cache.
+            return_exceptions (bool): Yield a failing prompt's exception instead of raising it.
+        Yields:
+            Tuple[int, Union[str, Exception]]: Index of the prompt and its response, in completion order.
+        """
+        for index, prompt in enumerate(prompts):
+            try:
+                # Clients written before bypass_cache existed take the input alone
+                response = self.handle_input(prompt, bypass_cache) if bypass_cache else self.handle_input(prompt)
+            except Exception as e:
+                if not return_exceptions:
+                    raise
+                response = e
+            yield index, response
+    
     @abstractmethod
     def generate_natural_response(self, user_input: str):
         """
@@ -106,11 +159,21 @@ class AgentClient(ABC):
         pass
     
     @abstractmethod
-    def set_context_limits(self, max_messages: int = None, max_tokens_per_message: int = None):
+    def set_context_limits(self, max_messages: int = None, max_tokens_per_message: int = None, max_context_tokens: int = None):
         """
         Set limits for context size and message length.
         Args:
             max_messages (int, optional): Maximum number of messages to keep in context.
             max_tokens_per_message (int, optional): Maximum tokens per message (for truncation).
+            max_context_tokens (int, optional): Maximum total tokens of the messages kept in context.
+        """
+        pass
+
+    def get_stats(self) -> Dict:
+        """
+        Get request statistics for this client (e.g., request count, latency, connection reuse).
+        Clients that collect none return an empty dict.
+        Returns:
+            Dict: Statistics collected since the client was created.
         """
-        pass
\ No newline at end of file
+        return {}
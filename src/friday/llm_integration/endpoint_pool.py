@@ -0,0 +1,344 @@
+import asyncio
+import json
+import sys
+import threading
+import time
+import urllib.request
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set
+from friday.utils.logger import setup_logger
+
+
+def normalize_model(name: str) -> str:
+    # Ollama reports "llama3:latest" for a model requested as "llama3"
+    return name if ":" in name else f"{name}:latest"
+
+
+def is_replica_failure(error: BaseException) -> bool:
+    """
+    Whether an error says something about the replica: connection errors, timeouts and 5xx responses do.
+    A request the replica rejected (4xx, e.g. an unknown model) would fail on every replica the same way.
+    """
+    status = getattr(getattr(error, "response", None), "status_code", None)
+    if status is not None:
+        return status >= 500
+    # requests' connection errors and timeouts are OSErrors; httpx is only checked once something imported it
+    if isinstance(error, (OSError, TimeoutError, asyncio.TimeoutError)):
+        return True
+    httpx = sys.modules.get("httpx")
+    return httpx is not None and isinstance(error, httpx.TransportError)
+
+
+class Endpoint:
+    """State of one Ollama replica as seen by the pool."""
+    def __init__(self, base_url: str):
+        self.base_url = base_url.rstrip("/")
+        self.healthy = True
+        self.outstanding = 0
+        self.requests = 0
+        self.failures = 0
+        # None until the first health check: availability is unknown, so the replica is not excluded
+        self.available_models: Optional[Set[str]] = None
+        self.loaded_models: Set[str] = set()
+
+    def serves(self, model: str) -> bool:
+        return self.available_models is None or model in self.available_models
+
+
+class EndpointPool:
+    """
+    Spreads chat requests over several Ollama replicas.
+
+    - Health: /api/tags (reachable, models available) and /api/ps (models loaded) are polled in a daemon thread;
+      a replica that fails a request (connection error, timeout, 5xx) is taken out of rotation until the next
+      successful check.
+    - Balancing: the replica with the fewest requests in flight wins; replicas that do not have the model loaded
+      pay affinity_penalty extra, because loading a model there costs far more than queueing behind one request.
+    - Failover: a request that fails that way is retried on another replica until every replica was tried;
+      a 4xx response is raised right away.
+    - Hedging: with hedge_percentile set, a request still running after that percentile of recent latencies is sent
+      to a second replica as well, and the first response wins.
+    """
+    def __init__(self, base_endpoints: List[str], chat_path: str = "/api/chat", health_interval: float = 10.0, health_timeout: float = 2.0, affinity_penalty: int = 2, hedge_percentile: Optional[float] = None, hedge_min_samples: int = 20, latency_window: int = 200):
+        if not base_endpoints:
+            raise ValueError("EndpointPool needs at least one endpoint")
+        self.endpoints = [Endpoint(url) for url in base_endpoints]
+        self.chat_path = chat_path
+        self.health_interval = health_interval
+        self.health_timeout = health_timeout
+        self.affinity_penalty = affinity_penalty
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.logger = setup_logger('friday')
+        self._latencies = deque(maxlen=latency_window)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._health_thread: Optional[threading.Thread] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._next = 0
+        self._stats = {"failovers": 0, "hedged": 0, "hedge_wins": 0}
+
+    def chat_url(self, endpoint: Endpoint) -> str:
+        return endpoint.base_url + self.chat_path
+
+    def start(self):
+        """Start periodic health checks in the background; safe to call more than once."""
+        with self._lock:
+            if self._health_thread is not None or self.health_interval <= 0:
+                return
+            self._health_thread = threading.Thread(target=self._health_loop, name="friday-endpoint-health", daemon=True)
+        self._health_thread.start()
+
+    def _health_loop(self):
+        while not self._stop.is_set():
+            self.check_health()
+            self._stop.wait(self.health_interval)
+
+    def check_health(self):
+        for endpoint in self.endpoints:
+            try:
+                available = {normalize_model(m["name"]) for m in self._get_json(endpoint, "/api/tags").get("models", [])}
+                loaded = {normalize_model(m["name"]) for m in self._get_json(endpoint, "/api/ps").get("models", [])}
+            except Exception as e:
+                if endpoint.healthy:
+                    self.logger.warning(f"Endpoint {endpoint.base_url} is unhealthy: {e}")
+                with self._lock:
+                    endpoint.healthy = False
+                continue
+            with self._lock:
+                endpoint.healthy = True
+                endpoint.available_models = available
+                endpoint.loaded_models = loaded
+
+    def _get_json(self, endpoint: Endpoint, path: str) -> Dict:
+        with urllib.request.urlopen(endpoint.base_url + path, timeout=self.health_timeout) as response:
+            return json.loads(response.read() or b"{}")
+
+    def acquire(self, model: str, exclude: Iterable[Endpoint] = ()) -> Optional[Endpoint]:
+        """
+        Pick the best replica for model, not in exclude, and count a request in flight on it.
+        Unhealthy replicas are only used when no healthy one is left. Returns None when every replica is excluded.
+        """
+        model = normalize_model(model)
+        excluded = set(map(id, exclude))
+        with self._lock:
+            candidates = [e for e in self.endpoints if id(e) not in excluded]
+            candidates = [e for e in candidates if e.healthy] or candidates
+            candidates = [e for e in candidates if e.serves(model)] or candidates
+            if not candidates:
+                return None
+            # Rotating the start position breaks ties between equally loaded replicas
+            self._next = (self._next + 1) % len(self.endpoints)
+            order = self.endpoints[self._next:] + self.endpoints[:self._next]
+            candidates.sort(key=lambda e: order.index(e))
+            endpoint = min(candidates, key=lambda e: e.outstanding + (0 if model in e.loaded_models else self.affinity_penalty))
+            endpoint.outstanding += 1
+            endpoint.requests += 1
+            # A replica that served the model once has it loaded, at least until its keep_alive expires
+            endpoint.loaded_models.add(model)
+            return endpoint
+
+    def release(self, endpoint: Endpoint, elapsed: Optional[float] = None, failed: bool = False):
+        with self._lock:
+            endpoint.outstanding -= 1
+            if failed:
+                endpoint.failures += 1
+                endpoint.healthy = False
+            elif elapsed is not None:
+                self._latencies.append(elapsed)
+
+    def hedge_delay(self) -> Optional[float]:
+        if self.hedge_percentile is None or len(self.endpoints) < 2:
+            return None
+        with self._lock:
+            if len(self._latencies) < self.hedge_min_samples:
+                return None
+            latencies = sorted(self._latencies)
+        return latencies[min(int(len(latencies) * self.hedge_percentile / 100), len(latencies) - 1)]
+
+    def _timed(self, send: Callable[[str], Dict], endpoint: Endpoint) -> Dict:
+        start = time.perf_counter()
+        try:
+            data = send(self.chat_url(endpoint))
+        except Exception as e:
+            self.release(endpoint, failed=is_replica_failure(e))
+            raise
+        self.release(endpoint, time.perf_counter() - start)
+        return data
+
+    def post(self, send: Callable[[str], Dict], model: str) -> Dict:
+        """
+        Send a request through the pool, with failover and optional hedging.
+        Args:
+            send (Callable[[str], Dict]): Posts the request to the given chat URL and returns the decoded response.
+            model (str): Model the request is for, used for affinity.
+        """
+        delay = self.hedge_delay()
+        if delay is None:
+            return self._post_with_failover(send, model)
+        return self._post_hedged(send, model, delay)
+
+    def _post_with_failover(self, send: Callable[[str], Dict], model: str) -> Dict:
+        tried: List[Endpoint] = []
+        last_error = None
+        while True:
+            endpoint = self.acquire(model, exclude=tried)
+            if endpoint is None:
+                raise last_error
+            tried.append(endpoint)
+            try:
+                return self._timed(send, endpoint)
+            except Exception as e:
+                if not is_replica_failure(e):
+                    raise
+                self.logger.warning(f"Request to {endpoint.base_url} failed: {e}")
+                last_error = e
+                with self._lock:
+                    self._stats["failovers"] += 1
+
+    def _post_hedged(self, send: Callable[[str], Dict], model: str, delay: float) -> Dict:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=4 * len(self.endpoints), thread_name_prefix="friday-hedge")
+        primary = self.acquire(model)
+        tried = [primary]
+        pending = {self._executor.submit(self._timed, send, primary): primary}
+        hedged = False
+        last_error = None
+        while pending:
+            done, _ = wait(pending, timeout=None if hedged else delay, return_when=FIRST_COMPLETED)
+            if not done:
+                # The primary is slower than the hedge percentile: race it against a second replica
+                hedged = True
+                endpoint = self.acquire(model, exclude=tried)
+                if endpoint is not None:
+                    tried.append(endpoint)
+                    pending[self._executor.submit(self._timed, send, endpoint)] = endpoint
+                    with self._lock:
+                        self._stats["hedged"] += 1
+                continue
+            for future in done:
+                endpoint = pending.pop(future)
+                try:
+                    data = future.result()
+                except Exception as e:
+                    if not is_replica_failure(e):
+                        raise
+                    last_error = e
+                    retry = self.acquire(model, exclude=tried) if not pending else None
+                    if retry is not None:
+                        tried.append(retry)
+                        pending[self._executor.submit(self._timed, send, retry)] = retry
+                        with self._lock:
+                            self._stats["failovers"] += 1
+                    continue
+                if hedged and endpoint is not primary:
+                    with self._lock:
+                        self._stats["hedge_wins"] += 1
+                # The losing request finishes in the background and releases its replica then
+                return data
+        raise last_error
+
+    async def apost(self, send: Callable[[str], Awaitable[Dict]], model: str) -> Dict:
+        """Coroutine version of post for the async client."""
+        delay = self.hedge_delay()
+        tried: List[Endpoint] = []
+        pending: Dict[asyncio.Task, Endpoint] = {}
+        # The hedge is sent at most once; without a hedge delay it never is
+        hedge_due = delay is not None
+        hedged = False
+        last_error = None
+
+        async def timed(endpoint: Endpoint) -> Dict:
+            start = time.perf_counter()
+            try:
+                data = await send(self.chat_url(endpoint))
+            except Exception as e:
+                self.release(endpoint, failed=is_replica_failure(e))
+                raise
+            self.release(endpoint, time.perf_counter() - start)
+            return data
+
+        def launch() -> bool:
+            endpoint = self.acquire(model, exclude=tried)
+            if endpoint is None:
+                return False
+            tried.append(endpoint)
+            pending[asyncio.ensure_future(timed(endpoint))] = endpoint
+            return True
+
+        launch()
+        try:
+            while pending:
+                done, _ = await asyncio.wait(pending, timeout=delay if hedge_due else None, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    hedge_due = False
+                    if launch():
+                        hedged = True
+                        with self._lock:
+                            self._stats["hedged"] += 1
+                    continue
+                for task in done:
+                    endpoint = pending.pop(task)
+                    try:
+                        data = task.result()
+                    except Exception as e:
+                        if not is_replica_failure(e):
+                            raise
+                        last_error = e
+                        if not pending and launch():
+                            with self._lock:
+                                self._stats["failovers"] += 1
+                        continue
+                    if hedged and endpoint is not tried[0]:
+                        with self._lock:
+                            self._stats["hedge_wins"] += 1
+                    return data
+        finally:
+            for task in pending:
+                task.cancel()
+        raise last_error
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["endpoints"] = [
+                {
+                    "url": e.base_url,
+                    "healthy": e.healthy,
+                    "outstanding": e.outstanding,
+                    "requests": e.requests,
+                    "failures": e.failures,
+                    "loaded_models": sorted(e.loaded_models),
+                }
+                for e in self.endpoints
+            ]
+        stats["hedge_delay"] = self.hedge_delay()
+        return stats
+
+    def close(self):
+        self._stop.set()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+
+
+def create_endpoint_pool(client_cfg: Dict, pool_cfg: Dict) -> Optional[EndpointPool]:
+    """
+    Build an EndpointPool from client.endpoints and the pool section of ollama_config.yml,
+    or None when a single endpoint is configured.
+    """
+    endpoints = client_cfg.get("endpoints") or []
+    if len(endpoints) < 2:
+        return None
+    pool = EndpointPool(
+        endpoints,
+        chat_path=client_cfg.get("chat_completion", "/api/chat"),
+        health_interval=pool_cfg.get("health_interval", 10.0),
+        health_timeout=pool_cfg.get("health_timeout", 2.0),
+        affinity_penalty=pool_cfg.get("affinity_penalty", 2),
+        hedge_percentile=pool_cfg.get("hedge_percentile"),
+        hedge_min_samples=pool_cfg.get("hedge_min_samples", 20),
+    )
+    pool.start()
+    return pool
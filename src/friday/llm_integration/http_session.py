@@ -0,0 +1,62 @@
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Dict
+
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+def create_session(pool_connections: int = 4, pool_maxsize: int = 16, max_retries: int = 3, backoff_factor: float = 0.5) -> requests.Session:
+    """
+    Create a keep-alive HTTP session backed by a bounded connection pool.
+    Args:
+        pool_connections (int): Number of per-host pools to cache.
+        pool_maxsize (int): Maximum number of connections kept alive per host.
+        max_retries (int): Retries for connection errors and retryable status codes. Read timeouts are never
+            retried: a /api/chat POST that timed out may still be generating, and resending it doubles the load.
+        backoff_factor (float): Exponential backoff factor between retries.
+    Returns:
+        requests.Session: A session that reuses connections across calls.
+    """
+    retry = Retry(
+        total=max_retries,
+        read=0,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUS_CODES,
+        allowed_methods=frozenset({"GET", "POST"}),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def connection_stats(session: requests.Session) -> Dict[str, int]:
+    """
+    Report how many connections the session opened and how many requests reused one.
+    Args:
+        session (requests.Session): Session created by create_session.
+    Returns:
+        Dict[str, int]: Opened connections, total requests and reused connections.
+    """
+    opened = 0
+    total = 0
+    seen = set()
+    for adapter in session.adapters.values():
+        if id(adapter) in seen or not hasattr(adapter, "poolmanager"):
+            continue
+        seen.add(id(adapter))
+        pools = adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            opened += pool.num_connections
+            total += pool.num_requests
+    return {
+        "connections_opened": opened,
+        "pooled_requests": total,
+        "connections_reused": max(total - opened, 0),
+    }
@@ -0,0 +1,79 @@
+import re
+import threading
+from typing import Dict, List, Optional
+from friday.tooling.workspace_index import WorkspaceFileIndex
+
+# Tokens that look like file names or relative paths: something.ext or dir/something.ext
+FILE_TOKEN_PATTERN = re.compile(r"(?<![\w@/.-])((?:[\w.-]+/)*[\w-][\w.-]*\.[A-Za-z][A-Za-z0-9]{0,7})(?![\w/-])")
+URL_PATTERN = re.compile(r"\b[a-z][a-z0-9+.-]*://\S+", re.IGNORECASE)
+
+GENERAL_QUESTION_PATTERN = re.compile(
+    r"^\s*(what\s+(is|are|was|were|does|do)|what's|explain|define|describe|how\s+(do|does|can|to|would|should)|"
+    r"why\s+(is|are|do|does|would)|when\s+(should|would|do)|difference\s+between|compare|tell\s+me\s+about|give\s+me|write|can\s+you\s+explain)\b",
+    re.IGNORECASE,
+)
+# Wording that points at the workspace or at earlier turns; such input needs the LLM router
+WORKSPACE_CUE_PATTERN = re.compile(
+    r"\b(file|files|folder|directory|repo|repository|project|codebase|module|package|this|that|these|those|it|its|them|"
+    r"above|previous|earlier|again|our|my|here|line|lines|function|method|class|implementation)\b",
+    re.IGNORECASE,
+)
+
+
+class LocalRouter:
+    """
+    Deterministic pre-router that decides the action locally when the input is unambiguous,
+    so the LLM routing round trip can be skipped.
+
+    - Input naming files that all exist in the workspace -> read_file / read_files.
+    - A plain general question with no file names and no reference to the workspace or earlier turns -> generate_action.
+    - Anything else returns None and the caller falls back to the LLM router.
+    """
+    def __init__(self, file_index: WorkspaceFileIndex):
+        self.file_index = file_index
+        self._stats_lock = threading.Lock()
+        self._stats = {"routed": 0, "fast_path": 0, "fallback": 0}
+
+    def extract_file_names(self, user_input: str) -> List[str]:
+        text = URL_PATTERN.sub(" ", user_input)
+        names = []
+        for match in FILE_TOKEN_PATTERN.finditer(text):
+            name = match.group(1).rstrip(".")
+            if name not in names:
+                names.append(name)
+        return names
+
+    def route(self, user_input: str) -> Optional[Dict]:
+        """
+        Args:
+            user_input (str): The user's input.
+        Returns:
+            Optional[Dict]: Action JSON in the same shape the LLM router produces, or None when not confident.
+        """
+        decision = self._decide(user_input)
+        with self._stats_lock:
+            self._stats["routed"] += 1
+            self._stats["fast_path" if decision else "fallback"] += 1
+        return decision
+
+    def _decide(self, user_input: str) -> Optional[Dict]:
+        question = user_input.strip()
+        if not question:
+            return None
+        file_names = self.extract_file_names(question)
+        if file_names:
+            # Every named file must exist; otherwise the user may be asking about files in general
+            if not all(self.file_index.resolve(name, fuzzy=False) for name in file_names):
+                return None
+            if len(file_names) == 1:
+                return {"action": "read_file", "file": file_names[0], "question": question}
+            return {"action": "read_files", "files": file_names, "question": question}
+        if GENERAL_QUESTION_PATTERN.search(question) and not WORKSPACE_CUE_PATTERN.search(question):
+            return {"action": "generate_action", "question": question}
+        return None
+
+    def get_stats(self) -> Dict:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["hit_rate"] = stats["fast_path"] / stats["routed"] if stats["routed"] else 0.0
+        return stats
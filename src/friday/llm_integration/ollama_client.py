@@ -1,175 +1,619 @@
 from friday.llm_integration.base_client import AgentClient
-from friday.prompts import FILE_ANALYSIS_SYSTEM_PROMPT, GENERAL_SYSTEM_PROMPT, CONTEXT_PROMPT
-import importlib.resources as pkg_resources
-import yaml
+from friday.config.settings import ROUTING_MODES
+from friday.llm_integration.ollama_request_builder import OllamaRequestBuilder
+import copy
+import json
 import requests
-from friday import config
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from friday.llm_integration.endpoint_pool import is_replica_failure
+from friday.llm_integration.http_session import create_session, connection_stats
+from friday.llm_integration.response_cache import ResponseCache, cache_key, create_response_cache
+from friday.llm_integration.single_flight import SingleFlight
+from friday.llm_integration.local_router import LocalRouter
+from friday.tooling.code_index import create_code_index
+from friday.tooling.workspace_index import WorkspaceFileIndex, create_workspace_index
 from friday.utils.parse_json import parse_json_from_model
+from friday.utils.chunking import group_by_budget, iter_line_chunks
+from friday.utils.tokens import TokenCounter
 from pathlib import Path
-from typing import List, Dict, Optional
-from datetime import datetime
+from typing import Callable, Iterator, List, Dict, Optional, Tuple, Union
 from friday.memory.base_conversation_memory import BaseConversationMemory
 from friday.memory.in_memory_conversation_memory import InMemoryConversationMemory
-from friday.memory.hybrid_conversation_memory import HybridConversationMemory
+from friday.memory.hybrid_conversation_memory import HybridConversationMemory, rank_by_similarity
+from friday.memory.write_behind import create_write_behind
 from friday.utils.logger import setup_logger
 
-class OllamaClient(AgentClient):
-    def __init__(self, max_context_messages: int = 20, max_tokens_per_message: int = 2000, memory: BaseConversationMemory = None):
+class OllamaClient(AgentClient, OllamaRequestBuilder):
+    def __init__(self, max_context_messages: int = 20, max_tokens_per_message: int = 2000, memory: BaseConversationMemory = None, http_session: requests.Session = None, read_files_concurrency: int = None, cache: ResponseCache = None, file_index: WorkspaceFileIndex = None, local_router: bool = None, routing_mode: str = None, warm_up: str = None, token_counter: TokenCounter = None, config_overrides: Dict = None):
         self.logger = setup_logger('friday')
         self.root_dir = Path.cwd()
         # Load configuration
-        with pkg_resources.files(config).joinpath("ollama_config.yml").open("r") as file:
-            data = yaml.safe_load(file)
-        base_endpoint = data["client"]["base_endpoint"]
-        chat_completion = data["client"]["chat_completion"]
-        self.endpoint = base_endpoint + chat_completion
-        self.model = data["client"]["model"]
+        data = self._load_config(config_overrides)
+
+        # HTTP connection pool, reused across calls and sessions
+        http_config = data.get("http", {})
+        self.timeout = (http_config.get("connect_timeout", 5), http_config.get("read_timeout", 300))
+        if http_session is None:
+            self.session = create_session(
+                pool_connections=http_config.get("pool_connections", 4),
+                pool_maxsize=http_config.get("pool_maxsize", 16),
+                max_retries=http_config.get("max_retries", 3),
+                backoff_factor=http_config.get("backoff_factor", 0.5),
+            )
+        else:
+            self.session = http_session
+        concurrency_config = data.get("concurrency", {})
+        self.read_files_concurrency = read_files_concurrency or concurrency_config.get("read_files", 4)
+        self.batch_concurrency = concurrency_config.get("batch", 4)
+        self._load_token_config(data, token_counter)
+        self._load_chunking_config(data)
+        self._load_runtime_config(data, warm_up)
+        self.cache = create_response_cache(data.get("cache", {})) if cache is None else cache
+        self._load_semantic_cache_config(data)
+        self._load_recall_config(data)
+        self._load_compaction_config(data)
+        self._compaction_lock = threading.Lock()
+        # Identical requests in flight at the same time (batch workers, server sessions) share one Ollama call
+        self.single_flight = SingleFlight() if data.get("cache", {}).get("coalesce", True) else None
+        self.file_index = create_workspace_index(self.root_dir, data.get("workspace", {})) if file_index is None else file_index
+        self.code_index = create_code_index(self.file_index, data.get("code_index", {}), self.token_counter.count_fn)
+        # Conversation writes of the default memory (and the server's sessions) are committed in the background
+        self.write_behind = create_write_behind(data.get("write_behind", {}))
+        if local_router is None:
+            local_router = data.get("router", {}).get("local_fast_path", True)
+        self.router = LocalRouter(self.file_index) if local_router else None
+        self.routing_mode = routing_mode or data.get("router", {}).get("mode", "json")
+        if self.routing_mode not in ROUTING_MODES:
+            raise ValueError(f"Unknown routing mode {self.routing_mode!r}, expected one of {ROUTING_MODES}")
+        self._stats_lock = threading.Lock()
+        self._stats = {"requests": 0, "errors": 0, "total_request_time": 0.0, "streamed_requests": 0, "total_time_to_first_token": 0.0, "warm_up_time": None, "prompt_tokens": 0, "prompt_eval_count": 0, "prompt_eval_duration": 0, "recalled_messages": 0, "compactions": 0, "compacted_messages": 0, "compaction_errors": 0}
 
         if memory is None:
-            self.memory = HybridConversationMemory(max_context_messages, max_tokens_per_message)
+            self.memory = HybridConversationMemory(max_context_messages, max_tokens_per_message, max_context_tokens=self.max_prompt_tokens, token_counter=self.token_counter, write_behind=self.write_behind)
         else:
             self.memory = memory
+        if self.warm_up_mode != "none":
+            self.warm_up(background=self.warm_up_mode == "background")
+
+    def warm_up(self, background: bool = False) -> Optional[threading.Thread]:
+        """
+        Load the model into Ollama ahead of the first prompt, pinned for keep_alive.
+        Args:
+            background (bool): Run the request in a daemon thread and return it instead of blocking.
+        """
+        if background:
+            thread = threading.Thread(target=self._warm_up, name="friday-warm-up", daemon=True)
+            thread.start()
+            return thread
+        self._warm_up()
+        return None
+
+    def _warm_up(self) -> bool:
+        start = time.perf_counter()
+        try:
+            # Every replica in the pool gets the model loaded, not only the one that would be picked first
+            for url in self._chat_urls():
+                response = self.session.post(url, json=self._warm_up_payload(), timeout=self.timeout)
+                response.raise_for_status()
+        except requests.RequestException as e:
+            # A failed warm-up only means the first real request pays the load cost
+            self.logger.warning(f"Model warm-up failed: {e}")
+            return False
+        elapsed = time.perf_counter() - start
+        with self._stats_lock:
+            self._stats["warm_up_time"] = elapsed
+        self.logger.info(f"Model {self.model} warmed up in {elapsed:.2f}s")
+        return True
     
     def _build_context_prompt(self, current_prompt: str) -> str:
-        history = self.memory.get_messages()
-        if not history:
-            return current_prompt
-        context_parts = ["Previous conversation context:"]
-        for msg in history[-10:]:
-            role = msg["role"].upper()
-            content = msg["content"][:500]
-            if "metadata" in msg and msg["metadata"].get("action"):
-                content += f" [Action: {msg['metadata']['action']}]"
-            context_parts.append(f"{role}: {content}")
-        context_parts.append(f"\nCurrent request: {current_prompt}")
-        return "\n".join(context_parts)
+        return self._build_context_prompt_from(self.memory.get_messages(), current_prompt)
     
-    def handle_input(self, user_input: str):
+    def handle_input(self, user_input: str, bypass_cache: bool = False):
+        return "".join(self._respond(user_input, stream=False, bypass_cache=bypass_cache))
+
+    def handle_input_stream(self, user_input: str, bypass_cache: bool = False) -> Iterator[str]:
+        yield from self._respond(user_input, stream=True, bypass_cache=bypass_cache)
+
+    def handle_inputs(self, prompts: List[str], concurrency: int = None, memory_factory: Callable[[], BaseConversationMemory] = None, bypass_cache: bool = False, return_exceptions: bool = False) -> List[Union[str, Exception]]:
+        """
+        Answer independent prompts concurrently, returning the responses in input order.
+        See handle_inputs_as_completed for the arguments.
+        """
+        results = [None] * len(prompts)
+        for index, result in self.handle_inputs_as_completed(prompts, concurrency, memory_factory, bypass_cache, return_exceptions):
+            results[index] = result
+        return results
+
+    def handle_inputs_as_completed(self, prompts: List[str], concurrency: int = None, memory_factory: Callable[[], BaseConversationMemory] = None, bypass_cache: bool = False, return_exceptions: bool = False) -> Iterator[Tuple[int, Union[str, Exception]]]:
+        """
+        Answer independent prompts concurrently and yield (index, response) pairs as each one finishes.
+        Up to `concurrency` prompts are in flight, so the routing call of one prompt overlaps with the answer
+        calls of others. Every prompt runs in its own conversation: the HTTP pool, cache, file index and stats
+        are shared with this client, the conversation memory is not.
+        Args:
+            prompts (List[str]): Independent user inputs.
+            concurrency (int, optional): Maximum prompts in flight; defaults to concurrency.batch in the config.
+            memory_factory (Callable, optional): Creates the memory for each prompt; defaults to InMemoryConversationMemory.
+            bypass_cache (bool): Skip the response cache.
+            return_exceptions (bool): Yield a failing prompt's exception instead of raising it.
+        """
+        if not prompts:
+            return
+        memory_factory = memory_factory or InMemoryConversationMemory
+        workers = min(concurrency or self.batch_concurrency, len(prompts))
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="friday-batch")
+        try:
+            futures = {
+                executor.submit(self._handle_isolated_input, prompt, memory_factory, bypass_cache): index
+                for index, prompt in enumerate(prompts)
+            }
+            for future in as_completed(futures):
+                try:
+                    yield futures[future], future.result()
+                except Exception as e:
+                    if not return_exceptions:
+                        raise
+                    self.logger.error(f"Batch prompt {futures[future]} failed: {e}")
+                    yield futures[future], e
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _handle_isolated_input(self, user_input: str, memory_factory: Callable[[], BaseConversationMemory], bypass_cache: bool = False) -> str:
+        # Shallow copy: shares the session, cache, file index, router and stats, but not the conversation.
+        # The memory is only created once a worker picks the prompt up
+        client = copy.copy(self)
+        client.memory = memory_factory()
+        client.prompt_assembler = self.prompt_assembler.fork()
+        return client.handle_input(user_input, bypass_cache)
+
+    def _respond(self, user_input: str, stream: bool = False, bypass_cache: bool = False) -> Iterator[str]:
         self.logger.info(f"User query: {user_input}")
         self.memory.add_to_history("user", user_input)
-        decision = self.generate_action(f"{user_input}\nRespond ONLY with JSON.", include_history=True)
-        self.logger.info(f"Message sent to agent: {user_input}\nRespond ONLY with JSON.")
-        self.logger.info(f"Agent raw response: {decision}")
-        decision_parsed = parse_json_from_model(decision)
+        if self.compaction_enabled:
+            self._summary = self.memory.get_running_summary()
+        self._recall(user_input)
+        decision_parsed = self._decide(user_input, bypass_cache)
         if not decision_parsed:
             error_msg = "Failed to parse decision from model"
             self.memory.add_to_history("assistant", error_msg, {"error": "parse_failure"})
             self.logger.error(error_msg)
-            return error_msg
+            yield error_msg
+            return
         action = decision_parsed.get("action")
-        response = None
+        parts = []
         if action == "read_file":
             file_name = decision_parsed.get("file")
             question = decision_parsed.get("question")
-            matches = list(self.root_dir.rglob(file_name))
-            if not matches:
-                response = f"Could not find {file_name}"
+            matches = self.file_index.resolve(file_name)
+            if len(matches) != 1:
+                parts.append(self._unresolved_message(file_name, matches))
+                yield parts[-1]
             else:
                 file_path = matches[0]
-                response = self.read_file(question, file_path)
-            self.memory.add_to_history("assistant", response, {
+                for token in self._read_file_tokens(question, file_path, stream, bypass_cache):
+                    parts.append(token)
+                    yield token
+            metadata = {
                 "action": "read_file",
                 "file": file_name,
-                "found": bool(matches)
-            })
+                "found": len(matches) == 1,
+                "ambiguous": len(matches) > 1
+            }
         elif action == "read_files":
             file_names = decision_parsed.get("files", [])
             question = decision_parsed.get("question")
-            responses = []
             found_files = []
             not_found_files = []
+            ambiguous_files = []
+            file_paths = []
             for file_name in file_names:
-                matches = list(self.root_dir.rglob(file_name))
-                if not matches:
-                    not_found_files.append(file_name)
-                    responses.append(f"Could not find {file_name}")
+                matches = self.file_index.resolve(file_name)
+                if len(matches) != 1:
+                    (ambiguous_files if matches else not_found_files).append(file_name)
+                    file_paths.append(None)
                 else:
-                    file_path = matches[0]
                     found_files.append(file_name)
-                    resp = self.read_file(question, file_path)
-                    responses.append(f"--- {file_name} ---\n{resp}")
-            response = "\n\n".join(responses)
-            self.memory.add_to_history("assistant", response, {
+                    file_paths.append(matches[0])
+            for token in self._read_files_tokens(question, file_names, file_paths, stream, bypass_cache):
+                parts.append(token)
+                yield token
+            metadata = {
                 "action": "read_files",
                 "files": file_names,
                 "found": found_files,
-                "not_found": not_found_files
-            })
+                "not_found": not_found_files,
+                "ambiguous": ambiguous_files
+            }
         elif action == "generate_action":
-            question = decision_parsed.get("question")
-            response = self.generate_natural_response(question)
-            self.memory.add_to_history("assistant", response, {"action": "generate_action"})
+            # The stored turn is answered rather than the router's restatement of it,
+            # so the answer prompt is a prefix of the routing prompt Ollama has just evaluated
+            if "answer" in decision_parsed:
+                # Tool-calling mode: the model already answered in the routing call
+                tokens = [decision_parsed["answer"]]
+            elif stream:
+                tokens = self.stream_natural_response(user_input, bypass_cache=bypass_cache)
+            else:
+                tokens = [self.generate_natural_response(user_input, bypass_cache=bypass_cache)]
+            for token in tokens:
+                parts.append(token)
+                yield token
+            metadata = {"action": "generate_action"}
+            if "semantic_similarity" in decision_parsed:
+                metadata["semantic_cache"] = round(decision_parsed["semantic_similarity"], 4)
+            entry = self._semantic_entry(decision_parsed, user_input, "".join(parts))
+            if entry is not None:
+                self.semantic_cache.store(*entry)
         else:
-            response = f"Unknown action: {action}"
-            self.memory.add_to_history("assistant", response, {"error": "unknown_action"})
+            parts.append(f"Unknown action: {action}")
+            yield parts[-1]
+            metadata = {"error": "unknown_action"}
+        # The complete response is only written to memory once the stream has ended
+        response = "".join(parts)
+        self.memory.add_to_history("assistant", response, metadata)
         self.logger.info(f"Final response to user: {response}")
-        return response
-    
-    def generate_natural_response(self, user_input: str):
-        messages = []
-        history = self.memory.get_messages()
-        if history:
-            for msg in history:
-                if msg["role"] == "system":
-                    messages.append({"role": "system", "content": CONTEXT_PROMPT})
-                elif msg["role"] in ["user", "assistant"]:
-                    if msg["content"] != user_input:
-                        messages.append({"role": msg["role"], "content": msg["content"]})
+        self._recalled = []
+        self._schedule_compaction()
+
+    def _decide(self, user_input: str, bypass_cache: bool = False) -> Optional[Dict]:
+        """
+        Decide which action answers the input: local fast path first, then the LLM router
+        (a JSON routing prompt, or a native tool-calling request in "tools" mode).
+        """
+        if self.router is not None:
+            decision_parsed = self.router.route(user_input)
+            if decision_parsed:
+                self.logger.info(f"Local router decision: {decision_parsed}")
+                return decision_parsed
+        vector = None
+        if self.semantic_cache is not None and not bypass_cache and self._semantic_cache_applies(self.memory.get_messages()):
+            vector = self._embed_question(user_input)
+            if vector is not None:
+                decision_parsed = self._semantic_decision(user_input, vector)
+                if decision_parsed:
+                    return decision_parsed
+        if self.routing_mode == "tools":
+            payload = self._tools_payload(self._tool_messages(self.memory.get_messages()))
+            self.logger.info(f"Payload sent to agent (tools): {payload}")
+            message = self._post_chat(payload, bypass_cache)["message"]
+            self.logger.info(f"Agent raw response: {message}")
+            decision_parsed = self._decision_from_tool_message(message, user_input)
         else:
-            messages.append({"role": "system", "content": CONTEXT_PROMPT})
-        messages.append({"role": "user", "content": user_input})
-        payload = {
-            "model": self.model,
-            "messages": messages,
-            "stream": False
-        }
+            decision = self.generate_action(user_input, include_history=True, bypass_cache=bypass_cache)
+            self.logger.info(f"Agent raw response: {decision}")
+            decision_parsed = parse_json_from_model(decision)
+        if decision_parsed and vector is not None:
+            decision_parsed["embedding"] = vector
+        return decision_parsed
+
+    def _schedule_compaction(self) -> Optional[threading.Thread]:
+        """
+        Fold old turns into the running summary on a daemon thread, off the user's request path.
+        At most one summarization per conversation runs at a time; returns its thread, or None.
+        """
+        if not self.compaction_enabled:
+            return None
+        memory = self.memory
+        with self._compaction_lock:
+            if id(memory) in self._compacting:
+                return None
+            self._compacting.add(id(memory))
+        thread = threading.Thread(target=self._compact, args=(memory,), name="friday-compaction", daemon=True)
+        thread.start()
+        return thread
+
+    def _compact(self, memory: BaseConversationMemory):
+        try:
+            summary = memory.get_running_summary()
+            pending = self._compaction_pending(summary, memory.get_messages(), memory.get_evicted())
+            if not pending:
+                return
+            content = self._summary_from_response(self._post_chat(self._compaction_payload(summary, pending), bypass_cache=True))
+            memory.set_running_summary(content, pending[-1]["timestamp"])
+            self.logger.info(f"Compacted {len(pending)} messages into the running summary")
+            with self._stats_lock:
+                self._stats["compactions"] += 1
+                self._stats["compacted_messages"] += len(pending)
+        except Exception as e:
+            # The turns stay in the prompt and are folded in on a later attempt
+            self.logger.warning(f"Summarization failed: {e}")
+            with self._stats_lock:
+                self._stats["compaction_errors"] += 1
+        finally:
+            with self._compaction_lock:
+                self._compacting.discard(id(memory))
+
+    def _embed_question(self, text: str) -> Optional[List[float]]:
+        # Without an embedding the turn simply skips the semantic cache
+        vectors = self._embed([text])
+        return vectors[0] if vectors else None
+
+    def _embed(self, texts: List[str]) -> Optional[List[List[float]]]:
+        start = time.perf_counter()
+        try:
+            response = self.session.post(self.embed_endpoint, json=self._embed_payload(texts), timeout=self.timeout)
+            response.raise_for_status()
+            vectors = response.json()["embeddings"]
+        except (requests.RequestException, KeyError, ValueError) as e:
+            self.logger.warning(f"Embedding request failed: {e}")
+            vectors = None
+        if self.semantic_cache is not None:
+            self.semantic_cache.record_embedding(time.perf_counter() - start, failed=vectors is None)
+        return vectors
+
+    def _recall(self, user_input: str):
+        """Retrieve archived messages relevant to this turn; they are added to its prompts as a note."""
+        self._recalled = []
+        if not self.recall_enabled:
+            return
+        limit = self.recall_candidates if self.recall_rerank else self.recall_limit
+        recalled = self.memory.retrieve(user_input, limit)
+        if self.recall_rerank and len(recalled) > 1:
+            vectors = self._embed([user_input] + [msg["content"] for msg in recalled])
+            if vectors:
+                recalled = rank_by_similarity(vectors[0], recalled, vectors[1:], self.recall_limit)
+        self._recalled = recalled[:self.recall_limit]
+        if self._recalled:
+            self.logger.info(f"Recalled {len(self._recalled)} archived messages")
+            with self._stats_lock:
+                self._stats["recalled_messages"] += len(self._recalled)
+
+    def _read_files_tokens(self, question: str, file_names: List[str], file_paths: List[Optional[Path]], stream: bool, bypass_cache: bool = False) -> Iterator[str]:
+        """
+        Analyze several files, running the per-file LLM calls concurrently (up to read_files_concurrency)
+        while yielding the sections in their original order. A failure on one file is reported inline.
+        """
+        found = [index for index, file_path in enumerate(file_paths) if file_path is not None]
+        concurrent = self.read_files_concurrency > 1 and len(found) > 1
+        if concurrent:
+            executor = ThreadPoolExecutor(max_workers=min(self.read_files_concurrency, len(found)), thread_name_prefix="friday-read-files")
+            futures = {index: executor.submit(self.read_file, question, file_paths[index], bypass_cache) for index in found}
+        try:
+            for index, file_name in enumerate(file_names):
+                if index:
+                    yield "\n\n"
+                if file_paths[index] is None:
+                    yield self._unresolved_message(file_name)
+                    continue
+                yield f"--- {file_name} ---\n"
+                try:
+                    if concurrent:
+                        yield futures[index].result()
+                    else:
+                        yield from self._read_file_tokens(question, file_paths[index], stream, bypass_cache)
+                except Exception as e:
+                    self.logger.error(f"Failed to analyze {file_name}: {e}")
+                    yield f"Error reading {file_name}: {e}"
+        finally:
+            if concurrent:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+    def _read_file_tokens(self, user_input: str, file_path: Path, stream: bool, bypass_cache: bool = False) -> Iterator[str]:
+        if stream:
+            yield from self.stream_read_file(user_input, file_path, bypass_cache)
+        else:
+            yield self.read_file(user_input, file_path, bypass_cache)
+
+    def generate_natural_response(self, user_input: str, bypass_cache: bool = False):
+        payload = self._chat_payload(self._natural_response_messages(user_input, self.memory.get_messages()))
         self.logger.info(f"Payload sent to agent (generate_natural_response): {payload}")
-        response = requests.post(self.endpoint, json=payload)
-        response.raise_for_status()
-        return response.json()["message"]["content"]
+        return self._post_chat(payload, bypass_cache)["message"]["content"]
+
+    def stream_natural_response(self, user_input: str, bypass_cache: bool = False) -> Iterator[str]:
+        payload = self._chat_payload(self._natural_response_messages(user_input, self.memory.get_messages()), stream=True)
+        self.logger.info(f"Payload sent to agent (stream_natural_response): {payload}")
+        yield from self._stream_chat(payload, bypass_cache)
     
-    def generate_action(self, user_input: str, include_history: bool = False):
-        messages = []
-        history = self.memory.get_messages()
-        if include_history and history:
-            for msg in history:
-                if msg["role"] in ["user", "assistant", "system"]:
-                    messages.append({"role": msg["role"], "content": msg["content"]})
-        else:
-            messages.append({"role": "system", "content": GENERAL_SYSTEM_PROMPT})
-        messages.append({"role": "user", "content": user_input})
-        payload = {
-            "model": self.model,
-            "messages": messages,
-            "stream": False
-        }
+    def generate_action(self, user_input: str, include_history: bool = False, bypass_cache: bool = False):
+        payload = self._chat_payload(self._action_messages(user_input, self.memory.get_messages(), include_history))
         self.logger.info(f"Payload sent to agent (generate_action): {payload}")
-        response = requests.post(self.endpoint, json=payload)
-        response.raise_for_status()
-        return response.json()["message"]["content"]
-    
-    def read_file(self, user_input: str, file_path: Path):
+        return self._post_chat(payload, bypass_cache)["message"]["content"]
+
+    def _read_file_messages(self, user_input: str, file_path: Path) -> List[Dict]:
         with open(file_path, "r") as f:
             file_content = f.read()
-        context_info = ""
-        history = self.memory.get_messages()
-        if history:
-            recent_context = [msg for msg in history[-5:] if msg["role"] == "user"]
-            if recent_context:
-                context_info = f"\nRecent conversation context: {recent_context[-1]['content'][:200]}"
-        messages = [
-            {"role": "system", "content": FILE_ANALYSIS_SYSTEM_PROMPT},
-            {"role": "user", "content": f"Here is a file:\n\n{file_content}\n\nQuestion: {user_input}{context_info}"}
-        ]
-        payload = {
-            "model": self.model,
-            "messages": messages,
-            "stream": False
-        }
-        response = requests.post(self.endpoint, json=payload)
-        response.raise_for_status()
-        return response.json()["message"]["content"]
-    
+        return self._file_messages(user_input, file_content, self.memory.get_messages())
+
+    def read_file(self, user_input: str, file_path: Path, bypass_cache: bool = False):
+        payload = self._read_file_payload(user_input, file_path, False, bypass_cache)
+        return self._post_chat(payload, bypass_cache)["message"]["content"]
+
+    def stream_read_file(self, user_input: str, file_path: Path, bypass_cache: bool = False) -> Iterator[str]:
+        payload = self._read_file_payload(user_input, file_path, True, bypass_cache)
+        yield from self._stream_chat(payload, bypass_cache)
+
+    def _read_file_payload(self, user_input: str, file_path: Path, stream: bool, bypass_cache: bool = False) -> Dict:
+        """
+        Payload for the final file-analysis call. Large files are first analyzed chunk by chunk (map),
+        so the returned payload is the reduce step over the partial answers.
+        """
+        excerpt = self._file_excerpt(user_input, file_path)
+        if excerpt is not None:
+            return self._chat_payload(self._file_messages(user_input, excerpt["content"], self.memory.get_messages()), stream=stream)
+        if not self._is_large_file(file_path):
+            return self._chat_payload(self._read_file_messages(user_input, file_path), stream=stream)
+        file_name = Path(file_path).name
+        partials = self._map_file_chunks(user_input, file_path, bypass_cache)
+        partials = self._reduce_partials(user_input, partials, file_name, bypass_cache)
+        return self._chat_payload(self._reduce_messages(user_input, partials, file_name, self.memory.get_messages()), stream=stream)
+
+    def _map_file_chunks(self, user_input: str, file_path: Path, bypass_cache: bool = False) -> List[str]:
+        # At most chunk_concurrency chunks are in flight, which bounds peak memory regardless of file size
+        file_name = Path(file_path).name
+        partials = []
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=self.chunk_concurrency, thread_name_prefix="friday-chunks") as executor:
+            for start_line, end_line, chunk in iter_line_chunks(file_path, self.chunk_tokens, self.token_counter.count_fn):
+                if len(pending) >= self.chunk_concurrency:
+                    partials.append(pending.popleft().result())
+                payload = self._chat_payload(self._chunk_messages(user_input, chunk, start_line, end_line, file_name))
+                pending.append(executor.submit(self._chunk_answer, payload, start_line, end_line, bypass_cache))
+            while pending:
+                partials.append(pending.popleft().result())
+        return partials
+
+    def _chunk_answer(self, payload: Dict, start_line: int, end_line: int, bypass_cache: bool = False) -> str:
+        return f"Lines {start_line}-{end_line}:\n" + self._post_chat(payload, bypass_cache)["message"]["content"]
+
+    def _reduce_partials(self, user_input: str, partials: List[str], file_name: str, bypass_cache: bool = False) -> List[str]:
+        # Tree reduction: combine groups of partial answers until they fit in one reduce prompt
+        while len(partials) > 1 and sum(self.token_counter.count(p) for p in partials) > self.reduce_tokens:
+            groups = group_by_budget(partials, self.reduce_tokens, self.token_counter.count)
+            if len(groups) == len(partials):
+                break
+            payloads = [self._chat_payload(self._reduce_messages(user_input, group, file_name, [])) for group in groups]
+            with ThreadPoolExecutor(max_workers=self.chunk_concurrency, thread_name_prefix="friday-chunks") as executor:
+                partials = list(executor.map(lambda payload: self._post_chat(payload, bypass_cache)["message"]["content"], payloads))
+        return partials
+
+    def _post_chat(self, payload: Dict, bypass_cache: bool = False) -> Dict:
+        use_cache = self.cache is not None and not bypass_cache
+        if use_cache:
+            cached = self.cache.get(payload)
+            if cached is not None:
+                return cached
+        if self.single_flight is None:
+            return self._fetch_chat(payload, use_cache)
+        return self.single_flight.call(cache_key(payload), lambda: self._fetch_chat(payload, use_cache))
+
+    def _fetch_chat(self, payload: Dict, use_cache: bool) -> Dict:
+        start = time.perf_counter()
+        failed = False
+        data = None
+        try:
+            data = self._send_chat(payload)
+            if use_cache:
+                self.cache.set(payload, data)
+            return data
+        except (requests.RequestException, ValueError):
+            # ValueError: a response that is not JSON
+            failed = True
+            raise
+        finally:
+            self._record_request(time.perf_counter() - start, failed, prompt_eval=self._prompt_eval(payload, data))
+
+    def _send_chat(self, payload: Dict) -> Dict:
+        def send(url: str) -> Dict:
+            response = self.session.post(url, json=payload, timeout=self.timeout)
+            response.raise_for_status()
+            return response.json()
+
+        if self.endpoint_pool is None:
+            return send(self.endpoint)
+        return self.endpoint_pool.post(send, self.model)
+
+    def _stream_chat(self, payload: Dict, bypass_cache: bool = False) -> Iterator[str]:
+        """
+        Post a streaming chat request and yield content tokens from Ollama's NDJSON chunks as they arrive.
+        A cached response is replayed as a single token; a completed stream is written to the cache.
+        Concurrent identical requests share one call through single_flight.
+        """
+        use_cache = self.cache is not None and not bypass_cache
+        if use_cache:
+            cached = self.cache.get(payload)
+            if cached is not None:
+                yield cached["message"]["content"]
+                return
+        if self.single_flight is None:
+            yield from self._fetch_stream(payload, use_cache)
+        else:
+            yield from self.single_flight.stream(cache_key(payload), lambda: self._fetch_stream(payload, use_cache))
+
+    def _fetch_stream(self, payload: Dict, use_cache: bool) -> Iterator[str]:
+        tokens = []
+        start = time.perf_counter()
+        first_token_time = None
+        failed = False
+        replica_failed = False
+        final_chunk = None
+        # Streams are not hedged or retried elsewhere: tokens may already have reached the caller
+        replica = self.endpoint_pool.acquire(self.model) if self.endpoint_pool is not None else None
+        url = self.endpoint if replica is None else self.endpoint_pool.chat_url(replica)
+        try:
+            response = self.session.post(url, json=payload, timeout=self.timeout, stream=True)
+            with response:
+                response.raise_for_status()
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    if "error" in chunk:
+                        raise RuntimeError(f"Ollama stream error: {chunk['error']}")
+                    token = chunk.get("message", {}).get("content", "")
+                    if token:
+                        if first_token_time is None:
+                            first_token_time = time.perf_counter() - start
+                        tokens.append(token)
+                        yield token
+                    if chunk.get("done"):
+                        final_chunk = chunk
+                        if use_cache:
+                            self.cache.set(payload, {"message": {"role": "assistant", "content": "".join(tokens)}})
+                        break
+        except (requests.RequestException, RuntimeError) as e:
+            failed = True
+            replica_failed = is_replica_failure(e)
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            if replica is not None:
+                self.endpoint_pool.release(replica, elapsed, failed and replica_failed)
+            self._record_request(elapsed, failed, first_token_time, self._prompt_eval(payload, final_chunk))
+
+    def _record_request(self, elapsed: float, failed: bool, time_to_first_token: Optional[float] = None, prompt_eval: Optional[Tuple[Optional[int], int, int]] = None):
+        with self._stats_lock:
+            self._stats["requests"] += 1
+            self._stats["total_request_time"] += elapsed
+            if failed:
+                self._stats["errors"] += 1
+            if time_to_first_token is not None:
+                self._stats["streamed_requests"] += 1
+                self._stats["total_time_to_first_token"] += time_to_first_token
+            if prompt_eval is not None:
+                prompt_tokens, eval_count, eval_duration = prompt_eval
+                if prompt_tokens is not None:
+                    self._stats["prompt_tokens"] += prompt_tokens
+                self._stats["prompt_eval_count"] += eval_count
+                # Nanoseconds, as Ollama reports it
+                self._stats["prompt_eval_duration"] += eval_duration
+
+    def get_stats(self) -> Dict:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["avg_request_time"] = stats["total_request_time"] / stats["requests"] if stats["requests"] else 0.0
+        stats["avg_time_to_first_token"] = stats["total_time_to_first_token"] / stats["streamed_requests"] if stats["streamed_requests"] else 0.0
+        stats["prompt_cache_reuse"] = self._prompt_cache_reuse(stats)
+        stats.update(connection_stats(self.session))
+        if self.cache is not None:
+            stats["cache"] = self.cache.get_stats()
+        if self.router is not None:
+            stats["router"] = self.router.get_stats()
+        stats["tokens"] = self.token_counter.get_stats()
+        if self.single_flight is not None:
+            stats["single_flight"] = self.single_flight.get_stats()
+        if self.semantic_cache is not None:
+            stats["semantic_cache"] = self.semantic_cache.get_stats()
+        if self.endpoint_pool is not None:
+            stats["endpoint_pool"] = self.endpoint_pool.get_stats()
+        if self.code_index is not None:
+            stats["code_index"] = self.code_index.get_stats()
+        if self.write_behind is not None:
+            stats["write_behind"] = self.write_behind.get_stats()
+        return stats
+
+    def close(self):
+        if self.semantic_cache is not None:
+            self.semantic_cache.save()
+        if self.code_index is not None:
+            self.code_index.save()
+        if self.write_behind is not None:
+            self.write_behind.close()
+        if self.endpoint_pool is not None:
+            self.endpoint_pool.close()
+        self.session.close()
+
     # Context management methods
     def get_conversation_summary(self) -> Dict:
         return self.memory.get_summary()
@@ -177,5 +621,5 @@ class OllamaClient(AgentClient):
         self.memory.clear()
     def get_context_messages(self, limit: int = None) -> List[Dict]:
         return self.memory.get_messages(limit)
-    def set_context_limits(self, max_messages: int = None, max_tokens_per_message: int = None):
-        self.memory.set_limits(max_messages, max_tokens_per_message)
\ No newline at end of file
+    def set_context_limits(self, max_messages: int = None, max_tokens_per_message: int = None, max_context_tokens: int = None):
+        self.memory.set_limits(max_messages, max_tokens_per_message, max_context_tokens)
\ No newline at end of file
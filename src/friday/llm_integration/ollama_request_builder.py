@@ -0,0 +1,376 @@
+from friday.prompts import COMPACTION_SYSTEM_PROMPT, FILE_ANALYSIS_SYSTEM_PROMPT, FILE_CHUNK_ANALYSIS_SYSTEM_PROMPT, FILE_REDUCE_SYSTEM_PROMPT, GENERAL_SYSTEM_PROMPT, CONTEXT_PROMPT, ROUTING_PROMPT, TOOL_CALLING_SYSTEM_PROMPT, TOOL_DEFINITIONS
+import json
+import os
+from pathlib import Path
+from friday.config.settings import WARM_UP_MODES, get_config
+from friday.llm_integration.endpoint_pool import create_endpoint_pool
+from friday.llm_integration.prompt_assembler import PromptAssembler
+from friday.llm_integration.semantic_cache import create_semantic_cache
+from friday.utils.tokens import TokenCounter, create_token_counter
+from typing import List, Dict, Optional, Tuple
+
+
+class OllamaRequestBuilder:
+    """
+    Shared configuration loading and chat message assembly for the sync and async Ollama clients.
+    Methods take the conversation history as an argument so that the caller decides how memory is accessed.
+    """
+    def _load_config(self, overrides: Optional[Dict] = None) -> Dict:
+        # Parsed and validated once per process; only the overrides are merged per client
+        data = get_config(overrides)
+        base_endpoint = data["client"]["base_endpoint"]
+        chat_completion = data["client"]["chat_completion"]
+        self.endpoint = base_endpoint + chat_completion
+        self.model = data["client"]["model"]
+        # Several replicas in client.endpoints are balanced by an EndpointPool; otherwise it is None
+        self.endpoint_pool = create_endpoint_pool(data["client"], data.get("pool", {}))
+        return data
+
+    def _chat_urls(self) -> List[str]:
+        if self.endpoint_pool is None:
+            return [self.endpoint]
+        return [self.endpoint_pool.chat_url(endpoint) for endpoint in self.endpoint_pool.endpoints]
+
+    def _load_token_config(self, data: Dict, token_counter: TokenCounter = None):
+        tokens_config = data.get("tokens", {})
+        self.token_counter = create_token_counter(tokens_config) if token_counter is None else token_counter
+        self.max_prompt_tokens = tokens_config.get("max_prompt_tokens", 6144)
+        self.context_message_tokens = tokens_config.get("context_message_tokens", 128)
+        self.prompt_assembler = PromptAssembler(self.token_counter, self.max_prompt_tokens, tokens_config.get("trim_ratio", 0.5))
+
+    def _fit_history(self, history: List[Dict], reserved: List[Dict]) -> List[Dict]:
+        # Most recent history that fits in the prompt budget next to the messages that must be sent
+        return self.token_counter.fit_messages(history, self.max_prompt_tokens - self.token_counter.count_messages(reserved))
+
+    def _build_context_prompt_from(self, history: List[Dict], current_prompt: str) -> str:
+        if not history:
+            return current_prompt
+        context_parts = ["Previous conversation context:"]
+        for msg in self._fit_history(history, [{"role": "user", "content": current_prompt}]):
+            role = msg["role"].upper()
+            content = self.token_counter.truncate(msg["content"], self.context_message_tokens)
+            if "metadata" in msg and msg["metadata"].get("action"):
+                content += f" [Action: {msg['metadata']['action']}]"
+            context_parts.append(f"{role}: {content}")
+        context_parts.append(f"\nCurrent request: {current_prompt}")
+        return "\n".join(context_parts)
+
+    def _action_messages(self, user_input: str, history: List[Dict], include_history: bool = False) -> List[Dict]:
+        if include_history and history:
+            # Routing instructions go after the conversation, so the routing call extends the answer call's prompt
+            routing_request = {"role": "user", "content": f"{user_input}\n\n{ROUTING_PROMPT}\nRespond ONLY with JSON."}
+            return self.prompt_assembler.assemble(self._uncompacted(history), self._with_summary(CONTEXT_PROMPT), [routing_request], note=self._recall_note())
+        return [
+            {"role": "system", "content": GENERAL_SYSTEM_PROMPT},
+            {"role": "user", "content": user_input}
+        ]
+
+    def _natural_response_messages(self, user_input: str, history: List[Dict]) -> List[Dict]:
+        # The current input normally is the last stored message already; it is only appended when it is not
+        history = self._uncompacted(history)
+        turns = [msg for msg in history if msg["role"] in ["user", "assistant"]]
+        system_prompt = self._with_summary(CONTEXT_PROMPT)
+        if turns and turns[-1]["role"] == "user" and turns[-1]["content"] == user_input:
+            return self.prompt_assembler.assemble(history, system_prompt, note=self._recall_note())
+        return self.prompt_assembler.assemble(history, system_prompt, [{"role": "user", "content": user_input}], note=self._recall_note())
+
+    def _recent_context_info(self, history: List[Dict]) -> str:
+        if history:
+            recent_context = [msg for msg in history[-5:] if msg["role"] == "user"]
+            if recent_context:
+                return f"\nRecent conversation context: {self.token_counter.truncate(recent_context[-1]['content'], self.context_message_tokens // 2, marker='')}"
+        return ""
+
+    def _file_messages(self, user_input: str, file_content: str, history: List[Dict]) -> List[Dict]:
+        context_info = self._recent_context_info(history)
+        return [
+            {"role": "system", "content": FILE_ANALYSIS_SYSTEM_PROMPT},
+            {"role": "user", "content": f"Here is a file:\n\n{file_content}\n\nQuestion: {user_input}{context_info}"}
+        ]
+
+    def _chunk_messages(self, user_input: str, chunk: str, start_line: int, end_line: int, file_name: str) -> List[Dict]:
+        return [
+            {"role": "system", "content": FILE_CHUNK_ANALYSIS_SYSTEM_PROMPT},
+            {"role": "user", "content": f"Here are lines {start_line}-{end_line} of {file_name}:\n\n{chunk}\n\nQuestion: {user_input}"}
+        ]
+
+    def _reduce_messages(self, user_input: str, partials: List[str], file_name: str, history: List[Dict]) -> List[Dict]:
+        context_info = self._recent_context_info(history)
+        sections = "\n\n".join(partials)
+        return [
+            {"role": "system", "content": FILE_REDUCE_SYSTEM_PROMPT},
+            {"role": "user", "content": f"Partial answers for {file_name}:\n\n{sections}\n\nQuestion: {user_input}{context_info}"}
+        ]
+
+    def _load_chunking_config(self, data: Dict):
+        chunking_config = data.get("chunking", {})
+        self.chunking_enabled = chunking_config.get("enabled", True)
+        self.chunk_threshold_bytes = chunking_config.get("threshold_bytes", 32000)
+        self.chunk_tokens = chunking_config.get("chunk_tokens", 2000)
+        self.reduce_tokens = chunking_config.get("reduce_tokens", 4000)
+        self.chunk_concurrency = chunking_config.get("concurrency", 4)
+
+    def _file_excerpt(self, question: str, file_path) -> Optional[Dict]:
+        """The definitions of file_path the question is about, or None to send the whole file."""
+        if self.code_index is None:
+            return None
+        try:
+            excerpt = self.code_index.excerpt(file_path, question)
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Code index lookup failed for {file_path}: {e}")
+            return None
+        if excerpt is not None:
+            self.logger.info(f"Sending {', '.join(excerpt['symbols'])} from {file_path}: {excerpt['tokens']} of {excerpt['file_tokens']} tokens")
+        return excerpt
+
+    def _unresolved_message(self, file_name: str, matches: Optional[List[Path]] = None) -> str:
+        """
+        Reply for a file name that does not resolve to exactly one file. The candidates, or close names
+        when nothing matches, are offered for the user to choose from; none is read in its place.
+        """
+        if matches is None:
+            matches = self.file_index.resolve(file_name)
+        if len(matches) > 1:
+            names = ", ".join(path.relative_to(self.file_index.root_dir).as_posix() for path in matches)
+            return f"Several files match {file_name}: {names}. Which one do you mean?"
+        suggestions = self.file_index.suggest(file_name)
+        if not suggestions:
+            return f"Could not find {file_name}"
+        names = ", ".join(path.relative_to(self.file_index.root_dir).as_posix() for path in suggestions)
+        return f"Could not find {file_name}. Did you mean: {names}?"
+
+    def _is_large_file(self, file_path) -> bool:
+        return self.chunking_enabled and os.path.getsize(file_path) > self.chunk_threshold_bytes
+
+    def _load_runtime_config(self, data: Dict, warm_up: str = None):
+        runtime_config = data.get("runtime", {})
+        self.warm_up_mode = warm_up or runtime_config.get("warm_up", "none")
+        if self.warm_up_mode not in WARM_UP_MODES:
+            raise ValueError(f"Unknown warm-up mode {self.warm_up_mode!r}, expected one of {WARM_UP_MODES}")
+        self.keep_alive = runtime_config.get("keep_alive")
+        self.num_ctx_buckets = sorted(runtime_config.get("num_ctx_buckets") or [])
+        self.response_tokens = runtime_config.get("response_tokens", 1024)
+
+    def _load_semantic_cache_config(self, data: Dict):
+        semantic_config = data.get("semantic_cache", {})
+        self.semantic_cache = create_semantic_cache(semantic_config)
+        self.embed_model = semantic_config.get("model", "nomic-embed-text")
+        base_endpoint = (data["client"].get("endpoints") or [data["client"]["base_endpoint"]])[0]
+        self.embed_endpoint = base_endpoint.rstrip("/") + semantic_config.get("embed_path", "/api/embed")
+
+    def _load_recall_config(self, data: Dict):
+        recall_config = data.get("recall", {})
+        self.recall_enabled = recall_config.get("enabled", True)
+        self.recall_limit = recall_config.get("limit", 4)
+        self.recall_rerank = recall_config.get("rerank", False)
+        self.recall_candidates = recall_config.get("candidates", 16)
+        self.recall_tokens = recall_config.get("max_tokens", 512)
+        # Archived messages retrieved for the current turn
+        self._recalled: List[Dict] = []
+
+    def _recall_note(self) -> Optional[Dict]:
+        """The recalled archived messages as a system note for the current turn, within recall_tokens."""
+        if not self._recalled:
+            return None
+        lines = ["Relevant earlier conversation (no longer in the recent history):"]
+        budget = self.recall_tokens
+        # Oldest first, so the note reads like the conversation did
+        for msg in sorted(self._recalled, key=lambda m: m.get("timestamp", "")):
+            line = f"{msg['role'].upper()}: {self.token_counter.truncate(msg['content'], self.context_message_tokens)}"
+            budget -= self.token_counter.count(line)
+            if budget < 0:
+                break
+            lines.append(line)
+        if len(lines) == 1:
+            return None
+        return {"role": "system", "content": "\n".join(lines)}
+
+    def _load_compaction_config(self, data: Dict):
+        compaction_config = data.get("compaction", {})
+        self.compaction_enabled = compaction_config.get("enabled", False)
+        self.compaction_keep_recent = compaction_config.get("keep_recent", 8)
+        self.compaction_batch = compaction_config.get("batch", 6)
+        self.summary_tokens = compaction_config.get("max_tokens", 512)
+        # Running summary of the conversation for the current turn
+        self._summary = {"content": "", "through": None}
+        # Memories with a summarization in flight; shared by the copies serving other conversations
+        self._compacting = set()
+
+    def _uncompacted(self, history: List[Dict]) -> List[Dict]:
+        # Turns the running summary covers are sent as the summary instead
+        through = self._summary["through"]
+        if through is None:
+            return history
+        return [msg for msg in history if msg["role"] not in ["user", "assistant"] or msg.get("timestamp", "") > through]
+
+    def _with_summary(self, system_prompt: str) -> str:
+        # Part of the system prompt, so the prompt prefix only changes when the summary is updated
+        if not self._summary["content"]:
+            return system_prompt
+        return f"{system_prompt}\n\nSummary of the earlier conversation:\n{self._summary['content']}"
+
+    def _compaction_pending(self, summary: Dict, history: List[Dict], evicted: List[Dict]) -> List[Dict]:
+        """
+        Messages to fold into the running summary, oldest first: evicted messages and all but the most recent
+        compaction_keep_recent turns that the summary does not cover yet. Empty until there are compaction_batch of them,
+        so the summary (and with it the prompt prefix) changes every few turns rather than on every one.
+        """
+        through = summary["through"]
+        turns = [msg for msg in history if msg["role"] in ["user", "assistant"] and (through is None or msg.get("timestamp", "") > through)]
+        old_turns = turns[:max(len(turns) - self.compaction_keep_recent, 0)]
+        seen = {(msg["timestamp"], msg["content"]) for msg in old_turns}
+        pending = [msg for msg in evicted if (msg["timestamp"], msg["content"]) not in seen] + old_turns
+        pending.sort(key=lambda msg: msg["timestamp"])
+        if len(pending) < self.compaction_batch:
+            return []
+        # A long backlog (e.g. an old SQLite session) is folded in over several calls that each fit the prompt
+        budget = self.max_prompt_tokens // 2
+        for count, msg in enumerate(pending):
+            budget -= self.token_counter.count(self.token_counter.truncate(msg["content"], self.context_message_tokens))
+            if budget < 0:
+                return pending[:max(count, 1)]
+        return pending
+
+    def _compaction_payload(self, summary: Dict, pending: List[Dict]) -> Dict:
+        lines = [f"{msg['role'].upper()}: {self.token_counter.truncate(msg['content'], self.context_message_tokens)}" for msg in pending]
+        current = summary["content"] or "(empty)"
+        return self._chat_payload([
+            {"role": "system", "content": COMPACTION_SYSTEM_PROMPT},
+            {"role": "user", "content": f"Current summary:\n{current}\n\nNew messages:\n" + "\n".join(lines)}
+        ])
+
+    def _summary_from_response(self, response: Dict) -> str:
+        content = (response.get("message") or {}).get("content") or ""
+        return self.token_counter.truncate(content.strip(), self.summary_tokens)
+
+    def _embed_payload(self, texts: List[str]) -> Dict:
+        payload = {"model": self.embed_model, "input": texts}
+        if self.keep_alive is not None:
+            payload["keep_alive"] = self.keep_alive
+        return payload
+
+    def _semantic_decision(self, user_input: str, vector: Optional[List[float]]) -> Optional[Dict]:
+        # A paraphrase of an earlier general question is answered from the semantic cache, skipping both LLM calls
+        hit = self.semantic_cache.lookup(vector, self.model)
+        if hit is None:
+            return None
+        self.logger.info(f"Semantic cache hit ({hit['similarity']:.3f}) for {user_input!r}: {hit['question']!r}")
+        return {"action": "generate_action", "answer": hit["answer"], "semantic_similarity": hit["similarity"]}
+
+    def _semantic_cache_applies(self, messages: List[Dict]) -> bool:
+        # Only a question asked without context is looked up or stored: earlier turns, a running summary or
+        # recalled messages can give the same words another meaning
+        turns = [msg for msg in messages if msg["role"] in ("user", "assistant")]
+        return len(turns) <= 1 and not self._summary["content"] and not self._recalled
+
+    def _semantic_entry(self, decision: Dict, user_input: str, response: str) -> Optional[Tuple[List[float], str, str, str]]:
+        # Only answers the model produced for this question are stored, never semantic cache hits or file analyses
+        vector = decision.get("embedding")
+        if self.semantic_cache is None or vector is None or "semantic_similarity" in decision or not response:
+            return None
+        return vector, user_input, response, self.model
+
+    def _estimate_prompt_tokens(self, messages: List[Dict], tools: Optional[List[Dict]] = None) -> int:
+        tokens = self.token_counter.count_messages(messages)
+        if tools:
+            tokens += self.token_counter.count(json.dumps(tools))
+        return tokens
+
+    def _num_ctx_for(self, messages: List[Dict], tools: Optional[List[Dict]] = None) -> Optional[int]:
+        """
+        Smallest configured context bucket that fits the prompt plus room for the response.
+        Ollama reloads the model whenever num_ctx changes, so sizes are bucketed instead of exact;
+        a prompt larger than every bucket gets the largest one. None leaves Ollama's default in place.
+        """
+        if not self.num_ctx_buckets:
+            return None
+        needed = self._estimate_prompt_tokens(messages, tools) + self.response_tokens
+        for bucket in self.num_ctx_buckets:
+            if needed <= bucket:
+                return bucket
+        return self.num_ctx_buckets[-1]
+
+    def _warm_up_payload(self) -> Dict:
+        # A chat request without messages only loads the model; it uses the smallest bucket,
+        # which is the context size most requests run with
+        payload = {"model": self.model, "messages": [], "stream": False}
+        if self.keep_alive is not None:
+            payload["keep_alive"] = self.keep_alive
+        if self.num_ctx_buckets:
+            payload["options"] = {"num_ctx": self.num_ctx_buckets[0]}
+        return payload
+
+    def _tool_messages(self, history: List[Dict]) -> List[Dict]:
+        # The stored system prompt asks for routing JSON, which conflicts with native tool calls
+        return self.prompt_assembler.assemble(self._uncompacted(history), self._with_summary(TOOL_CALLING_SYSTEM_PROMPT), note=self._recall_note())
+
+    def _tools_payload(self, messages: List[Dict]) -> Dict:
+        return self._chat_payload(messages, tools=TOOL_DEFINITIONS)
+
+    def _decision_from_tool_message(self, message: Dict, user_input: str) -> Optional[Dict]:
+        """
+        Turn the first response of a tool-calling round trip into an action decision.
+        A plain answer becomes a generate_action decision carrying the answer, so no second call is needed;
+        read_file/read_files calls are merged into a single file decision.
+        """
+        tool_calls = message.get("tool_calls") or []
+        if not tool_calls:
+            content = message.get("content", "")
+            return {"action": "generate_action", "question": user_input, "answer": content} if content else None
+        files = []
+        question = None
+        for call in tool_calls:
+            function = call.get("function", {})
+            arguments = function.get("arguments") or {}
+            if isinstance(arguments, str):
+                try:
+                    arguments = json.loads(arguments)
+                except ValueError:
+                    arguments = {}
+            name = function.get("name")
+            question = question or arguments.get("question")
+            if name == "read_file" and arguments.get("file_name"):
+                files.append(arguments["file_name"])
+            elif name == "read_files":
+                files.extend(arguments.get("files") or [])
+            elif name == "generate_action" and not files:
+                return {"action": "generate_action", "question": arguments.get("question") or user_input}
+        question = question or user_input
+        if not files:
+            return None
+        if len(files) == 1:
+            return {"action": "read_file", "file": files[0], "question": question}
+        return {"action": "read_files", "files": files, "question": question}
+
+    def _prompt_eval(self, payload: Dict, response: Optional[Dict]) -> Optional[Tuple[Optional[int], int, int]]:
+        """
+        (prompt tokens, prompt_eval_count, prompt_eval_duration) for a completed request, the last two as Ollama reports them.
+        Ollama's prompt_eval_count leaves out the prefix served from its KV cache. The prompt is only counted, and reuse
+        derived from the gap, with an exact tokenizer: the estimator's error would otherwise read as reuse.
+        """
+        if not response or "prompt_eval_count" not in response:
+            return None
+        prompt_tokens = self._estimate_prompt_tokens(payload["messages"], payload.get("tools")) if self.token_counter.exact else None
+        return prompt_tokens, response["prompt_eval_count"], response.get("prompt_eval_duration", 0)
+
+    def _prompt_cache_reuse(self, stats: Dict) -> Optional[float]:
+        if not self.token_counter.exact:
+            return None
+        if not stats["prompt_tokens"]:
+            return 0.0
+        return min(max(1.0 - stats["prompt_eval_count"] / stats["prompt_tokens"], 0.0), 1.0)
+
+    def _chat_payload(self, messages: List[Dict], stream: bool = False, tools: Optional[List[Dict]] = None) -> Dict:
+        payload = {
+            "model": self.model,
+            "messages": messages,
+            "stream": stream
+        }
+        if tools:
+            payload["tools"] = tools
+        if self.keep_alive is not None:
+            payload["keep_alive"] = self.keep_alive
+        num_ctx = self._num_ctx_for(messages, tools)
+        if num_ctx is not None:
+            payload["options"] = {"num_ctx": num_ctx}
+        return payload
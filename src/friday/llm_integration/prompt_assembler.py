@@ -0,0 +1,64 @@
+import threading
+from typing import Dict, List, Optional, Tuple
+from friday.utils.tokens import TokenCounter
+
+
+class PromptAssembler:
+    """
+    Builds chat message lists as [system prompt] + conversation + call-specific tail, so that the routing call,
+    the answer call and the next turn share a byte-identical prefix and Ollama can reuse its KV cache.
+
+    - The system prompt is fixed per assembler instead of depending on the call.
+    - Conversation messages are sent exactly as stored (role and content only), in order, never filtered.
+    - When the conversation outgrows the budget, the oldest messages are dropped down to trim_ratio of the
+      budget at once, and the new starting point is kept, so the prefix only moves every few turns instead of on every call.
+    """
+    def __init__(self, token_counter: TokenCounter, max_prompt_tokens: int, trim_ratio: float = 0.5):
+        self.token_counter = token_counter
+        self.max_prompt_tokens = max_prompt_tokens
+        self.trim_ratio = trim_ratio
+        self._first_key: Optional[Tuple] = None
+        self._lock = threading.Lock()
+
+    def fork(self) -> "PromptAssembler":
+        # Same settings, independent trimming state, for a different conversation
+        return PromptAssembler(self.token_counter, self.max_prompt_tokens, self.trim_ratio)
+
+    def assemble(self, history: List[Dict], system_prompt: str, tail: Optional[List[Dict]] = None, note: Optional[Dict] = None) -> List[Dict]:
+        """
+        Args:
+            history (List[Dict]): Stored conversation messages; stored system messages are replaced by system_prompt.
+            system_prompt (str): The system prompt, identical for every call that should share the prefix.
+            tail (List[Dict], optional): Messages appended after the conversation for this call only.
+            note (Dict, optional): Message inserted right before the last user turn of the conversation for
+                this call only, so everything before it is still the shared prefix.
+        Returns:
+            List[Dict]: Chat messages for the payload.
+        """
+        system = {"role": "system", "content": system_prompt}
+        tail = tail or []
+        turns = [msg for msg in history if msg["role"] in ["user", "assistant"]]
+        budget = self.max_prompt_tokens - self.token_counter.count_messages([system] + tail + ([note] if note else []))
+        start = self._start_index(turns, budget)
+        conversation = [{"role": msg["role"], "content": msg["content"]} for msg in turns[start:]]
+        if note:
+            user_turns = [i for i, msg in enumerate(conversation) if msg["role"] == "user"]
+            conversation.insert(user_turns[-1] if user_turns else len(conversation), note)
+        return [system] + conversation + tail
+
+    def _start_index(self, turns: List[Dict], budget: int) -> int:
+        if not turns:
+            return 0
+        keys = [(msg["role"], msg.get("timestamp"), msg["content"]) for msg in turns]
+        counts = [self.token_counter.count_message(msg) for msg in turns]
+        with self._lock:
+            # Resume from the previous starting point while it is still in the history
+            start = keys.index(self._first_key) if self._first_key in keys else 0
+            total = sum(counts[start:])
+            if total > budget:
+                target = budget * self.trim_ratio
+                while start < len(turns) - 1 and (total > target or turns[start]["role"] != "user"):
+                    total -= counts[start]
+                    start += 1
+            self._first_key = keys[start]
+        return start
@@ -0,0 +1,203 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+
+def cache_key(payload: Dict) -> str:
+    """
+    Content-addressed key for a chat payload: model, options, tools and the normalized message list.
+    The stream flag is ignored so streamed and blocking calls share entries.
+    """
+    normalized = {
+        "model": payload.get("model"),
+        "options": payload.get("options") or {},
+        "tools": payload.get("tools") or [],
+        "messages": [
+            {"role": msg.get("role"), "content": (msg.get("content") or "").strip()}
+            for msg in payload.get("messages", [])
+        ],
+    }
+    encoded = json.dumps(normalized, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class LRUCacheStore:
+    """
+    Thread-safe in-process LRU tier.
+    """
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Dict):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SqliteCacheStore:
+    """
+    Persistent tier backed by SQLite, with a time-to-live and least-recently-used size bound.
+    """
+    def __init__(self, db_path: str = "db/llm_cache.db", ttl_seconds: float = 86400, max_entries: int = 10000):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._init_db()
+
+    def _connect(self):
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True) if os.path.dirname(self.db_path) else None
+        return sqlite3.connect(self.db_path)
+
+    def _init_db(self):
+        conn = self._connect()
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                response TEXT,
+                created_at REAL,
+                last_access REAL
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_last_access ON llm_cache(last_access)")
+        conn.commit()
+        conn.close()
+
+    def get(self, key: str) -> Optional[Dict]:
+        now = time.time()
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT response, created_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            response, created_at = row
+            if self.ttl_seconds and created_at + self.ttl_seconds < now:
+                conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                conn.commit()
+                return None
+            conn.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (now, key))
+            conn.commit()
+            return json.loads(response)
+        finally:
+            conn.close()
+
+    def set(self, key: str, value: Dict):
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, response, created_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now)
+            )
+            if self.ttl_seconds:
+                conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl_seconds,))
+            conn.execute(
+                """
+                DELETE FROM llm_cache WHERE key IN (
+                    SELECT key FROM llm_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,)
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def clear(self):
+        conn = self._connect()
+        conn.execute("DELETE FROM llm_cache")
+        conn.commit()
+        conn.close()
+
+
+class ResponseCache:
+    """
+    Two-tier cache for chat completions: an in-process LRU in front of an optional persistent SQLite store.
+    Persistent hits are promoted into the LRU tier.
+    """
+    def __init__(self, max_entries: int = 256, persistent: bool = False, db_path: str = "db/llm_cache.db", ttl_seconds: float = 86400, max_persistent_entries: int = 10000):
+        self.memory = LRUCacheStore(max_entries)
+        self.persistent = SqliteCacheStore(db_path, ttl_seconds, max_persistent_entries) if persistent else None
+        self._stats_lock = threading.Lock()
+        self._stats = {"hits": 0, "memory_hits": 0, "persistent_hits": 0, "misses": 0, "stores": 0}
+
+    @property
+    def performs_io(self) -> bool:
+        return self.persistent is not None
+
+    def get(self, payload: Dict) -> Optional[Dict]:
+        key = cache_key(payload)
+        value = self.memory.get(key)
+        tier = "memory_hits"
+        if value is None and self.persistent is not None:
+            value = self.persistent.get(key)
+            tier = "persistent_hits"
+            if value is not None:
+                self.memory.set(key, value)
+        with self._stats_lock:
+            if value is None:
+                self._stats["misses"] += 1
+            else:
+                self._stats["hits"] += 1
+                self._stats[tier] += 1
+        return value
+
+    def set(self, payload: Dict, response: Dict):
+        key = cache_key(payload)
+        self.memory.set(key, response)
+        if self.persistent is not None:
+            self.persistent.set(key, response)
+        with self._stats_lock:
+            self._stats["stores"] += 1
+
+    def clear(self):
+        self.memory.clear()
+        if self.persistent is not None:
+            self.persistent.clear()
+
+    def get_stats(self) -> Dict:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        stats["entries"] = len(self.memory)
+        return stats
+
+
+def create_response_cache(cache_config: Dict) -> Optional[ResponseCache]:
+    """
+    Build a ResponseCache from the cache section of ollama_config.yml, or None when caching is disabled.
+    """
+    if not cache_config.get("enabled", True):
+        return None
+    return ResponseCache(
+        max_entries=cache_config.get("max_entries", 256),
+        persistent=cache_config.get("persistent", False),
+        db_path=cache_config.get("db_path", "db/llm_cache.db"),
+        ttl_seconds=cache_config.get("ttl_seconds", 86400),
+        max_persistent_entries=cache_config.get("max_persistent_entries", 10000),
+    )
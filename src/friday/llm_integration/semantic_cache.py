@@ -0,0 +1,105 @@
+import threading
+from typing import Dict, List, Optional, Sequence
+from friday.utils.logger import setup_logger
+
+
+class SemanticCache:
+    """
+    Answers questions that paraphrase an earlier one. Questions are embedded through Ollama's /api/embed,
+    the vectors live in a VectorIndex, and a question whose nearest stored question has cosine similarity of
+    at least threshold gets the stored answer. Entries are grouped by model, so answers never cross models.
+    Only answers from the model's own knowledge (generate_action) are stored, never file analyses.
+    """
+    def __init__(self, index, threshold: float = 0.95, path: Optional[str] = None, save_every: int = 32):
+        self.index = index
+        self.threshold = threshold
+        self.path = path
+        self.save_every = save_every
+        self.logger = setup_logger('friday')
+        self._lock = threading.Lock()
+        self._unsaved = 0
+        self._stats = {"lookups": 0, "hits": 0, "misses": 0, "stores": 0, "total_hit_similarity": 0.0, "embedding_requests": 0, "embedding_errors": 0, "total_embedding_time": 0.0}
+        if path and self.index.load(path):
+            self.logger.info(f"Loaded {len(self.index)} semantic cache entries from {path}")
+
+    @property
+    def performs_io(self) -> bool:
+        return self.path is not None
+
+    def nearest(self, vectors: Sequence[Sequence[float]], k: int = 3, group: str = "") -> List[List[Dict]]:
+        """Top-k stored entries for each query vector, best first, with their similarity."""
+        return [
+            [{**value, "similarity": score, "row": row} for score, row, value in hits]
+            for hits in self.index.search(vectors, k, group)
+        ]
+
+    def lookup_many(self, vectors: Sequence[Sequence[float]], group: str = "") -> List[Optional[Dict]]:
+        """Best entry at or above the threshold for each query vector, scored as one batch, or None."""
+        results = []
+        for hits in self.nearest(vectors, 1, group):
+            hit = hits[0] if hits and hits[0]["similarity"] >= self.threshold else None
+            if hit is not None:
+                self.index.touch(hit["row"])
+            results.append(hit)
+        with self._lock:
+            hits = [hit for hit in results if hit is not None]
+            self._stats["lookups"] += len(results)
+            self._stats["hits"] += len(hits)
+            self._stats["misses"] += len(results) - len(hits)
+            self._stats["total_hit_similarity"] += sum(hit["similarity"] for hit in hits)
+        return results
+
+    def lookup(self, vector: Sequence[float], group: str = "") -> Optional[Dict]:
+        return self.lookup_many([vector], group)[0]
+
+    def store(self, vector: Sequence[float], question: str, answer: str, group: str = ""):
+        self.index.add(vector, {"question": question, "answer": answer}, group)
+        with self._lock:
+            self._stats["stores"] += 1
+            self._unsaved += 1
+            due = self.path is not None and self._unsaved >= self.save_every
+            if due:
+                self._unsaved = 0
+        if due:
+            self.save()
+
+    def record_embedding(self, elapsed: float, failed: bool = False):
+        with self._lock:
+            self._stats["embedding_requests"] += 1
+            self._stats["total_embedding_time"] += elapsed
+            if failed:
+                self._stats["embedding_errors"] += 1
+
+    def save(self):
+        if self.path is not None:
+            self.index.save(self.path)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["hit_rate"] = stats["hits"] / stats["lookups"] if stats["lookups"] else 0.0
+        stats["avg_hit_similarity"] = stats["total_hit_similarity"] / stats["hits"] if stats["hits"] else 0.0
+        stats["avg_embedding_time"] = stats["total_embedding_time"] / stats["embedding_requests"] if stats["embedding_requests"] else 0.0
+        stats["entries"] = len(self.index)
+        stats["evictions"] = self.index.evictions
+        return stats
+
+
+def create_semantic_cache(cfg: Dict) -> Optional[SemanticCache]:
+    """
+    Build a SemanticCache from the semantic_cache section of ollama_config.yml, or None when it is disabled.
+    NumPy is an optional dependency (pip install friday[semantic]); without it the cache is disabled with a warning.
+    """
+    if not cfg.get("enabled", False):
+        return None
+    try:
+        from friday.utils.vector_index import VectorIndex
+    except ImportError as e:
+        setup_logger('friday').warning(f"Semantic cache unavailable ({e}), install friday[semantic] to enable it")
+        return None
+    return SemanticCache(
+        VectorIndex(cfg.get("max_entries", 2000)),
+        threshold=cfg.get("threshold", 0.95),
+        path=cfg.get("path") if cfg.get("persistent", False) else None,
+        save_every=cfg.get("save_every", 32),
+    )
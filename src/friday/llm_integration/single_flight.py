@@ -0,0 +1,203 @@
+import asyncio
+import threading
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterator, List, Optional
+
+
+class Flight:
+    """One in-flight chat call and everything it has produced so far."""
+    def __init__(self):
+        self.tokens: List[str] = []
+        self.result: Optional[Dict] = None
+        self.error: Optional[BaseException] = None
+        self.done = False
+
+    def content(self) -> str:
+        if self.tokens:
+            return "".join(self.tokens)
+        return ((self.result or {}).get("message") or {}).get("content") or ""
+
+
+class _FlightStats:
+    def __init__(self):
+        self._stats = {"flights": 0, "coalesced": 0, "coalesced_streams": 0}
+
+    def _count(self, joined: bool, stream: bool):
+        if not joined:
+            self._stats["flights"] += 1
+        else:
+            self._stats["coalesced"] += 1
+            if stream:
+                self._stats["coalesced_streams"] += 1
+
+    def get_stats(self) -> Dict:
+        stats = dict(self._stats)
+        calls = stats["flights"] + stats["coalesced"]
+        stats["coalesced_rate"] = stats["coalesced"] / calls if calls else 0.0
+        return stats
+
+
+class SingleFlight(_FlightStats):
+    """
+    Thread-safe request coalescing: callers asking for the same key while a call for it is in flight
+    wait for that call instead of starting their own.
+
+    Blocking callers get the shared response. Streaming callers replay the tokens produced so far and then
+    follow the live stream; a stream is driven by a worker thread, so it completes for every subscriber
+    even if the caller that started it stops reading. The key is forgotten once the call finishes, so later
+    callers go to the response cache or to Ollama again.
+    """
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._flights: Dict[str, Flight] = {}
+
+    def _join(self, key: str, stream: bool):
+        with self._lock:
+            flight = self._flights.get(key)
+            joined = flight is not None
+            if not joined:
+                flight = self._flights[key] = Flight()
+            self._count(joined, stream)
+            return flight, joined
+
+    def _finish(self, key: str, flight: Flight, result: Optional[Dict] = None, error: Optional[BaseException] = None):
+        with self._lock:
+            flight.result, flight.error, flight.done = result, error, True
+            del self._flights[key]
+            self._changed.notify_all()
+
+    def call(self, key: str, fn: Callable[[], Dict]) -> Dict:
+        flight, joined = self._join(key, stream=False)
+        if not joined:
+            try:
+                result = fn()
+            except BaseException as e:
+                self._finish(key, flight, error=e)
+                raise
+            self._finish(key, flight, result=result)
+            return result
+        with self._lock:
+            while not flight.done:
+                self._changed.wait()
+        if flight.error is not None:
+            raise flight.error
+        # A flight started by a streaming caller holds the assembled message rather than Ollama's response
+        return flight.result if flight.result is not None else {"message": {"role": "assistant", "content": flight.content()}}
+
+    def stream(self, key: str, fn: Callable[[], Iterator[str]]) -> Iterator[str]:
+        flight, joined = self._join(key, stream=True)
+        if not joined:
+            threading.Thread(target=self._drive, args=(key, flight, fn), name="friday-single-flight", daemon=True).start()
+        index = 0
+        while True:
+            with self._lock:
+                while index >= len(flight.tokens) and not flight.done:
+                    self._changed.wait()
+                new_tokens = flight.tokens[index:]
+                index = len(flight.tokens)
+                done = flight.done
+            yield from new_tokens
+            if done:
+                break
+        if flight.error is not None:
+            raise flight.error
+        if index == 0 and flight.content():
+            # Joined a blocking call: its whole answer arrives as one token, like a cache hit
+            yield flight.content()
+
+    def _drive(self, key: str, flight: Flight, fn: Callable[[], Iterator[str]]):
+        try:
+            for token in fn():
+                with self._lock:
+                    flight.tokens.append(token)
+                    self._changed.notify_all()
+        except BaseException as e:
+            self._finish(key, flight, error=e)
+            return
+        self._finish(key, flight)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = super().get_stats()
+            stats["in_flight"] = len(self._flights)
+        return stats
+
+
+class AsyncSingleFlight(_FlightStats):
+    """
+    Event-loop version of SingleFlight for the async client. The shared call runs as a task, so cancelling
+    one caller does not cancel it for the others.
+    """
+    def __init__(self):
+        super().__init__()
+        self._flights: Dict[str, Flight] = {}
+        self._tasks: Dict[str, asyncio.Future] = {}
+        self._changed: Dict[str, asyncio.Event] = {}
+
+    async def call(self, key: str, fn: Callable[[], Awaitable[Dict]]) -> Dict:
+        task = self._tasks.get(key)
+        self._count(task is not None, stream=False)
+        if task is None:
+            task = self._start(key, fn())
+        flight = self._flights[key]
+        result = await asyncio.shield(task)
+        return result if result is not None else {"message": {"role": "assistant", "content": flight.content()}}
+
+    def _start(self, key: str, coroutine: Awaitable[Optional[Dict]]) -> asyncio.Future:
+        flight = self._flights[key] = Flight()
+        self._changed[key] = asyncio.Event()
+
+        async def run():
+            try:
+                flight.result = await coroutine
+                return flight.result
+            except BaseException as e:
+                flight.error = e
+                raise
+            finally:
+                flight.done = True
+                del self._flights[key], self._tasks[key]
+                self._changed.pop(key).set()
+
+        task = self._tasks[key] = asyncio.ensure_future(run())
+        # Retrieve the exception so an unobserved failure is not reported at garbage collection
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        return task
+
+    async def stream(self, key: str, fn: Callable[[], AsyncIterator[str]]) -> AsyncIterator[str]:
+        joined = key in self._tasks
+        self._count(joined, stream=True)
+        if not joined:
+            self._start_stream(key, fn)
+        flight = self._flights[key]
+        index = 0
+        while True:
+            changed = self._changed.get(key)
+            new_tokens = flight.tokens[index:]
+            index = len(flight.tokens)
+            for token in new_tokens:
+                yield token
+            if flight.done:
+                break
+            if not new_tokens and changed is not None:
+                await changed.wait()
+        if flight.error is not None:
+            raise flight.error
+        if index == 0 and flight.content():
+            yield flight.content()
+
+    def _start_stream(self, key: str, fn: Callable[[], AsyncIterator[str]]):
+        async def drive():
+            async for token in fn():
+                self._flights[key].tokens.append(token)
+                # Wake the subscribers, then give them a fresh event to wait on
+                event, self._changed[key] = self._changed[key], asyncio.Event()
+                event.set()
+            return None
+        self._start(key, drive())
+
+    def get_stats(self) -> Dict:
+        stats = super().get_stats()
+        stats["in_flight"] = len(self._tasks)
+        return stats
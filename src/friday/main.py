@@ -1,10 +1,61 @@
-from .interface.cli import driver
-from .llm_integration.ollama_client import OllamaClient
-from .memory.in_memory_conversation_memory import InMemoryConversationMemory
+import argparse
+import sys
 
-def main():
+# Only argparse and sys are imported up front: rich, pyfiglet, requests and yaml are loaded on the path that needs them,
+# so `friday --help` and one-shot `friday -p ...` calls from scripts start quickly.
+
+def create_client(warm: bool = True):
+    from .llm_integration.ollama_client import OllamaClient
+    from .memory.in_memory_conversation_memory import InMemoryConversationMemory
     client = OllamaClient(memory=InMemoryConversationMemory())
-    driver(client)
+    if warm:
+        # Warm the workspace file index while the user types the first prompt
+        client.file_index.build(background=True)
+        # Load the model at the same time, unless the configuration already did
+        if client.warm_up_mode == "none":
+            client.warm_up(background=True)
+    return client
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="friday", description="Friday - your AI coding agent")
+    parser.add_argument("--stream", action="store_true", help="render response tokens as they are generated")
+    parser.add_argument("--no-banner", action="store_true", help="start without the ASCII art banner")
+    parser.add_argument("-p", "--prompt", help="answer a single prompt, print the response and exit")
+    commands = parser.add_subparsers(dest="command")
+    serve_parser = commands.add_parser("serve", help="serve many sessions over an HTTP/JSON API")
+    serve_parser.add_argument("--host", help="address to bind (default: server.host in the config)")
+    serve_parser.add_argument("--port", type=int, help="port to bind (default: server.port in the config)")
+    serve_parser.add_argument("--workers", type=int, help="conversation turns in flight across all sessions")
+    serve_parser.add_argument("--memory", choices=["memory", "sqlite", "hybrid", "none"], help="memory backend for sessions")
+    args = parser.parse_args(argv)
+    if args.command == "serve":
+        from .interface.server import serve
+        serve(args.host, args.port, args.workers, args.memory)
+        return
+    if args.prompt is not None:
+        client = create_client(warm=False)
+        try:
+            if args.stream:
+                for token in client.handle_input_stream(args.prompt):
+                    sys.stdout.write(token)
+                    sys.stdout.flush()
+                sys.stdout.write("\n")
+            else:
+                print(client.handle_input(args.prompt))
+        finally:
+            client.close()
+        return
+    from concurrent.futures import ThreadPoolExecutor
+    from .interface.cli import driver
+    # The backend is built in the background while the banner renders and the user types
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="friday-startup") as executor:
+        client = executor.submit(create_client)
+        try:
+            driver(client, stream=args.stream, banner=not args.no_banner)
+        finally:
+            # Saves the code index and semantic cache and flushes queued memory writes, however the session ends
+            if client.exception() is None:
+                client.result().close()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,65 @@
+import asyncio
+from typing import List, Dict, Optional
+from friday.memory.base_conversation_memory import BaseConversationMemory
+
+
+class AsyncConversationMemory:
+    """
+    Async adapter around a synchronous conversation memory backend.
+    Backends that perform I/O (SQLite, Hybrid) are driven from a worker thread so the event loop never blocks;
+    pure in-process backends are called directly to avoid the thread hop.
+
+    Attributes:
+        memory (BaseConversationMemory): The wrapped synchronous backend.
+    """
+    def __init__(self, memory: BaseConversationMemory):
+        self.memory = memory
+        self._lock = asyncio.Lock()
+
+    @property
+    def session_id(self):
+        return self.memory.session_id
+
+    @property
+    def user_id(self):
+        return self.memory.user_id
+
+    async def _call(self, method, *args):
+        # Calls are serialized per session so a backend never sees concurrent access from worker threads
+        async with self._lock:
+            if self.memory.performs_io:
+                return await asyncio.to_thread(method, *args)
+            return method(*args)
+
+    async def add_to_history(self, role: str, content: str, metadata: Optional[Dict] = None):
+        return await self._call(self.memory.add_to_history, role, content, metadata)
+
+    async def clear(self):
+        return await self._call(self.memory.clear)
+
+    async def get_summary(self) -> Dict:
+        return await self._call(self.memory.get_summary)
+
+    async def get_messages(self, limit: int = None) -> List[Dict]:
+        return await self._call(self.memory.get_messages, limit)
+
+    async def retrieve(self, query: str, limit: int = 5) -> List[Dict]:
+        return await self._call(self.memory.retrieve, query, limit)
+
+    async def get_running_summary(self) -> Dict:
+        return await self._call(self.memory.get_running_summary)
+
+    async def set_running_summary(self, content: str, through: str):
+        return await self._call(self.memory.set_running_summary, content, through)
+
+    async def get_evicted(self) -> List[Dict]:
+        return await self._call(self.memory.get_evicted)
+
+    async def set_limits(self, max_messages: int = None, max_tokens_per_message: int = None, max_context_tokens: int = None):
+        return await self._call(self.memory.set_limits, max_messages, max_tokens_per_message, max_context_tokens)
+
+    async def flush(self):
+        return await self._call(self.memory.flush)
+
+    async def close(self):
+        return await self._call(self.memory.close)
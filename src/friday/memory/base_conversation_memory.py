@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
 from typing import List, Dict, Optional
+from friday.utils.tokens import TokenCounter
 
 class BaseConversationMemory(ABC):
     """
@@ -9,7 +10,10 @@ class BaseConversationMemory(ABC):
     Attributes:
         session_id (Optional[str]): Identifier for the conversation session (useful for persistent storage).
         user_id (Optional[str]): Identifier for the user (useful for multi-user systems).
+        performs_io (bool): Whether operations touch disk or network; async adapters offload such backends to a worker thread.
     """
+    performs_io: bool = False
+
     def __init__(self, session_id: Optional[str] = None, user_id: Optional[str] = None, db_path: Optional[str] = None):
         self.session_id = session_id
         self.user_id = user_id
@@ -56,12 +60,83 @@ class BaseConversationMemory(ABC):
         pass
 
 
+    def _overflow_count(self, history: List[Dict], max_messages: Optional[int], max_tokens: Optional[int], token_counter: TokenCounter) -> int:
+        """
+        Number of oldest messages, after a leading system message, to evict so that the history
+        holds at most max_messages messages and at most max_tokens tokens. The newest message is never evicted.
+        """
+        start_idx = 1 if history and history[0]["role"] == "system" else 0
+        body = history[start_idx:]
+        num_to_remove = max(len(history) - max_messages, 0) if max_messages else 0
+        if max_tokens:
+            total = token_counter.count_messages(history[:start_idx]) + token_counter.count_messages(body[num_to_remove:])
+            while total > max_tokens and num_to_remove < len(body) - 1:
+                total -= token_counter.count_message(body[num_to_remove])
+                num_to_remove += 1
+        return min(num_to_remove, len(body))
+
+    def retrieve(self, query: str, limit: int = 5) -> List[Dict]:
+        """
+        Retrieve messages that are no longer in the context window but are relevant to query, most relevant first.
+        Backends without an archive return an empty list.
+        Args:
+            query (str): The current user input.
+            limit (int): Maximum number of messages to return.
+        Returns:
+            List[Dict]: Message dicts in the same format as get_messages.
+        """
+        return []
+
+    def get_running_summary(self) -> Dict:
+        """
+        Get the running summary of the turns compacted out of the conversation so far.
+        Returns:
+            Dict: {"content": the summary text, "through": timestamp (ISO format) of the newest message it covers, or None}.
+        """
+        return {"content": "", "through": None}
+
+    def set_running_summary(self, content: str, through: str):
+        """
+        Store the running summary with the session. Backends without storage ignore it.
+        Args:
+            content (str): The summary text.
+            through (str): Timestamp of the newest message the summary covers.
+        """
+        pass
+
+    def get_evicted(self) -> List[Dict]:
+        """
+        Messages evicted from the context window that the running summary does not cover yet, oldest first.
+        Returns:
+            List[Dict]: Message dicts in the same format as get_messages.
+        """
+        return []
+
+    def flush(self):
+        """
+        Wait until writes queued by a write-behind backend are stored. Other backends store them right away.
+        """
+        pass
+
+    def close(self):
+        """
+        Release the backend's resources, such as its database connections. Backends without any do nothing.
+        """
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
     @abstractmethod
-    def set_limits(self, max_messages: int = None, max_tokens_per_message: int = None):
+    def set_limits(self, max_messages: int = None, max_tokens_per_message: int = None, max_context_tokens: int = None):
         """
         Set limits for context size and message length.
         Args:
             max_messages (int, optional): Maximum number of messages to keep in history.
             max_tokens_per_message (int, optional): Maximum tokens per message (for truncation).
+            max_context_tokens (int, optional): Maximum total tokens of the messages kept in history.
         """
         pass
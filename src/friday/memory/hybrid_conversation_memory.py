@@ -1,11 +1,46 @@
 from friday.memory.base_conversation_memory import BaseConversationMemory
+from friday.memory.sqlite_pool import SqliteConnectionPool
+from friday.memory.sqlite_schema import has_full_text_index, migrate
+from friday.memory.write_behind import WriteBehindQueue
 from friday.prompts import GENERAL_SYSTEM_PROMPT
+from friday.utils.tokens import TokenCounter, default_token_counter
 from typing import List, Dict
 from datetime import datetime
-import os
-import sqlite3
+import json
+import math
+import re
+
+# Words too common to say anything about relevance
+STOP_WORDS = frozenset("""
+    a an and are as at be but by can could did do does for from had has have how i in is it its me my of on or
+    our should so that the their them then there these this those to was we were what when where which who why
+    will with would you your about into just like not please tell show explain
+""".split())
+
+
+def query_terms(text: str) -> List[str]:
+    terms = []
+    for term in re.findall(r"\w+", text.lower()):
+        if len(term) > 1 and term not in STOP_WORDS and term not in terms:
+            terms.append(term)
+    return terms
+
+
+def rank_by_similarity(query_vector: List[float], messages: List[Dict], vectors: List[List[float]], limit: int) -> List[Dict]:
+    """Order messages by cosine similarity of their embedding to the query embedding and keep the best limit."""
+    def cosine(a, b):
+        norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+        return sum(x * y for x, y in zip(a, b)) / norm if norm else 0.0
+    scored = sorted(zip(messages, vectors), key=lambda pair: cosine(query_vector, pair[1]), reverse=True)
+    return [message for message, _ in scored[:limit]]
+
+ARCHIVE_MESSAGE = "INSERT INTO messages (session_id, role, content, metadata, timestamp, archived) VALUES (?, ?, ?, ?, ?, 1)"
+
+
 class HybridConversationMemory(BaseConversationMemory):
-    def __init__(self, max_context_messages: int = 20, max_tokens_per_message: int = 2000, session_id = None, user_id = None, db_path = "db/conversation_memory.db", system_prompt: str = GENERAL_SYSTEM_PROMPT):
+    performs_io = True
+
+    def __init__(self, max_context_messages: int = 20, max_tokens_per_message: int = 2000, session_id = None, user_id = None, db_path = "db/conversation_memory.db", system_prompt: str = GENERAL_SYSTEM_PROMPT, max_context_tokens: int = None, token_counter: TokenCounter = None, pool: SqliteConnectionPool = None, write_behind: WriteBehindQueue = None):
         self.session_start_time = datetime.now()
         self.session_id = session_id
         self.user_id = user_id
@@ -13,7 +48,17 @@ class HybridConversationMemory(BaseConversationMemory):
         self.conversation_history: List[Dict[str, str]] = []
         self.max_context_messages = max_context_messages
         self.max_tokens_per_message = max_tokens_per_message
+        self.max_context_tokens = max_context_tokens
+        self.token_counter = token_counter or default_token_counter
         self.system_prompt = system_prompt
+        # Archived messages older than this are not recalled; clear() moves it forward
+        self._archive_since = 0.0
+        self._fts = False
+        # A pool passed in is shared (e.g. by a server's sessions) and closed by its owner
+        self._owns_pool = pool is None
+        self._pool = pool or SqliteConnectionPool(db_path)
+        # Evicted messages are archived by this queue's background writer instead of inline
+        self._writer = write_behind
 
         if system_prompt:
             self.add_to_history("system", system_prompt)
@@ -25,55 +70,37 @@ class HybridConversationMemory(BaseConversationMemory):
             self.session_id = session_id
 
     def _connect(self):
-        os.makedirs(os.path.dirname(self.db_path), exist_ok=True) if os.path.dirname(self.db_path) else None
-        return sqlite3.connect(self.db_path)
-    
-    def _init_db(self):
-        conn = self._connect()
-        cursor = conn.cursor()
+        # This thread's long-lived connection; writes commit through `with conn:`, which rolls back on errors
+        return self._pool.connection()
 
-        # session
-        cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS sessions (
-                session_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id TEXT,
-                created_at REAL
-            )
-            """
-        )
+    def flush(self):
+        # Only this session's writes: a queue shared by a server's sessions is not drained on every read
+        if self._writer is not None:
+            self._writer.flush(self._pending_key())
 
-        # messages
-        cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS messages (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                session_id INTEGER,
-                role TEXT,
-                content TEXT,
-                metadata TEXT,
-                timestamp REAL,
-                FOREIGN KEY(session_id) REFERENCES sessions(session_id)
-            )
-            """
-        ) 
+    def _pending_key(self):
+        return (self.db_path, self.session_id)
 
-        conn.commit()
-        conn.close()
+    def close(self):
+        self.flush()
+        if self._owns_pool:
+            self._pool.close()
+    
+    def _init_db(self):
+        conn = self._connect()
+        migrate(conn)
+        # Without FTS5 in SQLite, retrieve() falls back to keyword matching
+        self._fts = has_full_text_index(conn)
 
     def _create_new_session(self, user_id):
         conn = self._connect()
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            INSERT INTO SESSIONS (user_id, created_at) VALUES (?, ?)
-            """, (user_id, datetime.now().timestamp())
-        )
-
-        conn.commit()
-        session_id = cursor.lastrowid
-        conn.close()
-        return session_id
+        with conn:
+            cursor = conn.execute(
+                """
+                INSERT INTO SESSIONS (user_id, created_at) VALUES (?, ?)
+                """, (user_id, datetime.now().timestamp())
+            )
+        return cursor.lastrowid
     
     def add_to_history(self, role, content, metadata = None):
         message = {
@@ -87,49 +114,93 @@ class HybridConversationMemory(BaseConversationMemory):
         self._manage_context_size()
 
     def truncate_content(self, content: str) -> str:
-        max_chars = self.max_tokens_per_message * 4
-        if len(content) > max_chars:
-            return content[:max_chars] + "...[truncated]"
-        return content
+        return self.token_counter.truncate(content, self.max_tokens_per_message)
 
     def _manage_context_size(self):
-        if len(self.conversation_history) > self.max_context_messages:
-            system_msg = self.conversation_history[0] if self.conversation_history and self.conversation_history[0]["role"] == "system" else None
-            # Calculate how many messages to remove
-            num_to_remove = len(self.conversation_history) - self.max_context_messages
-            # If system message exists, don't remove it
-            start_idx = 1 if system_msg else 0
-            # Messages to remove (excluding system message if present)
-            removed = self.conversation_history[start_idx:start_idx+num_to_remove]
-            # Push removed messages to DB
-            if removed:
-                conn = self._connect()
-                cursor = conn.cursor()
-                for msg in removed:
-                    cursor.execute(
-                        """
-                        INSERT INTO messages (session_id, role, content, metadata, timestamp) VALUES (?, ?, ?, ?, ?)
-                        """,
-                        (
-                            self.session_id,
-                            msg.get("role"),
-                            msg.get("content"),
-                            str(msg.get("metadata")) if msg.get("metadata") else None,
-                            datetime.datetime.fromisoformat(msg.get("timestamp")).timestamp() if msg.get("timestamp") else datetime.datetime.now().timestamp()
-                        )
-                    )
-                conn.commit()
-                conn.close()
-            # Now trim the in-memory history
-            recent_messages = self.conversation_history[-(self.max_context_messages-1):]
-            if system_msg:
-                self.conversation_history = [system_msg] + recent_messages
-            else:
-                self.conversation_history = self.conversation_history[-self.max_context_messages:]
+        num_to_remove = self._overflow_count(self.conversation_history, self.max_context_messages, self.max_context_tokens, self.token_counter)
+        if not num_to_remove:
+            return
+        # If system message exists, don't remove it
+        start_idx = 1 if self.conversation_history[0]["role"] == "system" else 0
+        self._archive(self.conversation_history[start_idx:start_idx + num_to_remove])
+        # Now trim the in-memory history
+        del self.conversation_history[start_idx:start_idx + num_to_remove]
+
+    def archive_context(self):
+        """Move the messages still in context, except the system prompt, to the archive, e.g. before the session is closed."""
+        start_idx = 1 if self.conversation_history and self.conversation_history[0]["role"] == "system" else 0
+        self._archive(self.conversation_history[start_idx:])
+        del self.conversation_history[start_idx:]
+
+    def _archive(self, removed: List[Dict]):
+        # Push removed messages to DB, flagged as archived; a trigger adds them to the full-text index
+        rows = [
+            (
+                self.session_id,
+                msg.get("role"),
+                msg.get("content"),
+                json.dumps(msg.get("metadata")) if msg.get("metadata") else None,
+                datetime.fromisoformat(msg.get("timestamp")).timestamp() if msg.get("timestamp") else datetime.now().timestamp()
+            )
+            for msg in removed
+        ]
+        if self._writer is not None:
+            for row in rows:
+                self._writer.submit(self._pool, ARCHIVE_MESSAGE, row, key=self._pending_key())
+        else:
+            conn = self._connect()
+            with conn:
+                conn.executemany(ARCHIVE_MESSAGE, rows)
     
+    @staticmethod
+    def _message_from_row(row) -> Dict:
+        role, content, metadata, timestamp = row
+        message = {"role": role, "content": content, "timestamp": datetime.fromtimestamp(timestamp).isoformat()}
+        if metadata:
+            message["metadata"] = json.loads(metadata)
+        return message
+
+    def retrieve(self, query: str, limit: int = 5) -> List[Dict]:
+        """
+        Archived messages of this session most relevant to query: full-text (BM25) matches, best first.
+        Clients re-rank them by embedding similarity with rank_by_similarity when recall.rerank is on.
+        Args:
+            query (str): The current user input.
+            limit (int): Maximum number of messages to return.
+        """
+        terms = query_terms(query)
+        if not terms:
+            return []
+        # Read-your-writes: messages evicted moments ago may still be queued
+        self.flush()
+        conn = self._connect()
+        if self._fts:
+            match = " OR ".join(f'"{term}"' for term in terms)
+            rows = conn.execute(
+                """
+                SELECT m.role, m.content, m.metadata, m.timestamp
+                FROM messages_fts JOIN messages m ON m.id = messages_fts.rowid
+                WHERE messages_fts MATCH ? AND m.session_id = ? AND m.timestamp >= ?
+                ORDER BY bm25(messages_fts) LIMIT ?
+                """,
+                (match, self.session_id, self._archive_since, limit)
+            ).fetchall()
+        else:
+            rows = conn.execute(
+                "SELECT role, content, metadata, timestamp FROM messages WHERE session_id = ? AND timestamp >= ? AND role IN ('user', 'assistant')",
+                (self.session_id, self._archive_since)
+            ).fetchall()
+            rows = sorted(rows, key=lambda row: -sum(term in row[1].lower() for term in terms))
+            rows = [row for row in rows if any(term in row[1].lower() for term in terms)][:limit]
+        return [self._message_from_row(row) for row in rows]
+
     def clear(self):
         self.conversation_history.clear()
         self.session_start_time = datetime.now()
+        self._archive_since = self.session_start_time.timestamp()
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM session_summaries WHERE session_id = ?", (self.session_id,))
         if self.system_prompt:
             self.add_to_history("system", self.system_prompt)
     
@@ -150,9 +221,41 @@ class HybridConversationMemory(BaseConversationMemory):
             return self.conversation_history[-limit:]
         return self.conversation_history.copy()
     
-    def set_limits(self, max_context_messages: int = None, max_tokens_per_message: int = None):
-        if max_context_messages:
-            self.max_context_messages = max_context_messages
-            self.manage_context_size()
+    def get_running_summary(self):
+        conn = self._connect()
+        row = conn.execute("SELECT content, through FROM session_summaries WHERE session_id = ?", (self.session_id,)).fetchone()
+        if not row:
+            return {"content": "", "through": None}
+        return {"content": row[0], "through": row[1]}
+
+    def set_running_summary(self, content, through):
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO session_summaries (session_id, content, through, updated_at) VALUES (?, ?, ?, ?)",
+                (self.session_id, content, through, datetime.now().timestamp())
+            )
+
+    def get_evicted(self):
+        # Archived messages are evicted ones; those newer than the summary are not folded into it yet
+        through = self.get_running_summary()["through"]
+        since = max(self._archive_since, datetime.fromisoformat(through).timestamp() if through else 0.0)
+        self.flush()
+        conn = self._connect()
+        rows = conn.execute(
+            """
+            SELECT role, content, metadata, timestamp FROM messages
+            WHERE session_id = ? AND timestamp > ? AND role IN ('user', 'assistant')
+            ORDER BY timestamp ASC
+            """,
+            (self.session_id, since)
+        ).fetchall()
+        return [self._message_from_row(row) for row in rows]
+
+    def set_limits(self, max_context_messages: int = None, max_tokens_per_message: int = None, max_context_tokens: int = None):
         if max_tokens_per_message:
-            self.max_tokens_per_message = max_tokens_per_message
\ No newline at end of file
+            self.max_tokens_per_message = max_tokens_per_message
+        if max_context_messages or max_context_tokens:
+            self.max_context_messages = max_context_messages or self.max_context_messages
+            self.max_context_tokens = max_context_tokens or self.max_context_tokens
+            self._manage_context_size()
\ No newline at end of file
@@ -3,14 +3,20 @@ from typing import List, Dict, Optional
 from datetime import datetime
 from .base_conversation_memory import BaseConversationMemory
 from friday.prompts import GENERAL_SYSTEM_PROMPT
+from friday.utils.tokens import TokenCounter, default_token_counter
 
 class InMemoryConversationMemory(BaseConversationMemory):
-    def __init__(self, max_context_messages: int = 20, max_tokens_per_message: int = 2000, system_prompt: str = GENERAL_SYSTEM_PROMPT):
+    def __init__(self, max_context_messages: int = 20, max_tokens_per_message: int = 2000, system_prompt: str = GENERAL_SYSTEM_PROMPT, max_context_tokens: int = None, token_counter: TokenCounter = None):
         self.conversation_history: List[Dict[str, str]] = []
         self.max_context_messages = max_context_messages
         self.max_tokens_per_message = max_tokens_per_message
+        self.max_context_tokens = max_context_tokens
+        self.token_counter = token_counter or default_token_counter
         self.session_start_time = datetime.now()
         self.system_prompt = system_prompt
+        self.running_summary = {"content": "", "through": None}
+        # Evicted messages kept until the running summary covers them, at most max_context_messages (default 20)
+        self.evicted: List[Dict] = []
         if system_prompt:
             self.add_to_history("system", system_prompt)
 
@@ -26,23 +32,21 @@ class InMemoryConversationMemory(BaseConversationMemory):
         self.manage_context_size()
 
     def truncate_content(self, content: str) -> str:
-        max_chars = self.max_tokens_per_message * 4
-        if len(content) > max_chars:
-            return content[:max_chars] + "...[truncated]"
-        return content
+        return self.token_counter.truncate(content, self.max_tokens_per_message)
 
     def manage_context_size(self):
-        if len(self.conversation_history) > self.max_context_messages:
-            system_msg = self.conversation_history[0] if self.conversation_history and self.conversation_history[0]["role"] == "system" else None
-            recent_messages = self.conversation_history[-(self.max_context_messages-1):]
-            if system_msg:
-                self.conversation_history = [system_msg] + recent_messages
-            else:
-                self.conversation_history = self.conversation_history[-self.max_context_messages:]
+        num_to_remove = self._overflow_count(self.conversation_history, self.max_context_messages, self.max_context_tokens, self.token_counter)
+        if num_to_remove:
+            start_idx = 1 if self.conversation_history[0]["role"] == "system" else 0
+            self.evicted.extend(msg for msg in self.conversation_history[start_idx:start_idx + num_to_remove] if msg["role"] != "system")
+            del self.evicted[:-(self.max_context_messages or 20)]
+            del self.conversation_history[start_idx:start_idx + num_to_remove]
 
     def clear(self):
         self.conversation_history.clear()
         self.session_start_time = datetime.now()
+        self.running_summary = {"content": "", "through": None}
+        self.evicted = []
         if self.system_prompt:
             self.add_to_history("system", self.system_prompt)
 
@@ -63,9 +67,21 @@ class InMemoryConversationMemory(BaseConversationMemory):
             return self.conversation_history[-limit:]
         return self.conversation_history.copy()
 
-    def set_limits(self, max_context_messages: int = None, max_tokens_per_message: int = None):
-        if max_context_messages:
-            self.max_context_messages = max_context_messages
-            self.manage_context_size()
+    def get_running_summary(self) -> Dict:
+        return dict(self.running_summary)
+
+    def set_running_summary(self, content: str, through: str):
+        self.running_summary = {"content": content, "through": through}
+        self.evicted = [msg for msg in self.evicted if msg["timestamp"] > through]
+
+    def get_evicted(self) -> List[Dict]:
+        through = self.running_summary["through"]
+        return [msg for msg in self.evicted if through is None or msg["timestamp"] > through]
+
+    def set_limits(self, max_context_messages: int = None, max_tokens_per_message: int = None, max_context_tokens: int = None):
         if max_tokens_per_message:
             self.max_tokens_per_message = max_tokens_per_message
+        if max_context_messages or max_context_tokens:
+            self.max_context_messages = max_context_messages or self.max_context_messages
+            self.max_context_tokens = max_context_tokens or self.max_context_tokens
+            self.manage_context_size()
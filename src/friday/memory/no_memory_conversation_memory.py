@@ -17,5 +17,5 @@ class NoMemoryConversationMemory(BaseConversationMemory):
     def clear(self):
         pass
 
-    def set_limits(self, max_messages=None, max_tokens_per_message=None):
+    def set_limits(self, max_messages=None, max_tokens_per_message=None, max_context_tokens=None):
         pass
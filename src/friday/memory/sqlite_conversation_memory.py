@@ -1,17 +1,28 @@
 from friday.memory.base_conversation_memory import BaseConversationMemory
-import sqlite3
+from friday.memory.sqlite_pool import SqliteConnectionPool
+from friday.memory.sqlite_schema import has_metadata_columns, migrate
+from friday.memory.write_behind import WriteBehindQueue
 import json
-import os
+from contextlib import nullcontext
 from datetime import datetime
 from friday.prompts import GENERAL_SYSTEM_PROMPT
 
+INSERT_MESSAGE = "INSERT INTO messages (session_id, role, content, metadata, timestamp) VALUES (?, ?, ?, ?, ?)"
+
 class SqliteConversationMemory(BaseConversationMemory):
-    def __init__(self, session_id=None, user_id=None, db_path="db/conversation_memory.db", system_prompt: str = GENERAL_SYSTEM_PROMPT):
+    performs_io = True
+
+    def __init__(self, session_id=None, user_id=None, db_path="db/conversation_memory.db", system_prompt: str = GENERAL_SYSTEM_PROMPT, pool: SqliteConnectionPool = None, write_behind: WriteBehindQueue = None):
         self.session_start_time = datetime.now()
         self.session_id = session_id
         self.user_id = user_id
         self.db_path = db_path
         self.system_prompt = system_prompt
+        # A pool passed in is shared (e.g. by a server's sessions) and closed by its owner
+        self._owns_pool = pool is None
+        self._pool = pool or SqliteConnectionPool(db_path)
+        # Messages are committed by this queue's background writer instead of on the request path
+        self._writer = write_behind
 
         self._init_db()
         if session_id is None:
@@ -26,94 +37,81 @@ class SqliteConversationMemory(BaseConversationMemory):
                 self.add_to_history("system", self.system_prompt)
 
     def _connect(self):
-        os.makedirs(os.path.dirname(self.db_path), exist_ok=True) if os.path.dirname(self.db_path) else None
-        return sqlite3.connect(self.db_path)
+        # This thread's long-lived connection; writes commit through `with conn:`, which rolls back on errors
+        return self._pool.connection()
+
+    def flush(self):
+        if self._writer is not None:
+            self._writer.flush(self._pending_key())
+
+    def close(self):
+        self.flush()
+        if self._owns_pool:
+            self._pool.close()
     
     def _init_db(self):
         conn = self._connect()
-        cursor = conn.cursor()
-
-        # session
-        cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS sessions (
-                session_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id TEXT,
-                created_at REAL
-            )
-            """
-        )
-
-        # messages
-        cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS messages (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                session_id INTEGER,
-                role TEXT,
-                content TEXT,
-                metadata TEXT,
-                timestamp REAL,
-                FOREIGN KEY(session_id) REFERENCES sessions(session_id)
-            )
-            """
-        ) 
-
-        conn.commit()
-        conn.close()
+        # Creates the tables, or upgrades a database written by an older version in place
+        migrate(conn)
+        self._metadata_columns = has_metadata_columns(conn)
 
     def _create_new_session(self, user_id):
         conn = self._connect()
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            INSERT INTO SESSIONS (user_id, created_at) VALUES (?, ?)
-            """, (user_id, datetime.now().timestamp())
-        )
-
-        conn.commit()
-        session_id = cursor.lastrowid
-        conn.close()
-        return session_id
+        with conn:
+            cursor = conn.execute(
+                """
+                INSERT INTO SESSIONS (user_id, created_at) VALUES (?, ?)
+                """, (user_id, datetime.now().timestamp())
+            )
+        return cursor.lastrowid
     
     def add_to_history(self, role, content, metadata=None):
         # Only allow one system prompt at the start
-        if role == "system":
-            conn = self._connect()
-            cursor = conn.cursor()
-            cursor.execute(
-                "SELECT COUNT(*) FROM messages WHERE session_id = ? AND role = 'system'",
-                (self.session_id,)
-            )
-            if cursor.fetchone()[0] > 0:
-                conn.close()
-                return
-            conn.close()
+        if role == "system" and self._has_system_message():
+            return
+        row = (self.session_id, role, content, json.dumps(metadata) if metadata else None, datetime.now().timestamp())
+        if self._writer is not None:
+            self._writer.submit(self._pool, INSERT_MESSAGE, row, key=self._pending_key())
+            return
         conn = self._connect()
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            INSERT INTO MESSAGES (session_id, role, content, metadata, timestamp)
-            VALUES (?, ?, ?, ?, ?)
-            """,
-            (self.session_id, role, content, json.dumps(metadata) if metadata else None, datetime.now().timestamp())
-        )
-        conn.commit()
-        conn.close()
+        with conn:
+            conn.execute(INSERT_MESSAGE, row)
+
+    def _pending_key(self):
+        return (self.db_path, self.session_id)
+
+    def _pending_rows(self):
+        # Read-your-writes: this session's messages still queued, in (role, content, metadata, timestamp) form
+        if self._writer is None:
+            return []
+        return [row[1:] for row in self._writer.pending(self._pending_key())]
+
+    def _has_system_message(self):
+        with self._reading():
+            row = self._connect().execute(
+                "SELECT 1 FROM messages WHERE session_id = ? AND role = 'system' LIMIT 1",
+                (self.session_id,)
+            ).fetchone()
+            return row is not None or any(role == "system" for role, *_ in self._pending_rows())
+
+    def _reading(self):
+        return self._writer.reading() if self._writer is not None else nullcontext()
     
     def clear(self):
+        # Queued messages must land before they are deleted
+        self.flush()
         conn = self._connect()
-        cursor = conn.cursor()
-        cursor.execute(
-            "DELETE FROM messages WHERE session_id = ?",
-            (self.session_id,)
-        )
-        conn.commit()
-        conn.close()
+        with conn:
+            conn.execute(
+                "DELETE FROM messages WHERE session_id = ?",
+                (self.session_id,)
+            )
+            conn.execute("DELETE FROM session_summaries WHERE session_id = ?", (self.session_id,))
         if self.system_prompt:
             self.add_to_history("system", self.system_prompt)
     
     def get_summary(self):
+        self.flush()
         conn = self._connect()
         cursor = conn.cursor()
 
@@ -135,7 +133,31 @@ class SqliteConversationMemory(BaseConversationMemory):
             session_start_time = datetime.now()
         session_duration = str(datetime.now() - session_start_time)
 
-        # Unique files accessed
+        if self._metadata_columns:
+            # Served by the (session_id, action, file) index, without parsing any JSON
+            cursor.execute(
+                "SELECT COUNT(DISTINCT COALESCE(file, '')) FROM messages WHERE session_id = ? AND action = 'read_file'",
+                (self.session_id,)
+            )
+            unique_files_accessed = cursor.fetchone()[0]
+            cursor.execute(
+                "SELECT action FROM messages WHERE session_id = ? ORDER BY timestamp DESC LIMIT 1",
+                (self.session_id,)
+            )
+            row = cursor.fetchone()
+            last_action = row[0] if row and row[0] is not None else "none"
+        else:
+            unique_files_accessed, last_action = self._metadata_summary(cursor)
+
+        return {
+            "total_messages": total_messages,
+            "session_duration": session_duration,
+            "unique_files_accessed": unique_files_accessed,
+            "last_action": last_action
+        }
+    
+    def _metadata_summary(self, cursor):
+        # SQLite without JSON1 or generated columns: parse the metadata of every message
         cursor.execute("""
             SELECT metadata FROM messages 
             WHERE session_id = ?
@@ -164,16 +186,8 @@ class SqliteConversationMemory(BaseConversationMemory):
                 last_action = "none"
         else:
             last_action = "none"
+        return unique_files_accessed, last_action
 
-        conn.close()
-
-        return {
-            "total_messages": total_messages,
-            "session_duration": session_duration,
-            "unique_files_accessed": unique_files_accessed,
-            "last_action": last_action
-        }
-    
     def get_messages(self, limit=None):
         conn = self._connect()
         cursor = conn.cursor()
@@ -182,12 +196,14 @@ class SqliteConversationMemory(BaseConversationMemory):
             FROM messages 
             WHERE session_id = ? 
             ORDER BY timestamp ASC
+            LIMIT ?
         """
+        with self._reading():
+            # LIMIT -1 is no limit; a constant query text is compiled once per connection
+            cursor.execute(query, (self.session_id, limit or -1))
+            rows = cursor.fetchall() + self._pending_rows()
         if limit:
-            query += f" LIMIT {limit}"
-        cursor.execute(query, (self.session_id,))
-        rows = cursor.fetchall()
-        conn.close()
+            rows = rows[:limit]
         messages = []
         for role, content, metadata, timestamp in rows:
             msg = {
@@ -207,6 +223,22 @@ class SqliteConversationMemory(BaseConversationMemory):
                 messages = [{"role": "system", "content": self.system_prompt, "timestamp": self.session_start_time.isoformat()}] + messages
         return messages
 
+
+    def get_running_summary(self):
+        conn = self._connect()
+        row = conn.execute("SELECT content, through FROM session_summaries WHERE session_id = ?", (self.session_id,)).fetchone()
+        if not row:
+            return {"content": "", "through": None}
+        return {"content": row[0], "through": row[1]}
+
+    def set_running_summary(self, content, through):
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO session_summaries (session_id, content, through, updated_at) VALUES (?, ?, ?, ?)",
+                (self.session_id, content, through, datetime.now().timestamp())
+            )
     
-    def set_limits(self, max_messages = None, max_tokens_per_message = None):
-        return super().set_limits(max_messages, max_tokens_per_message)
\ No newline at end of file
+    def set_limits(self, max_messages = None, max_tokens_per_message = None, max_context_tokens = None):
+        # The full history is kept on disk; prompt budgets are enforced by the client
+        return super().set_limits(max_messages, max_tokens_per_message, max_context_tokens)
\ No newline at end of file
@@ -0,0 +1,81 @@
+import os
+import sqlite3
+import threading
+from typing import Dict, List
+
+JOURNAL_MODES = ("wal", "delete", "truncate", "persist", "memory", "off")
+SYNCHRONOUS_LEVELS = ("off", "normal", "full", "extra")
+
+
+class SqliteConnectionPool:
+    """
+    Long-lived SQLite connections to one database file, one per thread.
+
+    Each thread that touches the database gets its own connection the first time it does, configured once
+    with the journal mode, synchronous level and busy timeout, and keeps it until close(). Statements are
+    parameterized and compiled once per connection thanks to sqlite3's statement cache. In WAL mode readers
+    and the writer do not block each other, and with synchronous=normal a commit does not wait for fsync
+    (a power loss can lose the last commits, never corrupt the database).
+
+    The pool can be shared by many conversation memories on the same file, e.g. all sessions of a server.
+
+    Attributes:
+        db_path (str): Path of the database file; its directory is created once, up front.
+    """
+    def __init__(self, db_path: str, journal_mode: str = "wal", synchronous: str = "normal", busy_timeout_ms: int = 5000, cached_statements: int = 128):
+        if journal_mode.lower() not in JOURNAL_MODES:
+            raise ValueError(f"Unknown journal mode {journal_mode!r}, expected one of {JOURNAL_MODES}")
+        if synchronous.lower() not in SYNCHRONOUS_LEVELS:
+            raise ValueError(f"Unknown synchronous level {synchronous!r}, expected one of {SYNCHRONOUS_LEVELS}")
+        self.db_path = db_path
+        self.journal_mode = journal_mode.lower()
+        self.synchronous = synchronous.lower()
+        self.busy_timeout_ms = busy_timeout_ms
+        self.cached_statements = cached_statements
+        os.makedirs(os.path.dirname(db_path), exist_ok=True) if os.path.dirname(db_path) else None
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._closed = False
+        self._stats = {"connections_opened": 0}
+
+    def connection(self) -> sqlite3.Connection:
+        """This thread's connection, opened on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            return conn
+        if self._closed:
+            raise sqlite3.ProgrammingError(f"Connection pool for {self.db_path} is closed")
+        # check_same_thread is off only so close() can run on any thread; a connection is used by its own thread
+        conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout_ms / 1000, cached_statements=self.cached_statements, check_same_thread=False)
+        conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout_ms)}")
+        conn.execute(f"PRAGMA journal_mode = {self.journal_mode}")
+        conn.execute(f"PRAGMA synchronous = {self.synchronous}")
+        self._local.conn = conn
+        with self._lock:
+            self._connections.append(conn)
+            self._stats["connections_opened"] += 1
+        return conn
+
+    def close(self):
+        """Close every connection of the pool; using it afterwards raises sqlite3.ProgrammingError."""
+        with self._lock:
+            self._closed = True
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def __enter__(self) -> "SqliteConnectionPool":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {**self._stats, "open_connections": len(self._connections)}
@@ -0,0 +1,196 @@
+import sqlite3
+from datetime import datetime
+from typing import Callable, List, Optional, Set
+from friday.utils.logger import setup_logger
+
+# json_valid guards json_extract, which raises on malformed JSON at read time
+_METADATA_FIELD = "CASE WHEN json_valid(metadata) THEN json_extract(metadata, '$.{}') END"
+
+
+def _create_tables(conn: sqlite3.Connection):
+    # IF NOT EXISTS: databases created before versioning already have these tables
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS sessions (
+            session_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id TEXT,
+            created_at REAL
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id INTEGER,
+            role TEXT,
+            content TEXT,
+            metadata TEXT,
+            timestamp REAL,
+            FOREIGN KEY(session_id) REFERENCES sessions(session_id)
+        )
+        """
+    )
+    # running summary of compacted turns, one row per session
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS session_summaries (
+            session_id INTEGER PRIMARY KEY,
+            content TEXT,
+            through TEXT,
+            updated_at REAL,
+            FOREIGN KEY(session_id) REFERENCES sessions(session_id)
+        )
+        """
+    )
+
+
+def _index_sessions_and_messages(conn: sqlite3.Connection):
+    # A session's messages in order: get_messages, the system prompt check, last action, archive reads
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_messages_session_timestamp ON messages (session_id, timestamp)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_user_id ON sessions (user_id)")
+
+
+def _add_metadata_columns(conn: sqlite3.Connection) -> Optional[bool]:
+    # Virtual generated columns are computed on read and cost no storage; they need SQLite 3.31 with JSON1
+    if not supports_generated_columns(conn):
+        return False
+    for field in ("action", "file"):
+        conn.execute(f"ALTER TABLE messages ADD COLUMN {field} TEXT GENERATED ALWAYS AS ({_METADATA_FIELD.format(field)}) VIRTUAL")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_messages_session_action_file ON messages (session_id, action, file)")
+
+
+def _index_archived_messages(conn: sqlite3.Connection) -> Optional[bool]:
+    # Full-text index for HybridConversationMemory.retrieve(); contentless, the text stays in messages.
+    # A trigger keeps it current, so batched inserts (executemany) are indexed too
+    if not supports_full_text_search(conn):
+        return False
+    conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(content, content='', tokenize='porter unicode61')")
+    # Messages archived before the index existed
+    conn.execute("INSERT INTO messages_fts (rowid, content) SELECT id, content FROM messages WHERE role IN ('user', 'assistant')")
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS messages_fts_insert AFTER INSERT ON messages
+        WHEN new.role IN ('user', 'assistant')
+        BEGIN
+            INSERT INTO messages_fts (rowid, content) VALUES (new.id, new.content);
+        END
+        """
+    )
+
+
+def _flag_archived_messages(conn: sqlite3.Connection):
+    # Set by HybridConversationMemory when it archives evicted messages; other writers leave it at 0
+    conn.execute("ALTER TABLE messages ADD COLUMN archived INTEGER NOT NULL DEFAULT 0")
+
+
+def _index_only_archived_messages(conn: sqlite3.Connection) -> Optional[bool]:
+    # Only HybridConversationMemory searches the index, so the plain SQLite backend's writes skip it.
+    # Rows indexed before the flag existed stay indexed: nothing tells them apart
+    if not supports_full_text_search(conn):
+        return False
+    conn.execute("DROP TRIGGER IF EXISTS messages_fts_insert")
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS messages_fts_archive AFTER INSERT ON messages
+        WHEN new.archived = 1 AND new.role IN ('user', 'assistant')
+        BEGIN
+            INSERT INTO messages_fts (rowid, content) VALUES (new.id, new.content);
+        END
+        """
+    )
+
+
+# Forward migrations, applied in order; version N is MIGRATIONS[N - 1]. Never edit a released one, append a new one.
+# A migration that returns False was skipped because SQLite lacks a feature it needs: its version is not recorded,
+# so it runs again once the database is opened with an SQLite that has the feature.
+MIGRATIONS: List[Callable[[sqlite3.Connection], Optional[bool]]] = [
+    _create_tables,
+    _index_sessions_and_messages,
+    _add_metadata_columns,
+    _index_archived_messages,
+    _flag_archived_messages,
+    _index_only_archived_messages,
+]
+SCHEMA_VERSION = len(MIGRATIONS)
+_warned_skipped: Set[int] = set()
+
+
+def supports_generated_columns(conn: sqlite3.Connection) -> bool:
+    if sqlite3.sqlite_version_info < (3, 31, 0):
+        return False
+    try:
+        conn.execute("SELECT json_valid('{}')")
+    except sqlite3.OperationalError:
+        return False
+    return True
+
+
+def supports_full_text_search(conn: sqlite3.Connection) -> bool:
+    try:
+        return conn.execute("SELECT 1 FROM pragma_module_list WHERE name = 'fts5'").fetchone() is not None
+    except sqlite3.OperationalError:
+        return False
+
+
+def _applied_versions(conn: sqlite3.Connection) -> Set[int]:
+    try:
+        return {row[0] for row in conn.execute("SELECT version FROM schema_version")}
+    except sqlite3.OperationalError:
+        return set()
+
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    """
+    Version of the schema in the database, 0 when it predates versioning or is empty.
+    Every migration up to it has been applied: a skipped one caps it even when later ones ran.
+    """
+    applied = _applied_versions(conn)
+    version = 0
+    while version + 1 in applied:
+        version += 1
+    return version
+
+
+def _missing_versions(conn: sqlite3.Connection) -> List[int]:
+    applied = _applied_versions(conn)
+    return [version for version in range(1, SCHEMA_VERSION + 1) if version not in applied]
+
+
+def migrate(conn: sqlite3.Connection) -> int:
+    """
+    Bring the database up to SCHEMA_VERSION in place, applying the migrations it has not seen yet.
+    All of them run in one transaction that holds the write lock, so a concurrent process either waits
+    for the upgrade or finds it done, and a failed migration leaves the database as it was.
+    Returns:
+        int: The schema version the database was at before.
+    """
+    if not _missing_versions(conn):
+        return schema_version(conn)
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute("CREATE TABLE IF NOT EXISTS schema_version (version INTEGER PRIMARY KEY, applied_at REAL)")
+        # Read again under the lock: another connection may have upgraded the database meanwhile
+        current = schema_version(conn)
+        for version in _missing_versions(conn):
+            if MIGRATIONS[version - 1](conn) is False:
+                if version not in _warned_skipped:
+                    _warned_skipped.add(version)
+                    setup_logger('friday').warning(f"Schema migration {version} ({MIGRATIONS[version - 1].__name__}) skipped: SQLite {sqlite3.sqlite_version} lacks a feature it needs")
+                continue
+            conn.execute("INSERT INTO schema_version (version, applied_at) VALUES (?, ?)", (version, datetime.now().timestamp()))
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return current
+
+
+def has_metadata_columns(conn: sqlite3.Connection) -> bool:
+    """Whether messages has the generated action/file columns (absent when SQLite could not add them)."""
+    return any(row[1] == "action" for row in conn.execute("PRAGMA table_xinfo(messages)"))
+
+
+def has_full_text_index(conn: sqlite3.Connection) -> bool:
+    """Whether the messages_fts index exists (absent when SQLite lacks FTS5)."""
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'messages_fts'").fetchone() is not None
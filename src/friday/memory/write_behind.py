@@ -0,0 +1,215 @@
+import atexit
+import threading
+import time
+import weakref
+from collections import deque
+from contextlib import contextmanager
+from itertools import groupby
+from typing import Dict, Hashable, List, Optional, Tuple
+from friday.memory.sqlite_pool import SqliteConnectionPool
+from friday.utils.logger import setup_logger
+
+# Queues still running when the interpreter exits are flushed, so acknowledged writes reach the database
+_live_queues: "weakref.WeakSet[WriteBehindQueue]" = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_on_exit():
+    for queue in list(_live_queues):
+        try:
+            queue.close()
+        except Exception:
+            pass
+
+
+class WriteBehindQueue:
+    """
+    Takes conversation writes off the request path: statements are queued in memory and a background thread
+    commits them in batches, one transaction per batch, with consecutive rows of the same statement sent
+    through executemany. Statements run in the order they were submitted.
+
+    The queue is bounded: when max_pending writes are waiting, submit() blocks until the writer catches up.
+    Readers see their own pending writes through pending() inside reading(). flush() waits for everything
+    submitted so far to be committed, flush(key) only for the writes tagged key, and queues still open at
+    interpreter exit are flushed. When a batch fails, the writes of each key in it are committed on their
+    own; those that still fail are dropped and their error raised by the next flush(key) of their key, or by
+    the next flush() or close().
+
+    One queue can serve many memories and databases, e.g. all sessions of a server.
+
+    Attributes:
+        max_pending (int): Writes waiting at most before submit() blocks.
+        batch_size (int): Writes committed at most per transaction.
+        flush_interval (float): Seconds the writer waits for more writes to gather into a batch.
+    """
+    def __init__(self, max_pending: int = 1024, batch_size: int = 256, flush_interval_ms: int = 50):
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self.logger = setup_logger('friday')
+        # (sequence number, pool, sql, params, key), oldest first; an entry stays until it is committed
+        self._pending: deque = deque()
+        self._cond = threading.Condition()
+        # Held while a batch commits and while a reader combines the database with pending writes,
+        # so a write is never seen in both or in neither
+        self._commit_lock = threading.Lock()
+        self._submitted = 0
+        self._committed = 0
+        self._flush_requested = 0
+        # First error of a failed batch per key of the writes it dropped
+        self._errors: Dict[Optional[Hashable], BaseException] = {}
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+        self._stats = {"writes": 0, "batches": 0, "backpressure_waits": 0, "failed_batches": 0, "dropped_writes": 0}
+        _live_queues.add(self)
+
+    def submit(self, pool: SqliteConnectionPool, sql: str, params: Tuple, key: Optional[Hashable] = None):
+        """
+        Queue a write, blocking while the queue is full.
+        Args:
+            pool (SqliteConnectionPool): Connections to the database the statement runs on.
+            sql (str): A parameterized statement.
+            params (Tuple): Its parameters.
+            key (Hashable, optional): Tag under which pending() returns params until the write is committed.
+        """
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Write-behind queue is closed")
+            if len(self._pending) >= self.max_pending:
+                self._stats["backpressure_waits"] += 1
+                self._flush_requested += 1
+                self._cond.notify_all()
+                while len(self._pending) >= self.max_pending:
+                    self._cond.wait()
+                self._flush_requested -= 1
+            self._submitted += 1
+            self._pending.append((self._submitted, pool, sql, params, key))
+            self._stats["writes"] += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="friday-write-behind", daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+
+    @contextmanager
+    def reading(self):
+        """Hold off commits while a reader combines what it reads from the database with pending()."""
+        with self._commit_lock:
+            yield
+
+    def pending(self, key: Hashable) -> List[Tuple]:
+        """Parameters of the writes tagged key that are not committed yet, oldest first."""
+        with self._cond:
+            return [entry[3] for entry in self._pending if entry[4] == key]
+
+    def flush(self, key: Optional[Hashable] = None):
+        """
+        Wait until every write submitted so far is committed, or with a key only the writes tagged key,
+        so one session does not wait for, or see the errors of, another session's writes.
+        """
+        with self._cond:
+            if key is None:
+                target = self._submitted
+            else:
+                target = max((entry[0] for entry in self._pending if entry[4] == key), default=0)
+            self._flush_requested += 1
+            self._cond.notify_all()
+            while self._committed < target:
+                self._cond.wait()
+            self._flush_requested -= 1
+            if key is None:
+                errors = list(self._errors.values())
+                self._errors.clear()
+                error = errors[0] if errors else None
+            else:
+                error = self._errors.pop(key, None)
+        if error is not None:
+            raise error
+
+    def close(self):
+        """Flush, then stop the writer thread."""
+        if self._closed:
+            return
+        try:
+            self.flush()
+        finally:
+            with self._cond:
+                self._closed = True
+                self._cond.notify_all()
+            if self._thread is not None:
+                self._thread.join()
+            _live_queues.discard(self)
+
+    def _next_batch(self) -> List[Tuple]:
+        with self._cond:
+            while not self._pending and not self._closed:
+                self._cond.wait()
+            if not self._pending:
+                return []
+            # Group commit: give concurrent writers a moment to join the batch unless someone is waiting
+            deadline = time.monotonic() + self.flush_interval
+            while len(self._pending) < self.batch_size and not self._flush_requested and not self._closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            return [self._pending[i] for i in range(min(self.batch_size, len(self._pending)))]
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                return
+            with self._commit_lock:
+                for pool, entries in groupby(batch, key=lambda entry: entry[1]):
+                    entries = list(entries)
+                    try:
+                        self._commit(pool, entries)
+                    except Exception as e:
+                        self.logger.error(f"Write-behind batch of {len(entries)} writes to {pool.db_path} failed: {e}")
+                        with self._cond:
+                            self._stats["failed_batches"] += 1
+                        self._commit_per_key(pool, entries, e)
+                with self._cond:
+                    for _ in batch:
+                        self._pending.popleft()
+                    self._committed = batch[-1][0]
+                    self._stats["batches"] += 1
+                    self._cond.notify_all()
+
+    @staticmethod
+    def _commit(pool: SqliteConnectionPool, entries: List[Tuple]):
+        conn = pool.connection()
+        with conn:
+            for sql, statements in groupby(entries, key=lambda entry: entry[2]):
+                conn.executemany(sql, [entry[3] for entry in statements])
+
+    def _commit_per_key(self, pool: SqliteConnectionPool, entries: List[Tuple], error: Exception):
+        # The failed transaction rolled back every write in it: commit each key's writes on their own,
+        # so only the writes of the key that fails are dropped and only that key sees the error
+        keys = list(dict.fromkeys(entry[4] for entry in entries))
+        for key in keys:
+            key_entries = [entry for entry in entries if entry[4] == key]
+            if len(keys) > 1:
+                try:
+                    self._commit(pool, key_entries)
+                    continue
+                except Exception as e:
+                    error = e
+            with self._cond:
+                self._stats["dropped_writes"] += len(key_entries)
+                self._errors.setdefault(key, error)
+
+    def get_stats(self) -> Dict:
+        with self._cond:
+            return {**self._stats, "pending": len(self._pending)}
+
+
+def create_write_behind(cfg: Dict) -> Optional[WriteBehindQueue]:
+    """The write-behind queue described by the write_behind config section, or None when it is disabled."""
+    if not cfg.get("enabled", False):
+        return None
+    return WriteBehindQueue(
+        max_pending=cfg.get("max_pending", 1024),
+        batch_size=cfg.get("batch_size", 256),
+        flush_interval_ms=cfg.get("flush_interval_ms", 50),
+    )
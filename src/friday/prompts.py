@@ -30,4 +30,92 @@ FILE_ANALYSIS_SYSTEM_PROMPT = (
 
 CONFIRMATION_PROMPT = "Do you want to apply this change? (yes/no)"
 
-CONTEXT_PROMPT = "You are Friday, a helpful AI assistant. Provide clear, concise, and helpful responses."
\ No newline at end of file
+CONTEXT_PROMPT = "You are Friday, a helpful AI assistant. Provide clear, concise, and helpful responses."
+
+FILE_CHUNK_ANALYSIS_SYSTEM_PROMPT = (
+    "You are a helpful assistant that analyzes source code files. "
+    "You are given one section of a larger file. Answer the question using only this section, "
+    "quote line numbers where relevant, and say briefly if the section is not relevant to the question."
+)
+
+FILE_REDUCE_SYSTEM_PROMPT = (
+    "You are a helpful assistant that analyzes source code files. "
+    "You are given partial answers, each produced from one section of the same file. "
+    "Combine them into a single, coherent answer to the question. Remove duplicates and ignore sections marked as not relevant."
+)
+
+COMPACTION_SYSTEM_PROMPT = (
+    "You maintain a running summary of a conversation between a user and Friday, a coding assistant. "
+    "You are given the current summary and the messages that follow it. Reply with the updated summary only: "
+    "keep facts, decisions, file names, code identifiers and open questions, drop greetings and repetition, and stay concise."
+)
+
+ROUTING_PROMPT = (
+    "Decide which function handles the request above:\n"
+    "1. read_file(file_name: str, question: str) → Reads the contents of a file and answers questions about it.\n"
+    "2. read_files(files: list[str], question: str) → Reads the contents of multiple files and answers questions about them.\n"
+    "3. generate_action(question: str) → Answers general programming or technical questions.\n\n"
+    "Return a **valid JSON object only** with the following keys:\n"
+    "    - action: one of 'read_file', 'read_files', or 'generate_action'\n"
+    "    - file: the filename to read (include only if action is 'read_file')\n"
+    "    - files: the list of filenames to read (include only if action is 'read_files')\n"
+    "    - question: the question to answer or context for the action\n"
+    "Do NOT include any Markdown, code blocks, or extra text outside the JSON. Examples:\n"
+    '{ "action": "read_file", "file": "cli.py", "question": "Explain the driver() function." }\n'
+    '{ "action": "read_files", "files": ["cli.py", "main.py"], "question": "Compare the main logic in both files." }\n'
+    '{ "action": "generate_action", "question": "What is blockchain?" }'
+)
+
+TOOL_CALLING_SYSTEM_PROMPT = (
+    "You are Friday, a highly intelligent coding assistant. "
+    "Answer general programming or technical questions directly. "
+    "When the user asks about specific files in their workspace, call read_file for a single file "
+    "or read_files for several files instead of guessing their contents."
+)
+
+TOOL_DEFINITIONS = [
+    {
+        "type": "function",
+        "function": {
+            "name": "read_file",
+            "description": "Reads the contents of a file in the user's workspace and answers a question about it.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "file_name": {"type": "string", "description": "Name or relative path of the file, e.g. cli.py"},
+                    "question": {"type": "string", "description": "The question to answer about the file"},
+                },
+                "required": ["file_name", "question"],
+            },
+        },
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "read_files",
+            "description": "Reads the contents of several files in the user's workspace and answers a question about them.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "files": {"type": "array", "items": {"type": "string"}, "description": "Names or relative paths of the files"},
+                    "question": {"type": "string", "description": "The question to answer about the files"},
+                },
+                "required": ["files", "question"],
+            },
+        },
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "generate_action",
+            "description": "Answers a general programming or technical question that does not need any workspace file.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "question": {"type": "string", "description": "The question to answer"},
+                },
+                "required": ["question"],
+            },
+        },
+    },
+]
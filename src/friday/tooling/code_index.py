@@ -0,0 +1,372 @@
+import ast
+import json
+import multiprocessing
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from friday.utils.chunking import iter_line_chunks
+from friday.utils.logger import setup_logger
+from friday.utils.tokens import approximate_tokens
+
+CODE_INDEX_VERSION = 1
+# Files larger than this, or with a NUL byte near the start, are not indexed
+MAX_FILE_BYTES = 2_000_000
+IDENTIFIER = r"[A-Za-z_][A-Za-z0-9_]*"
+# Code-like mentions: `name`, name(), a.b, snake_case, camelCase, or a name next to "function"/"method"/"class"
+CODE_MENTION_PATTERNS = [
+    re.compile(rf"`({IDENTIFIER}(?:\.{IDENTIFIER})*)"),
+    re.compile(rf"({IDENTIFIER}(?:\.{IDENTIFIER})*)\s*\("),
+    re.compile(rf"\b({IDENTIFIER}\.{IDENTIFIER}(?:\.{IDENTIFIER})*)"),
+    re.compile(r"\b([A-Za-z0-9]*_[A-Za-z0-9_]*|[a-z]+[A-Z][A-Za-z0-9]*|[A-Z][a-z0-9]+[A-Z][A-Za-z0-9]*)\b"),
+    re.compile(rf"\b(?:function|method|class|def)\s+`?({IDENTIFIER})", re.IGNORECASE),
+    re.compile(rf"\b({IDENTIFIER})`?\s+(?:function|method|class)\b", re.IGNORECASE),
+]
+
+
+def mentioned_names(question: str) -> Set[str]:
+    """Identifiers the question refers to as code; dotted names also contribute their last part."""
+    names = set()
+    for pattern in CODE_MENTION_PATTERNS:
+        for match in pattern.findall(question or ""):
+            names.add(match)
+            names.add(match.rsplit(".", 1)[-1])
+    return {name for name in names if name.lower() not in ("the", "a", "an", "this", "that")}
+
+
+def _python_symbols(source: str) -> List[Dict]:
+    tree = ast.parse(source)
+    symbols = []
+
+    def visit(nodes, prefix: str, in_class: bool):
+        for node in nodes:
+            if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                continue
+            is_class = isinstance(node, ast.ClassDef)
+            refs = set()
+            for child in ast.walk(node):
+                if isinstance(child, ast.Name):
+                    refs.add(child.id)
+                elif isinstance(child, ast.Attribute):
+                    refs.add(child.attr)
+            refs.discard(node.name)
+            symbols.append({
+                "name": node.name,
+                "qualname": prefix + node.name,
+                "kind": "class" if is_class else ("method" if in_class else "function"),
+                # Decorators belong to the definition
+                "start": min([node.lineno] + [decorator.lineno for decorator in node.decorator_list]),
+                "end": node.end_lineno,
+                "refs": sorted(refs),
+            })
+            if is_class:
+                visit(node.body, f"{prefix}{node.name}.", True)
+
+    visit(tree.body, "", False)
+    return symbols
+
+
+def extract_symbols(file_path: str, chunk_tokens: int = 400) -> Optional[List[Dict]]:
+    """
+    Symbols of a source file with their 1-based, inclusive line spans. Python files are parsed with ast into
+    functions, classes and methods (with the names each one references); other files, and Python that does
+    not parse, fall back to line-aware chunks. Returns None for binary or oversized files.
+    Runs in worker processes, so it only takes and returns plain data.
+    """
+    try:
+        if os.path.getsize(file_path) > MAX_FILE_BYTES:
+            return None
+        with open(file_path, "rb") as f:
+            head = f.read(4096)
+        if b"\0" in head:
+            return None
+        if file_path.endswith(".py"):
+            with open(file_path, "r", encoding="utf-8", errors="replace") as f:
+                source = f.read()
+            try:
+                return _python_symbols(source)
+            except (SyntaxError, ValueError, RecursionError):
+                pass
+        return [
+            {"name": None, "qualname": f"lines {start}-{end}", "kind": "chunk", "start": start, "end": end, "refs": []}
+            for start, end, _ in iter_line_chunks(file_path, chunk_tokens)
+        ]
+    except OSError:
+        return None
+
+
+def _extract_many(paths: List[str], chunk_tokens: int) -> List[Optional[List[Dict]]]:
+    return [extract_symbols(path, chunk_tokens) for path in paths]
+
+
+class CodeIndex:
+    """
+    Symbol index of the workspace: functions, classes and methods with their line spans, so that read_file can
+    send the definitions a question is about instead of the whole file.
+
+    Entries are keyed by the file's mtime and size; a file is re-parsed only when those change, both when it
+    is looked up and when the whole workspace is (re)built. Builds parse stale files across a process pool
+    and persist the index, so the next process starts warm.
+
+    Attributes:
+        file_index (WorkspaceFileIndex): Provides the workspace's file list and root.
+        index_path (Optional[str]): Where the index is persisted, or None to keep it in memory only.
+        max_tokens (int): Token budget of an excerpt.
+        max_ratio (float): Excerpts larger than this fraction of the file are not worth it; the whole file is sent.
+    """
+    def __init__(self, file_index, index_path: Optional[str] = "db/code_index.json", workers: int = 0, parallel_threshold: int = 16, chunk_tokens: int = 400, max_tokens: int = 4000, max_ratio: float = 0.6, count_tokens: Callable[[str], int] = approximate_tokens):
+        self.file_index = file_index
+        self.root_dir = Path(file_index.root_dir)
+        self.index_path = index_path
+        self.workers = workers or None
+        self.parallel_threshold = parallel_threshold
+        self.chunk_tokens = chunk_tokens
+        self.max_tokens = max_tokens
+        self.max_ratio = max_ratio
+        self.count_tokens = count_tokens
+        self.logger = setup_logger('friday')
+        self._files: Dict[str, Dict] = {}
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._dirty = False
+        self._building = False
+        self._stats = {"parsed": 0, "reused": 0, "builds": 0, "excerpts": 0, "whole_files": 0, "excerpt_tokens": 0, "file_tokens": 0}
+
+    # Building
+    def build(self, background: bool = False):
+        """
+        Bring the index up to date with the workspace: new and changed files are parsed (across a process pool
+        when there are at least parallel_threshold of them), deleted files are dropped.
+        Args:
+            background (bool): Build in a daemon thread instead of blocking the caller.
+        """
+        if background:
+            with self._lock:
+                if self._building:
+                    return
+                self._building = True
+            threading.Thread(target=self._build_in_background, name="friday-code-index", daemon=True).start()
+            return
+        self._ensure_loaded()
+        own_files = {self._relative(path) for path in (self.index_path, self.file_index.index_path) if path}
+        rel_paths = [rel_path for rel_path in self.file_index.files() if rel_path not in own_files]
+        current = set(rel_paths)
+        with self._lock:
+            for rel_path in [p for p in self._files if p not in current]:
+                del self._files[rel_path]
+                self._dirty = True
+            stale = [(rel_path, key) for rel_path, key in ((p, self._file_key(p)) for p in rel_paths) if key is not None and self._is_stale(rel_path, key)]
+        results = self._extract([rel_path for rel_path, _ in stale])
+        with self._lock:
+            for (rel_path, key), symbols in zip(stale, results):
+                self._store(rel_path, key, symbols)
+            self._stats["reused"] += len(rel_paths) - len(stale)
+            self._stats["builds"] += 1
+        self.save()
+
+    def _build_in_background(self):
+        try:
+            self.build()
+        except Exception as e:
+            self.logger.warning(f"Code index build failed: {e}")
+        finally:
+            with self._lock:
+                self._building = False
+
+    def _extract(self, rel_paths: List[str]) -> List[Optional[List[Dict]]]:
+        paths = [str(self.root_dir / rel_path) for rel_path in rel_paths]
+        if len(paths) < self.parallel_threshold:
+            return _extract_many(paths, self.chunk_tokens)
+        workers = self.workers or os.cpu_count() or 1
+        batches = [paths[i::workers * 4] for i in range(workers * 4)]
+        try:
+            # Not fork: the client has threads running (warm-up, HTTP pools) and a forked child would inherit their locks
+            context = multiprocessing.get_context("forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn")
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+                results = list(executor.map(_extract_many, batches, [self.chunk_tokens] * len(batches)))
+        except (OSError, RuntimeError) as e:
+            # No process pool available (e.g. a restricted sandbox): parse in this process
+            self.logger.warning(f"Parsing in a single process: {e}")
+            return _extract_many(paths, self.chunk_tokens)
+        # Undo the round-robin batching
+        by_path = {path: symbols for batch, batch_results in zip(batches, results) for path, symbols in zip(batch, batch_results)}
+        return [by_path[path] for path in paths]
+
+    def _file_key(self, rel_path: str) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.root_dir / rel_path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _is_stale(self, rel_path: str, key: Tuple[int, int]) -> bool:
+        entry = self._files.get(rel_path)
+        return entry is None or (entry["mtime_ns"], entry["size"]) != key
+
+    def _store(self, rel_path: str, key: Tuple[int, int], symbols: Optional[List[Dict]]):
+        self._files[rel_path] = {"mtime_ns": key[0], "size": key[1], "symbols": symbols}
+        self._stats["parsed"] += 1
+        self._dirty = True
+
+    def symbols(self, file_path) -> Optional[List[Dict]]:
+        """Symbols of one file, re-parsing it first if it changed since it was indexed. None if it cannot be indexed."""
+        self._ensure_loaded()
+        rel_path = self._relative(file_path)
+        if rel_path is None:
+            return extract_symbols(str(file_path), self.chunk_tokens)
+        key = self._file_key(rel_path)
+        if key is None:
+            return None
+        with self._lock:
+            if not self._is_stale(rel_path, key):
+                self._stats["reused"] += 1
+                return self._files[rel_path]["symbols"]
+        symbols = extract_symbols(str(self.root_dir / rel_path), self.chunk_tokens)
+        with self._lock:
+            self._store(rel_path, key, symbols)
+        return symbols
+
+    def _relative(self, file_path) -> Optional[str]:
+        try:
+            return Path(file_path).resolve().relative_to(self.root_dir).as_posix()
+        except ValueError:
+            return None
+
+    # Excerpts
+    def excerpt(self, file_path, question: str) -> Optional[Dict]:
+        """
+        The parts of a file that a question is about: the symbols it names plus the symbols of the same file
+        that those reference (one level), merged into line ranges and kept within max_tokens.
+        Returns:
+            Optional[Dict]: {"content", "symbols", "ranges", "tokens", "file_tokens"}, or None when the question
+            names nothing in the file or the excerpt would not be much smaller than the file.
+        """
+        if not self._stats["builds"]:
+            # The first lookup starts indexing the rest of the workspace
+            self.build(background=True)
+        names = mentioned_names(question)
+        symbols = self.symbols(file_path) if names else None
+        if not symbols:
+            return self._whole_file()
+        with open(file_path, "r", encoding="utf-8", errors="replace") as f:
+            lines = f.readlines()
+        # Named symbols come first, so dependencies are what gets left out when the budget runs out
+        selected, budget = [], self.max_tokens
+        for symbol in self._select(symbols, names, lines):
+            budget -= self.count_tokens("".join(lines[symbol["start"] - 1:symbol["end"]]))
+            if selected and budget < 0:
+                break
+            selected.append(symbol)
+        if not selected:
+            return self._whole_file()
+        ranges = self._merge([(symbol["start"], symbol["end"]) for symbol in selected])
+        parts = ["".join(lines[start - 1:end]) for start, end in ranges]
+        tokens = sum(self.count_tokens(part) for part in parts)
+        file_tokens = self.count_tokens("".join(lines))
+        if tokens > file_tokens * self.max_ratio:
+            return self._whole_file()
+        parts = [f"# lines {start}-{end}\n{part.rstrip()}" for (start, end), part in zip(ranges, parts)]
+        header = (f"Excerpt of {Path(file_path).name} ({len(lines)} lines): only the definitions relevant to the question "
+                  f"and the ones they use, with their line numbers.")
+        with self._lock:
+            self._stats["excerpts"] += 1
+            self._stats["excerpt_tokens"] += tokens
+            self._stats["file_tokens"] += file_tokens
+        return {
+            "content": header + "\n\n" + "\n\n...\n\n".join(parts),
+            "symbols": [symbol["qualname"] for symbol in selected],
+            "ranges": ranges,
+            "tokens": tokens,
+            "file_tokens": file_tokens,
+        }
+
+    def _whole_file(self) -> None:
+        with self._lock:
+            self._stats["whole_files"] += 1
+        return None
+
+    def _select(self, symbols: List[Dict], names: Set[str], lines: List[str]) -> List[Dict]:
+        if symbols[0]["kind"] == "chunk":
+            # Line-chunked file: the chunks in which a named identifier appears as a word
+            words = re.compile(r"\b(?:" + "|".join(re.escape(name) for name in sorted(names)) + r")\b")
+            return [chunk for chunk in symbols if words.search("".join(lines[chunk["start"] - 1:chunk["end"]]))]
+        named = [symbol for symbol in symbols if symbol["name"] in names or symbol["qualname"] in names]
+        if not named:
+            return []
+        selected = list(named)
+        for symbol in named:
+            owner = symbol["qualname"].rsplit(".", 1)[0] + "." if "." in symbol["qualname"] else ""
+            for candidate in symbols:
+                if candidate in selected or candidate["name"] not in symbol["refs"]:
+                    continue
+                # Methods are only dependencies of their own class's code (self.helper())
+                if candidate["kind"] == "method" and not (owner and candidate["qualname"].startswith(owner)):
+                    continue
+                selected.append(candidate)
+        return selected
+
+    @staticmethod
+    def _merge(spans: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+        merged: List[Tuple[int, int]] = []
+        for start, end in sorted(spans):
+            if merged and start <= merged[-1][1] + 1:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+            else:
+                merged.append((start, end))
+        return merged
+
+    # Persistence
+    def _ensure_loaded(self):
+        with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+            if not self.index_path or not os.path.exists(self.index_path):
+                return
+            try:
+                with open(self.index_path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                return
+            if data.get("version") == CODE_INDEX_VERSION and data.get("root") == str(self.root_dir) and data.get("chunk_tokens") == self.chunk_tokens:
+                self._files = data.get("files", {})
+
+    def save(self):
+        with self._lock:
+            if not self.index_path or not self._dirty:
+                return
+            os.makedirs(os.path.dirname(self.index_path), exist_ok=True) if os.path.dirname(self.index_path) else None
+            data = {"version": CODE_INDEX_VERSION, "root": str(self.root_dir), "chunk_tokens": self.chunk_tokens, "files": self._files}
+            tmp_path = f"{self.index_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.index_path)
+            self._dirty = False
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["files"] = len(self._files)
+            stats["symbols"] = sum(len(entry["symbols"] or []) for entry in self._files.values())
+        stats["excerpt_ratio"] = stats["excerpt_tokens"] / stats["file_tokens"] if stats["file_tokens"] else 0.0
+        return stats
+
+
+def create_code_index(file_index, code_index_config: Dict, count_tokens: Callable[[str], int] = approximate_tokens) -> Optional[CodeIndex]:
+    """
+    Build a CodeIndex from the code_index section of ollama_config.yml, or None when it is disabled.
+    """
+    if not code_index_config.get("enabled", True):
+        return None
+    return CodeIndex(
+        file_index,
+        index_path=code_index_config.get("index_path", "db/code_index.json"),
+        workers=code_index_config.get("workers", 0),
+        parallel_threshold=code_index_config.get("parallel_threshold", 16),
+        chunk_tokens=code_index_config.get("chunk_tokens", 400),
+        max_tokens=code_index_config.get("max_tokens", 4000),
+        max_ratio=code_index_config.get("max_ratio", 0.6),
+        count_tokens=count_tokens,
+    )
@@ -0,0 +1,309 @@
+import difflib
+import fnmatch
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+DEFAULT_IGNORE_PATTERNS = [
+    ".git", ".hg", ".svn", "node_modules", ".venv", "venv", "__pycache__",
+    ".mypy_cache", ".pytest_cache", ".ruff_cache", ".tox", ".nox", "*.egg-info",
+    ".idea", ".vscode", "dist", "build",
+]
+INDEX_VERSION = 1
+GLOB_CHARS = set("*?[")
+
+
+class WorkspaceFileIndex:
+    """
+    Name -> paths index of a workspace, built once and kept fresh incrementally.
+
+    Each directory's listing is stored together with its mtime; a refresh only re-lists directories whose
+    mtime changed (entries added, removed or renamed) and just stats the rest. The index can be persisted
+    to disk so the next process starts warm.
+
+    Attributes:
+        root_dir (Path): Workspace root that is indexed.
+        index_path (Optional[str]): Where the index is persisted, or None to keep it in memory only.
+        refresh_interval (float): Minimum seconds between automatic refreshes triggered by lookups.
+    """
+    def __init__(self, root_dir, index_path: Optional[str] = "db/file_index.json", ignore_patterns: Optional[Iterable[str]] = None, use_gitignore: bool = True, refresh_interval: float = 2.0):
+        self.root_dir = Path(root_dir).resolve()
+        self.index_path = index_path
+        self.refresh_interval = refresh_interval
+        self.ignore_patterns = list(DEFAULT_IGNORE_PATTERNS) + list(ignore_patterns or [])
+        if use_gitignore:
+            self.ignore_patterns += self._read_gitignore()
+        self._dirs: Dict[str, Dict] = {}
+        self._names: Dict[str, Set[str]] = {}
+        self._lock = threading.RLock()
+        self._built = threading.Event()
+        self._last_refresh = 0.0
+
+    def _read_gitignore(self) -> List[str]:
+        gitignore = self.root_dir / ".gitignore"
+        if not gitignore.is_file():
+            return []
+        patterns = []
+        for line in gitignore.read_text(encoding="utf-8", errors="ignore").splitlines():
+            line = line.strip()
+            # Negated patterns are not supported; they only ever re-include files
+            if not line or line.startswith("#") or line.startswith("!"):
+                continue
+            patterns.append(line.rstrip("/").lstrip("/"))
+        return patterns
+
+    def _is_ignored(self, rel_path: str, name: str) -> bool:
+        for pattern in self.ignore_patterns:
+            if "/" in pattern:
+                if fnmatch.fnmatch(rel_path, pattern):
+                    return True
+            elif fnmatch.fnmatch(name, pattern):
+                return True
+        return False
+
+    # Building and refreshing
+    def build(self, background: bool = False):
+        """
+        Load the persisted index (if any) and bring it up to date.
+        Args:
+            background (bool): Build in a daemon thread instead of blocking the caller.
+        """
+        if background:
+            threading.Thread(target=self.build, name="friday-file-index", daemon=True).start()
+            return
+        with self._lock:
+            if not self._dirs:
+                self._load()
+            self.refresh()
+            self._built.set()
+
+    def refresh(self) -> bool:
+        """
+        Re-list only the directories whose mtime changed since the last refresh.
+        Returns:
+            bool: Whether anything changed.
+        """
+        with self._lock:
+            seen = set()
+            changed = self._refresh_dir("", seen)
+            for rel_dir in [d for d in self._dirs if d not in seen]:
+                self._drop_dir(rel_dir)
+                changed = True
+            self._last_refresh = time.monotonic()
+            if changed:
+                self._save()
+            return changed
+
+    def _refresh_dir(self, rel_dir: str, seen: Set[str]) -> bool:
+        abs_dir = self.root_dir / rel_dir if rel_dir else self.root_dir
+        try:
+            mtime = os.stat(abs_dir).st_mtime
+        except OSError:
+            return False
+        seen.add(rel_dir)
+        entry = self._dirs.get(rel_dir)
+        changed = False
+        if entry is None or entry["mtime"] != mtime:
+            # Only a different listing counts as a change; a bare mtime bump (e.g. a journal file
+            # created and removed) must not trigger a rewrite of the persisted index
+            changed = self._list_dir(rel_dir, abs_dir, mtime)
+            entry = self._dirs[rel_dir]
+        for sub_dir in entry["dirs"]:
+            changed = self._refresh_dir(f"{rel_dir}/{sub_dir}" if rel_dir else sub_dir, seen) or changed
+        return changed
+
+    def _list_dir(self, rel_dir: str, abs_dir: Path, mtime: float) -> bool:
+        files, dirs = [], []
+        try:
+            with os.scandir(abs_dir) as entries:
+                for entry in entries:
+                    rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                    if self._is_ignored(rel_path, entry.name):
+                        continue
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            dirs.append(entry.name)
+                        elif entry.is_file():
+                            files.append(entry.name)
+                    except OSError:
+                        continue
+        except OSError:
+            pass
+        files.sort()
+        dirs.sort()
+        old = self._dirs.get(rel_dir)
+        if old is not None and old["files"] == files and old["dirs"] == dirs:
+            old["mtime"] = mtime
+            return False
+        if old is not None:
+            for name in old["files"]:
+                self._unlink_name(name, f"{rel_dir}/{name}" if rel_dir else name)
+        for name in files:
+            self._names.setdefault(name, set()).add(f"{rel_dir}/{name}" if rel_dir else name)
+        self._dirs[rel_dir] = {"mtime": mtime, "files": files, "dirs": dirs}
+        return True
+
+    def _drop_dir(self, rel_dir: str):
+        entry = self._dirs.pop(rel_dir, None)
+        if entry is None:
+            return
+        for name in entry["files"]:
+            self._unlink_name(name, f"{rel_dir}/{name}" if rel_dir else name)
+
+    def _unlink_name(self, name: str, rel_path: str):
+        paths = self._names.get(name)
+        if paths is not None:
+            paths.discard(rel_path)
+            if not paths:
+                del self._names[name]
+
+    # Persistence
+    def _load(self):
+        if not self.index_path or not os.path.exists(self.index_path):
+            return
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") != INDEX_VERSION or data.get("root") != str(self.root_dir) or data.get("ignore") != self.ignore_patterns:
+            return
+        self._dirs = data.get("dirs", {})
+        self._names = {}
+        for rel_dir, entry in self._dirs.items():
+            for name in entry["files"]:
+                self._names.setdefault(name, set()).add(f"{rel_dir}/{name}" if rel_dir else name)
+
+    def _save(self):
+        if not self.index_path:
+            return
+        os.makedirs(os.path.dirname(self.index_path), exist_ok=True) if os.path.dirname(self.index_path) else None
+        data = {"version": INDEX_VERSION, "root": str(self.root_dir), "ignore": self.ignore_patterns, "dirs": self._dirs}
+        tmp_path = f"{self.index_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.index_path)
+
+    # Lookup
+    def _ensure_fresh(self):
+        if not self._built.is_set():
+            self.build()
+        elif time.monotonic() - self._last_refresh > self.refresh_interval:
+            self.refresh()
+
+    def resolve(self, file_name: str, fuzzy: bool = True) -> List[Path]:
+        """
+        Resolve a file name, relative path or glob to workspace paths, best match first.
+        Ranking: exact path, path suffix, exact name, case-insensitive name, then stem. Ties prefer shallower
+        paths. Partial names and misspellings never resolve, so a missing file is not silently swapped for
+        another one; suggest() lists them instead.
+        Args:
+            file_name (str): Name as given by the user or the model.
+            fuzzy (bool): Also try case-insensitive and stem matches.
+        Returns:
+            List[Path]: Absolute paths, best match first; empty if nothing matches.
+        """
+        if not file_name:
+            return []
+        self._ensure_fresh()
+        query = file_name.strip().replace("\\", "/")
+        matches = self._match(query, fuzzy)
+        # A file created since the last refresh (within refresh_interval) is not a miss yet
+        if not matches and self.refresh():
+            matches = self._match(query, fuzzy)
+        return [self.root_dir / rel_path for rel_path in matches]
+
+    def suggest(self, file_name: str, limit: int = 5) -> List[Path]:
+        """
+        Files whose names contain file_name or are close spellings of it, for a "did you mean" reply
+        when resolve() finds nothing.
+        Args:
+            file_name (str): Name as given by the user or the model.
+            limit (int): Maximum number of suggestions.
+        Returns:
+            List[Path]: Absolute paths, best match first.
+        """
+        if not file_name:
+            return []
+        self._ensure_fresh()
+        base = file_name.strip().replace("\\", "/").rsplit("/", 1)[-1]
+        lowered = base.lower()
+        with self._lock:
+            names = self._names
+            tiers = [
+                [n for n in names if lowered in n.lower()],
+                difflib.get_close_matches(base, list(names), n=limit, cutoff=0.8),
+            ]
+            suggestions = []
+            for tier in tiers:
+                for rel_path in self._rank(p for name in tier for p in names[name]):
+                    if rel_path not in suggestions:
+                        suggestions.append(rel_path)
+        return [self.root_dir / rel_path for rel_path in suggestions[:limit]]
+
+    def _match(self, query: str, fuzzy: bool = True) -> List[str]:
+        with self._lock:
+            names = self._names
+            candidate = Path(query)
+            if candidate.is_absolute():
+                try:
+                    query = candidate.resolve().relative_to(self.root_dir).as_posix()
+                except ValueError:
+                    return []
+            if query.startswith("./"):
+                query = query[2:]
+            base = query.rsplit("/", 1)[-1]
+            if GLOB_CHARS & set(query):
+                if "/" not in query:
+                    return self._rank(p for name in names if fnmatch.fnmatch(name, query) for p in names[name])
+                return self._rank(p for paths in names.values() for p in paths if fnmatch.fnmatch(p, query) or fnmatch.fnmatch(p, "*/" + query))
+            if "/" in query:
+                suffix = "/" + query
+                return self._rank(p for p in names.get(base, ()) if p == query or p.endswith(suffix))
+            if base in names:
+                return self._rank(names[base])
+            if not fuzzy:
+                return []
+            lowered = base.lower()
+            tiers = [
+                [n for n in names if n.lower() == lowered],
+                [n for n in names if "." not in base and n.rsplit(".", 1)[0].lower() == lowered],
+            ]
+            for tier in tiers:
+                if tier:
+                    return self._rank(p for name in tier for p in names[name])
+            return []
+
+    def files(self) -> List[str]:
+        """Relative paths of every indexed file."""
+        self._ensure_fresh()
+        with self._lock:
+            return sorted(p for paths in self._names.values() for p in paths)
+
+    @staticmethod
+    def _rank(paths: Iterable[str]) -> List[str]:
+        return sorted(set(paths), key=lambda p: (p.count("/"), len(p), p))
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                "directories": len(self._dirs),
+                "files": sum(len(entry["files"]) for entry in self._dirs.values()),
+                "names": len(self._names),
+            }
+
+
+def create_workspace_index(root_dir, workspace_config: Dict) -> WorkspaceFileIndex:
+    """
+    Build a WorkspaceFileIndex from the workspace section of ollama_config.yml.
+    """
+    return WorkspaceFileIndex(
+        root_dir,
+        index_path=workspace_config.get("index_path", "db/file_index.json"),
+        ignore_patterns=workspace_config.get("ignore", []),
+        use_gitignore=workspace_config.get("use_gitignore", True),
+        refresh_interval=workspace_config.get("refresh_interval", 2.0),
+    )
@@ -1,11 +1,14 @@
+import subprocess
+import sys
 import time
-from typing import Callable, Any, Dict, List
+from typing import Callable, Any, Dict, List, Tuple
 
-def benchmark_function(func: Callable, prompts: List[str], memory_backend, *args, **kwargs) -> List[Dict[str, Any]]:
+def benchmark_function(func: Callable, prompts: List[str], target, *args, **kwargs) -> List[Dict[str, Any]]:
+    # target is passed through to func, e.g. a client built once for all prompts
     results = []
     for prompt in prompts:
         start = time.perf_counter()
-        result = func(memory_backend, prompt, *args, **kwargs)
+        result = func(target, prompt, *args, **kwargs)
         end = time.perf_counter()
         results.append({
             'function': func.__name__,
@@ -14,3 +17,27 @@ def benchmark_function(func: Callable, prompts: List[str], memory_backend, *args
             'result': result
         })
     return results
+
+def benchmark_batch(client, prompts: List[str], concurrency: int = None, **kwargs) -> List[Dict[str, Any]]:
+    # time_taken is measured from the start of the batch until that prompt's response arrived
+    results = [None] * len(prompts)
+    start = time.perf_counter()
+    for index, result in client.handle_inputs_as_completed(prompts, concurrency=concurrency, **kwargs):
+        results[index] = {
+            'function': 'handle_inputs',
+            'prompt': prompts[index],
+            'time_taken': time.perf_counter() - start,
+            'result': result
+        }
+    return results
+
+def import_times(statement: str = "import friday.main", python: str = sys.executable) -> Dict[str, Tuple[int, int]]:
+    # Run the statement in a fresh interpreter with -X importtime; returns {module: (self us, cumulative us)}
+    result = subprocess.run([python, "-X", "importtime", "-c", statement], capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:"):].split("|")
+        times[module.strip()] = (int(self_us), int(cumulative_us))
+    return times
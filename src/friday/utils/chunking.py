@@ -0,0 +1,57 @@
+from typing import Callable, Iterator, List, Tuple
+from friday.utils.tokens import approximate_tokens
+
+
+def iter_line_chunks(file_path, max_tokens: int = 2000, count_tokens: Callable[[str], int] = approximate_tokens) -> Iterator[Tuple[int, int, str]]:
+    """
+    Stream a text file as line-aware chunks of at most max_tokens each.
+    Only the current chunk is held in memory, so peak memory does not depend on the file size.
+    A single line longer than the budget is split into several chunks.
+    Args:
+        file_path: Path to the file.
+        max_tokens (int): Token budget per chunk.
+        count_tokens (Callable[[str], int]): Token estimator.
+    Yields:
+        Tuple[int, int, str]: First line number, last line number (1-based, inclusive) and chunk text.
+    """
+    lines: List[str] = []
+    tokens = 0
+    start = 1
+    with open(file_path, "r", encoding="utf-8", errors="replace") as f:
+        for line_number, line in enumerate(f, start=1):
+            line_tokens = count_tokens(line)
+            if line_tokens > max_tokens:
+                if lines:
+                    yield start, line_number - 1, "".join(lines)
+                    lines, tokens = [], 0
+                step = max(max_tokens * len(line) // line_tokens, 1)
+                for offset in range(0, len(line), step):
+                    yield line_number, line_number, line[offset:offset + step]
+                start = line_number + 1
+                continue
+            if lines and tokens + line_tokens > max_tokens:
+                yield start, line_number - 1, "".join(lines)
+                lines, tokens, start = [], 0, line_number
+            lines.append(line)
+            tokens += line_tokens
+    if lines:
+        yield start, start + len(lines) - 1, "".join(lines)
+
+
+def group_by_budget(texts: List[str], max_tokens: int, count_tokens: Callable[[str], int] = approximate_tokens) -> List[List[str]]:
+    """
+    Split texts into consecutive groups whose combined size stays within max_tokens (each group has at least one text).
+    """
+    groups: List[List[str]] = []
+    current: List[str] = []
+    tokens = 0
+    for text in texts:
+        text_tokens = count_tokens(text)
+        if current and tokens + text_tokens > max_tokens:
+            groups.append(current)
+            current, tokens = [], 0
+        current.append(text)
+        tokens += text_tokens
+    if current:
+        groups.append(current)
+    return groups
@@ -3,19 +3,28 @@ import os
 from datetime import datetime
 
 LOG_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'logs')
-os.makedirs(LOG_DIR, exist_ok=True)
 
 def get_log_file_path():
     date_str = datetime.now().strftime('%Y-%m-%d')
     return os.path.join(LOG_DIR, f'{date_str}.log')
 
 
+class LazyFileHandler(logging.FileHandler):
+    # The log directory and file are only created once the first record is written
+    def __init__(self, filename: str, encoding: str = 'utf-8'):
+        super().__init__(filename, encoding=encoding, delay=True)
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.baseFilename), exist_ok=True)
+        return super()._open()
+
+
 def setup_logger(name: str = 'friday'):
     logger = logging.getLogger(name)
     if not logger.handlers:
         logger.setLevel(logging.INFO)
         log_file = get_log_file_path()
-        handler = logging.FileHandler(log_file, encoding='utf-8')
+        handler = LazyFileHandler(log_file, encoding='utf-8')
         formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
         handler.setFormatter(formatter)
         logger.addHandler(handler)
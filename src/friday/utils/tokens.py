@@ -0,0 +1,143 @@
+import re
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+from friday.utils.logger import setup_logger
+
+# Words, single punctuation characters and newline+indentation runs; BPE tokenizers split code roughly along these
+TOKEN_PIECE_PATTERN = re.compile(r"\w+|[^\w\s]|\n[ \t]*")
+# Chat template overhead per message (role markers, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def approximate_tokens(text: str) -> int:
+    """
+    Fast token estimate without a tokenizer. Unlike a flat 4-characters-per-token rule it counts punctuation
+    and indentation, so code-heavy text is not underestimated; long words count one token per 6 characters.
+    """
+    return sum(1 + (len(piece) - 1) // 6 for piece in TOKEN_PIECE_PATTERN.findall(text)) + 1
+
+
+class TokenCounter:
+    """
+    Counts tokens with a pluggable encoder and caches the count per text, so a message that is part of
+    every prompt in a conversation is only tokenized once.
+    """
+    def __init__(self, count_fn: Callable[[str], int] = approximate_tokens, name: str = "approximate", max_entries: int = 4096):
+        self.count_fn = count_fn
+        self.name = name
+        self.max_entries = max_entries
+        self._cache: "OrderedDict[str, int]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0}
+
+    @property
+    def exact(self) -> bool:
+        """Whether counts come from a real tokenizer rather than the approximate estimator."""
+        return self.name != "approximate"
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        with self._lock:
+            cached = self._cache.get(text)
+            if cached is not None:
+                self._cache.move_to_end(text)
+                self._stats["hits"] += 1
+                return cached
+        tokens = self.count_fn(text)
+        with self._lock:
+            self._stats["misses"] += 1
+            self._cache[text] = tokens
+            if len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return tokens
+
+    def count_message(self, message: Dict) -> int:
+        return self.count(message.get("content") or "") + MESSAGE_OVERHEAD_TOKENS
+
+    def count_messages(self, messages: List[Dict]) -> int:
+        return sum(self.count_message(message) for message in messages)
+
+    def truncate(self, text: str, max_tokens: int, marker: str = "...[truncated]") -> str:
+        """Cut text so that it fits in max_tokens, appending marker when anything was removed."""
+        tokens = self.count(text)
+        if tokens <= max_tokens:
+            return text
+        # Shrink proportionally until the prefix fits; uses the real counter, so it converges in a few steps
+        end = len(text) * max_tokens // tokens
+        while end > 0 and self.count_fn(text[:end]) > max_tokens:
+            end = end * 9 // 10
+        return text[:end] + marker
+
+    def fit_messages(self, messages: List[Dict], max_tokens: int) -> List[Dict]:
+        """
+        Keep the leading system message and as many of the most recent messages as fit in max_tokens.
+        The newest message is always kept, even if it exceeds the budget on its own.
+        """
+        if not messages:
+            return []
+        head = [messages[0]] if messages[0]["role"] == "system" else []
+        budget = max_tokens - self.count_messages(head)
+        kept = []
+        for message in reversed(messages[len(head):]):
+            tokens = self.count_message(message)
+            if kept and tokens > budget:
+                break
+            kept.append(message)
+            budget -= tokens
+        return head + kept[::-1]
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._cache)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        stats["counter"] = self.name
+        return stats
+
+
+def _tiktoken_count_fn(encoding_name: str) -> Callable[[str], int]:
+    import tiktoken
+    encoding = tiktoken.get_encoding(encoding_name)
+    return lambda text: len(encoding.encode(text, disallowed_special=()))
+
+
+def _huggingface_count_fn(tokenizer_name: str) -> Callable[[str], int]:
+    from tokenizers import Tokenizer
+    if tokenizer_name.endswith(".json"):
+        tokenizer = Tokenizer.from_file(tokenizer_name)
+    else:
+        tokenizer = Tokenizer.from_pretrained(tokenizer_name)
+    return lambda text: len(tokenizer.encode(text, add_special_tokens=False).ids)
+
+
+TOKENIZER_BACKENDS = {
+    "tiktoken": _tiktoken_count_fn,
+    "huggingface": _huggingface_count_fn,
+}
+
+
+def create_token_counter(cfg: Optional[Dict] = None) -> TokenCounter:
+    """
+    Build a token counter from the `tokens` section of ollama_config.yml.
+    `counter` is "approximate", "tiktoken:<encoding>" or "huggingface:<tokenizer name or tokenizer.json path>".
+    Exact tokenizers are optional dependencies; when one cannot be loaded the approximate estimator is used.
+    """
+    cfg = cfg or {}
+    spec = cfg.get("counter", "approximate")
+    max_entries = cfg.get("cache_entries", 4096)
+    backend, _, argument = spec.partition(":")
+    if backend in TOKENIZER_BACKENDS:
+        try:
+            return TokenCounter(TOKENIZER_BACKENDS[backend](argument), name=spec, max_entries=max_entries)
+        except Exception as e:
+            setup_logger('friday').warning(f"Tokenizer {spec!r} unavailable ({e}), using the approximate token estimator")
+    elif backend != "approximate":
+        raise ValueError(f"Unknown token counter {spec!r}, expected 'approximate' or one of {list(TOKENIZER_BACKENDS)} with an argument")
+    return TokenCounter(name="approximate", max_entries=max_entries)
+
+
+# Shared by memory backends that are created without an explicit counter
+default_token_counter = TokenCounter()
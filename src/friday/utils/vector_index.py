@@ -0,0 +1,128 @@
+import json
+import os
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+
+
+class VectorIndex:
+    """
+    Bounded in-memory index of unit-normalized vectors in one NumPy matrix, searched by cosine similarity.
+
+    Queries are scored against every row with a single matrix product, so a batch of questions costs one
+    (queries x dim) @ (dim x entries) multiplication. When the index is full, the least recently used row
+    is overwritten in place.
+    """
+    def __init__(self, max_entries: int = 1000):
+        self.max_entries = max_entries
+        self._matrix: Optional[np.ndarray] = None
+        self._last_used = np.zeros(0, dtype=np.int64)
+        self._groups = np.zeros(0, dtype=np.int64)
+        self._values: List[Dict] = []
+        self._group_ids: Dict[str, int] = {}
+        self._clock = 0
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._values)
+
+    @staticmethod
+    def normalize(vectors: Sequence[Sequence[float]]) -> np.ndarray:
+        matrix = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.where(norms == 0, 1, norms)
+
+    def _group(self, name: str) -> int:
+        return self._group_ids.setdefault(name, len(self._group_ids))
+
+    def add(self, vector: Sequence[float], value: Dict, group: str = ""):
+        """Store value under vector; only queries of the same group (e.g. the model name) can match it."""
+        row = self.normalize(vector)[0]
+        with self._lock:
+            self._clock += 1
+            size = len(self._values)
+            if self._matrix is not None and row.shape[0] != self._matrix.shape[1]:
+                raise ValueError(f"Vector has {row.shape[0]} dimensions, the index holds {self._matrix.shape[1]}")
+            if size < self.max_entries:
+                if self._matrix is None or size == len(self._matrix):
+                    self._grow(min(max(2 * size, 16), self.max_entries), row.shape[0])
+                index = size
+                self._values.append(value)
+            else:
+                index = int(np.argmin(self._last_used))
+                self._values[index] = value
+                self.evictions += 1
+            self._matrix[index] = row
+            self._last_used[index] = self._clock
+            self._groups[index] = self._group(group)
+
+    def _grow(self, capacity: int, dim: int):
+        # Capacity doubles, so adding n vectors copies O(n) rows in total
+        size = len(self._values)
+        matrix = np.empty((capacity, dim), dtype=np.float32)
+        last_used = np.zeros(capacity, dtype=np.int64)
+        groups = np.full(capacity, -1, dtype=np.int64)
+        if self._matrix is not None:
+            matrix[:size], last_used[:size], groups[:size] = self._matrix[:size], self._last_used[:size], self._groups[:size]
+        self._matrix, self._last_used, self._groups = matrix, last_used, groups
+
+    def search(self, vectors: Sequence[Sequence[float]], k: int = 1, group: str = "") -> List[List[Tuple[float, int, Dict]]]:
+        """
+        Top-k (similarity, row, value) triples for each query vector, best first.
+        Args:
+            vectors: One query vector or a batch of them.
+            k (int): Results per query.
+            group (str): Only entries added with this group are considered.
+        """
+        queries = self.normalize(vectors)
+        with self._lock:
+            size = len(self._values)
+            if not size or queries.shape[1] != self._matrix.shape[1]:
+                return [[] for _ in range(len(queries))]
+            scores = queries @ self._matrix[:size].T
+            scores[:, self._groups[:size] != self._group_ids.get(group, -1)] = -np.inf
+            k = min(k, scores.shape[1])
+            # argpartition finds the k best in linear time; only those k are sorted
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            results = []
+            for query_index, candidates in enumerate(top):
+                ranked = candidates[np.argsort(-scores[query_index, candidates])]
+                hits = [(float(scores[query_index, i]), int(i), self._values[i]) for i in ranked if np.isfinite(scores[query_index, i])]
+                results.append(hits)
+            return results
+
+    def touch(self, row: int):
+        """Mark a row returned by search as used, so eviction keeps it."""
+        with self._lock:
+            if row < len(self._values):
+                self._clock += 1
+                self._last_used[row] = self._clock
+
+    def save(self, path: str):
+        with self._lock:
+            if self._matrix is None:
+                return
+            os.makedirs(os.path.dirname(path), exist_ok=True) if os.path.dirname(path) else None
+            groups = sorted(self._group_ids, key=self._group_ids.get)
+            tmp_path = path + ".tmp.npz"
+            size = len(self._values)
+            np.savez(tmp_path, matrix=self._matrix[:size], last_used=self._last_used[:size], groups=self._groups[:size],
+                     meta=np.array(json.dumps({"values": self._values, "groups": groups})))
+        # Replaced atomically so a crash while saving never leaves a truncated index
+        os.replace(tmp_path, path)
+
+    def load(self, path: str) -> bool:
+        if not os.path.exists(path):
+            return False
+        with np.load(path) as data:
+            meta = json.loads(str(data["meta"]))
+            with self._lock:
+                keep = np.argsort(-data["last_used"])[:self.max_entries]
+                self._matrix = data["matrix"][keep]
+                self._last_used = data["last_used"][keep]
+                self._groups = data["groups"][keep]
+                self._values = [meta["values"][i] for i in keep]
+                self._group_ids = {name: i for i, name in enumerate(meta["groups"])}
+                self._clock = int(self._last_used.max()) if len(keep) else 0
+        return True
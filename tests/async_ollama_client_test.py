@@ -0,0 +1,73 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+import asyncio
+import json
+import httpx
+from friday.llm_integration.async_ollama_client import AsyncOllamaClient
+from friday.memory.in_memory_conversation_memory import InMemoryConversationMemory
+
+
+def chat_handler(request):
+    payload = json.loads(request.content)
+    last = payload["messages"][-1]["content"]
+    if last.endswith("Respond ONLY with JSON."):
+        content = json.dumps({"action": "generate_action", "question": last.split("\n")[0]})
+    else:
+        content = f"Answer to {last}"
+    if payload["stream"]:
+        lines = [
+            json.dumps({"message": {"role": "assistant", "content": content}, "done": False}),
+            json.dumps({"message": {"role": "assistant", "content": ""}, "done": True}),
+        ]
+        return httpx.Response(200, content="\n".join(lines).encode())
+    return httpx.Response(200, json={"message": {"role": "assistant", "content": content}})
+
+
+def make_client(http_client):
+    client = AsyncOllamaClient(memory=InMemoryConversationMemory(), http_client=http_client)
+    client.backoff_factor = 0
+    return client
+
+
+def test_handle_input_many_sessions():
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(chat_handler)) as http_client:
+            clients = [make_client(http_client) for _ in range(50)]
+            responses = await asyncio.gather(*(c.handle_input(f"question {i}") for i, c in enumerate(clients)))
+            messages = await clients[7].get_context_messages()
+            return responses, messages
+    responses, messages = asyncio.run(run())
+    assert responses == [f"Answer to question {i}" for i in range(50)]
+    assert messages[-1]["content"] == "Answer to question 7"
+    assert messages[-1]["metadata"] == {"action": "generate_action"}
+
+
+def test_handle_input_stream():
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(chat_handler)) as http_client:
+            client = make_client(http_client)
+            tokens = [token async for token in client.handle_input_stream("What is Python?")]
+            return tokens, client.get_stats()
+    tokens, stats = asyncio.run(run())
+    assert "".join(tokens) == "Answer to What is Python?"
+    assert stats["streamed_requests"] == 1
+
+
+def test_post_chat_retries_retryable_status():
+    attempts = []
+
+    def flaky(request):
+        attempts.append(request)
+        if len(attempts) == 1:
+            return httpx.Response(503)
+        return chat_handler(request)
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(flaky)) as http_client:
+            client = make_client(http_client)
+            return await client.generate_natural_response("ping"), client.get_stats()
+    response, stats = asyncio.run(run())
+    assert response == "Answer to ping"
+    assert stats["retries"] == 1
+    assert stats["errors"] == 0
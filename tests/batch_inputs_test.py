@@ -0,0 +1,98 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+import asyncio
+import json
+import threading
+import time
+import httpx
+import pytest
+import requests
+from unittest.mock import patch, MagicMock
+from friday.llm_integration.async_ollama_client import AsyncOllamaClient
+from friday.llm_integration.ollama_client import OllamaClient
+from friday.memory.in_memory_conversation_memory import InMemoryConversationMemory
+
+
+def answer_for(payload):
+    last = payload["messages"][-1]["content"]
+    if last.endswith("Respond ONLY with JSON."):
+        return json.dumps({"action": "generate_action", "question": last.split("\n")[0]})
+    # Every prompt must be answered from its own conversation only
+    assert sum(m["role"] == "user" for m in payload["messages"]) == 1
+    return f"Answer to {last}"
+
+
+@pytest.fixture
+def client():
+    return OllamaClient(memory=InMemoryConversationMemory(), cache=None, local_router=False)
+
+
+def test_handle_inputs_ordered_isolated_and_bounded(client):
+    in_flight = []
+    peak = []
+    lock = threading.Lock()
+
+    def mock_post(*args, **kwargs):
+        with lock:
+            in_flight.append(1)
+            peak.append(len(in_flight))
+        time.sleep(0.01)
+        with lock:
+            in_flight.pop()
+        mock_resp = MagicMock()
+        mock_resp.json.return_value = {"message": {"role": "assistant", "content": answer_for(kwargs["json"])}}
+        return mock_resp
+
+    prompts = [f"question {i}" for i in range(12)]
+    with patch("requests.Session.post", side_effect=mock_post):
+        responses = client.handle_inputs(prompts, concurrency=3)
+    assert responses == [f"Answer to question {i}" for i in range(12)]
+    assert max(peak) <= 3
+    assert [m["role"] for m in client.get_context_messages()] == ["system"]
+    assert client.get_stats()["requests"] == 24
+
+
+def test_handle_inputs_as_completed_yields_fast_prompts_first(client):
+    def mock_post(*args, **kwargs):
+        content = answer_for(kwargs["json"])
+        if content == "Answer to slow":
+            time.sleep(0.2)
+        mock_resp = MagicMock()
+        mock_resp.json.return_value = {"message": {"role": "assistant", "content": content}}
+        return mock_resp
+
+    with patch("requests.Session.post", side_effect=mock_post):
+        results = list(client.handle_inputs_as_completed(["slow", "fast"], concurrency=2))
+    assert results == [(1, "Answer to fast"), (0, "Answer to slow")]
+
+
+def test_handle_inputs_return_exceptions(client):
+    def mock_post(*args, **kwargs):
+        if "broken" in kwargs["json"]["messages"][-1]["content"]:
+            raise requests.ConnectionError("refused")
+        mock_resp = MagicMock()
+        mock_resp.json.return_value = {"message": {"role": "assistant", "content": answer_for(kwargs["json"])}}
+        return mock_resp
+
+    with patch("requests.Session.post", side_effect=mock_post):
+        responses = client.handle_inputs(["ok", "broken"], return_exceptions=True)
+        assert responses[0] == "Answer to ok"
+        assert isinstance(responses[1], requests.ConnectionError)
+        with pytest.raises(requests.ConnectionError):
+            client.handle_inputs(["ok", "broken"])
+
+
+def test_async_handle_inputs():
+    def chat_handler(request):
+        payload = json.loads(request.content)
+        return httpx.Response(200, json={"message": {"role": "assistant", "content": answer_for(payload)}})
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(chat_handler)) as http_client:
+            client = AsyncOllamaClient(memory=InMemoryConversationMemory(), http_client=http_client, cache=None, local_router=False)
+            responses = await client.handle_inputs([f"question {i}" for i in range(20)], concurrency=5)
+            return responses, await client.get_context_messages()
+    responses, messages = asyncio.run(run())
+    assert responses == [f"Answer to question {i}" for i in range(20)]
+    assert [m["role"] for m in messages] == ["system"]
@@ -0,0 +1,60 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from unittest.mock import patch, MagicMock
+from friday.llm_integration.ollama_client import OllamaClient
+from friday.memory.in_memory_conversation_memory import InMemoryConversationMemory
+from friday.utils.chunking import iter_line_chunks, group_by_budget
+from friday.utils.tokens import approximate_tokens
+
+
+def test_iter_line_chunks_respects_budget_and_lines(tmp_path):
+    file_path = tmp_path / "big.py"
+    file_path.write_text("".join(f"line {i:04d} of the file\n" for i in range(1, 201)))
+    chunks = list(iter_line_chunks(file_path, max_tokens=60))
+    assert chunks[0][0] == 1
+    assert chunks[-1][1] == 200
+    for (start, end, text), (next_start, _, _) in zip(chunks, chunks[1:]):
+        assert next_start == end + 1
+        assert approximate_tokens(text) <= 60 + 1
+    assert "".join(text for _, _, text in chunks) == file_path.read_text()
+
+
+def test_iter_line_chunks_splits_overlong_lines(tmp_path):
+    file_path = tmp_path / "minified.js"
+    file_path.write_text("x" * 1000 + "\nshort\n")
+    chunks = list(iter_line_chunks(file_path, max_tokens=50))
+    assert all(start == end == 1 for start, end, _ in chunks[:-1])
+    assert chunks[-1] == (2, 2, "short\n")
+
+
+def test_group_by_budget_keeps_order():
+    groups = group_by_budget(["a" * 40, "b" * 40, "c" * 40], max_tokens=20)
+    assert groups == [["a" * 40, "b" * 40], ["c" * 40]]
+
+
+def test_read_file_map_reduce(tmp_path):
+    file_path = tmp_path / "big.py"
+    file_path.write_text("".join(f"def f{i}(): pass\n" for i in range(400)))
+    client = OllamaClient(memory=InMemoryConversationMemory())
+    client.chunk_threshold_bytes = 1000
+    client.chunk_tokens = 500
+    calls = []
+
+    def mock_post(*args, **kwargs):
+        messages = kwargs["json"]["messages"]
+        calls.append(messages[0]["content"])
+        mock_resp = MagicMock()
+        if messages[-1]["content"].startswith("Partial answers"):
+            content = "final answer"
+        else:
+            content = "defines functions"
+        mock_resp.json.return_value = {"message": {"role": "assistant", "content": content}}
+        return mock_resp
+
+    with patch("requests.Session.post", side_effect=mock_post):
+        response = client.read_file("What does this define?", file_path)
+    assert response == "final answer"
+    map_calls = [c for c in calls if "given one section" in c]
+    assert len(map_calls) > 1
+    assert len(calls) == len(map_calls) + 1
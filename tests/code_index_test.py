@@ -0,0 +1,131 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+import os
+import textwrap
+from unittest.mock import patch, MagicMock
+from friday.llm_integration.ollama_client import OllamaClient
+from friday.memory.in_memory_conversation_memory import InMemoryConversationMemory
+from friday.tooling.code_index import CodeIndex, extract_symbols, mentioned_names
+from friday.tooling.workspace_index import WorkspaceFileIndex
+
+CLI = textwrap.dedent('''
+    import sys
+
+
+    def parse_args(argv):
+        return argv[1:]
+
+
+    def driver():
+        args = parse_args(sys.argv)
+        return Runner(args).run()
+
+
+    class Runner:
+        def __init__(self, args):
+            self.args = args
+
+        @property
+        def verbose(self):
+            return "-v" in self.args
+
+        def run(self):
+            return self._step() if self.verbose else None
+
+        def _step(self):
+            return len(self.args)
+''') + "".join(f"\n\ndef unrelated_{i}(value):\n    total = value * {i}\n    for n in range(value):\n        total += n\n    return total\n" for i in range(40))
+
+
+def make_index(tmp_path, **kwargs):
+    return CodeIndex(WorkspaceFileIndex(tmp_path, index_path=None, use_gitignore=False), **kwargs)
+
+
+def test_python_symbols_have_spans_and_references(tmp_path):
+    path = tmp_path / "cli.py"
+    path.write_text(CLI)
+    symbols = {symbol["qualname"]: symbol for symbol in extract_symbols(str(path))}
+    assert symbols["driver"]["kind"] == "function" and "parse_args" in symbols["driver"]["refs"]
+    assert symbols["Runner"]["kind"] == "class" and symbols["Runner.run"]["kind"] == "method"
+    # The decorator line belongs to the property
+    lines = CLI.splitlines()
+    assert lines[symbols["Runner.verbose"]["start"] - 1].strip() == "@property"
+    assert lines[symbols["Runner._step"]["end"] - 1].strip() == "return len(self.args)"
+
+    (tmp_path / "broken.py").write_text("def broken(:\n    pass\n")
+    assert extract_symbols(str(tmp_path / "broken.py"))[0]["kind"] == "chunk"
+    (tmp_path / "blob.bin").write_bytes(b"\0\1\2")
+    assert extract_symbols(str(tmp_path / "blob.bin")) is None
+
+
+def test_excerpt_holds_named_symbol_and_its_dependencies(tmp_path):
+    path = tmp_path / "cli.py"
+    path.write_text(CLI)
+    index = make_index(tmp_path, index_path=None)
+    excerpt = index.excerpt(path, "Explain the driver() function.")
+    assert excerpt["symbols"][0] == "driver"
+    assert {"parse_args", "Runner"} <= set(excerpt["symbols"])
+    assert "def driver():" in excerpt["content"] and "def parse_args(argv):" in excerpt["content"]
+    assert "unrelated_" not in excerpt["content"]
+    assert excerpt["tokens"] * 5 < excerpt["file_tokens"]
+
+    # A method pulls in the methods of its own class that it calls
+    excerpt = index.excerpt(path, "What does Runner.run do?")
+    assert set(excerpt["symbols"]) == {"Runner.run", "Runner.verbose", "Runner._step"}
+    assert index.excerpt(path, "What does this file do?") is None
+    assert index.excerpt(path, "Explain the missing_function() helper") is None
+
+
+def test_line_chunk_fallback(tmp_path):
+    path = tmp_path / "server.js"
+    path.write_text("".join(f"function handler{i}(req) {{\n  return req.body + {i};\n}}\n\n" for i in range(300)))
+    index = make_index(tmp_path, index_path=None, chunk_tokens=100)
+    excerpt = index.excerpt(path, "Why does handler250() return a string?")
+    assert "function handler250(req)" in excerpt["content"] and "handler10(" not in excerpt["content"]
+
+
+def test_incremental_parallel_build_and_persistence(tmp_path):
+    for i in range(6):
+        (tmp_path / f"module_{i}.py").write_text(f"def function_{i}():\n    return {i}\n")
+    index_path = str(tmp_path / "db" / "code_index.json")
+    index = make_index(tmp_path, index_path=index_path, workers=2, parallel_threshold=2)
+    index.build()
+    stats = index.get_stats()
+    assert stats["files"] == 6 and stats["symbols"] == 6 and stats["parsed"] == 6
+
+    index.build()
+    assert index.get_stats()["parsed"] == 6
+    path = tmp_path / "module_0.py"
+    path.write_text("def function_0():\n    return 0\n\n\ndef extra():\n    return 1\n")
+    os.utime(path, ns=(1, 1))
+    assert [symbol["name"] for symbol in index.symbols(path)] == ["function_0", "extra"]
+    assert index.get_stats()["parsed"] == 7
+    os.remove(tmp_path / "module_5.py")
+    index.file_index.refresh()
+    index.build()
+    assert index.get_stats()["files"] == 5
+
+    warm = make_index(tmp_path, index_path=index_path)
+    warm.build()
+    assert warm.get_stats()["parsed"] == 0 and warm.get_stats()["symbols"] == 6
+
+
+def test_read_file_sends_only_relevant_symbols(tmp_path):
+    (tmp_path / "cli.py").write_text(CLI)
+    file_index = WorkspaceFileIndex(tmp_path, index_path=None, use_gitignore=False)
+    client = OllamaClient(memory=InMemoryConversationMemory(), cache=None, file_index=file_index, config_overrides={"code_index": {"index_path": None}})
+    payloads = []
+
+    def mock_post(*args, **kwargs):
+        payloads.append(kwargs["json"])
+        mock_resp = MagicMock()
+        mock_resp.json.return_value = {"message": {"role": "assistant", "content": "driver parses arguments and runs the Runner."}}
+        return mock_resp
+
+    with patch("requests.Session.post", side_effect=mock_post):
+        client.read_file("Explain the driver() function.", tmp_path / "cli.py", bypass_cache=True)
+    prompt = payloads[-1]["messages"][-1]["content"]
+    assert "def driver():" in prompt and "unrelated_3" not in prompt
+    assert client.get_stats()["code_index"]["excerpts"] == 1
+    assert mentioned_names("Compare `Runner` with parse_args and the main function") >= {"Runner", "parse_args", "main"}
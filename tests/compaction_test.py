@@ -0,0 +1,122 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+import asyncio
+import json
+import time
+import httpx
+from unittest.mock import patch, MagicMock
+from friday.llm_integration.async_ollama_client import AsyncOllamaClient
+from friday.llm_integration.ollama_client import OllamaClient
+from friday.memory.hybrid_conversation_memory import HybridConversationMemory
+from friday.memory.in_memory_conversation_memory import InMemoryConversationMemory
+from friday.memory.sqlite_conversation_memory import SqliteConversationMemory
+from friday.prompts import COMPACTION_SYSTEM_PROMPT
+
+OVERRIDES = {"compaction": {"enabled": True, "keep_recent": 2, "batch": 4}}
+
+
+def reply(messages, summaries):
+    if messages[0]["content"] == COMPACTION_SYSTEM_PROMPT:
+        summaries.append(messages[-1]["content"])
+        return f"summary {len(summaries)}"
+    if messages[-1]["content"].endswith("Respond ONLY with JSON."):
+        return json.dumps({"action": "generate_action", "question": messages[-1]["content"]})
+    return "answer"
+
+
+def run_turns(client, count, summaries):
+    payloads = []
+
+    def mock_post(*args, **kwargs):
+        payloads.append(kwargs["json"])
+        mock_resp = MagicMock()
+        mock_resp.json.return_value = {"message": {"role": "assistant", "content": reply(kwargs["json"]["messages"], summaries)}}
+        return mock_resp
+
+    with patch("requests.Session.post", side_effect=mock_post):
+        for i in range(count):
+            client.handle_input(f"question {i}", bypass_cache=True)
+            wait_for_compaction(client)
+    return payloads
+
+
+def wait_for_compaction(client, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while client._compacting and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_evicted_turns_are_folded_into_the_summary():
+    memory = InMemoryConversationMemory(max_context_messages=5)
+    client = OllamaClient(memory=memory, cache=None, local_router=False, config_overrides=OVERRIDES)
+    summaries = []
+    payloads = run_turns(client, 8, summaries)
+    assert summaries and "USER: question 0" in summaries[0]
+    summary = memory.get_running_summary()
+    assert summary["content"] == f"summary {len(summaries)}"
+    assert all(msg["timestamp"] > summary["through"] for msg in memory.get_evicted())
+    # The last answer call carries the summary instead of the turns it covers, and stays small
+    answer = [p for p in payloads if p["messages"][0]["content"] != COMPACTION_SYSTEM_PROMPT][-1]["messages"]
+    assert "Summary of the earlier conversation:\nsummary" in answer[0]["content"]
+    assert "question 0" not in json.dumps(answer[1:])
+    assert len(answer) <= 6
+    stats = client.get_stats()
+    assert stats["compactions"] == len(summaries) and stats["compaction_errors"] == 0
+
+
+def test_sqlite_summary_persists_and_bounds_the_prompt(tmp_path):
+    db_path = str(tmp_path / "memory.db")
+    memory = SqliteConversationMemory(db_path=db_path)
+    client = OllamaClient(memory=memory, cache=None, local_router=False, config_overrides=OVERRIDES)
+    summaries = []
+    payloads = run_turns(client, 8, summaries)
+    answers = [p["messages"] for p in payloads if p["messages"][0]["content"] != COMPACTION_SYSTEM_PROMPT and not p["messages"][-1]["content"].endswith("JSON.")]
+    # Without compaction the full history would be sent; with it the prompt stops growing
+    assert len(answers[-1]) <= 2 + OVERRIDES["compaction"]["keep_recent"] + OVERRIDES["compaction"]["batch"]
+
+    reopened = SqliteConversationMemory(session_id=memory.session_id, db_path=db_path)
+    assert reopened.get_running_summary() == memory.get_running_summary()
+    assert reopened.get_running_summary()["content"].startswith("summary")
+    reopened.clear()
+    assert memory.get_running_summary() == {"content": "", "through": None}
+
+
+def test_pending_waits_for_a_batch(tmp_path):
+    client = OllamaClient(memory=InMemoryConversationMemory(), cache=None, local_router=False, config_overrides=OVERRIDES)
+    history = [{"role": "user" if i % 2 == 0 else "assistant", "content": f"m{i}", "timestamp": f"2026-01-01T00:00:{i:02d}"} for i in range(5)]
+    empty = {"content": "", "through": None}
+    assert client._compaction_pending(empty, history, []) == []
+    evicted = [{"role": "user", "content": "old", "timestamp": "2025-12-31T23:59:59"}]
+    pending = client._compaction_pending(empty, history, evicted)
+    assert [msg["content"] for msg in pending] == ["old", "m0", "m1", "m2"]
+    assert client._compaction_pending({"content": "s", "through": history[1]["timestamp"]}, history, []) == []
+
+    memory = HybridConversationMemory(max_context_messages=3, db_path=str(tmp_path / "hybrid.db"))
+    for i in range(4):
+        memory.add_to_history("user", f"turn {i}")
+    evicted = memory.get_evicted()
+    assert [msg["content"] for msg in evicted] == ["turn 0", "turn 1"]
+    memory.set_running_summary("turn 0 happened", evicted[0]["timestamp"])
+    assert [msg["content"] for msg in memory.get_evicted()] == ["turn 1"]
+
+
+def test_async_client_compacts_in_background():
+    summaries = []
+
+    async def handler(request):
+        payload = json.loads(request.content)
+        return httpx.Response(200, json={"message": {"role": "assistant", "content": reply(payload["messages"], summaries)}})
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as http_client:
+            client = AsyncOllamaClient(memory=InMemoryConversationMemory(max_context_messages=5), http_client=http_client, cache=None, local_router=False, config_overrides=OVERRIDES)
+            for i in range(6):
+                await client.handle_input(f"question {i}", bypass_cache=True)
+                await asyncio.gather(*client._compaction_tasks)
+            summary = await client.memory.get_running_summary()
+            await client.aclose()
+            return summary, client.get_stats()
+
+    summary, stats = asyncio.run(run())
+    assert summary["content"] == f"summary {len(summaries)}" and stats["compactions"] >= 1
@@ -0,0 +1,84 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+import pytest
+from unittest.mock import patch
+from friday.config.settings import ConfigError, env_overrides, get_config, reload_config
+from friday.llm_integration.ollama_client import OllamaClient
+from friday.memory.in_memory_conversation_memory import InMemoryConversationMemory
+
+@pytest.fixture
+def restore_config(monkeypatch):
+    yield monkeypatch
+    monkeypatch.undo()
+    reload_config()
+
+
+def test_config_is_parsed_once():
+    get_config()
+    with patch("yaml.safe_load", side_effect=AssertionError("config re-parsed")):
+        client = OllamaClient(memory=InMemoryConversationMemory(), local_router=False)
+        OllamaClient(memory=InMemoryConversationMemory(), local_router=False)
+    assert client.model == get_config()["client"]["model"]
+
+
+def test_get_config_returns_copies():
+    get_config()["client"]["model"] = "changed"
+    assert get_config()["client"]["model"] != "changed"
+
+
+def test_environment_overrides(restore_config, tmp_path):
+    restore_config.chdir(tmp_path)
+    (tmp_path / ".env").write_text("FRIDAY_CLIENT_MODEL=from-dotenv\nFRIDAY_HTTP_POOL_MAXSIZE=2\n")
+    restore_config.setenv("OLLAMA_HOST", "gpu-box:11434")
+    restore_config.setenv("FRIDAY_HTTP_POOL_MAXSIZE", "32")
+    restore_config.setenv("FRIDAY_RUNTIME_NUM_CTX_BUCKETS", "[4096, 8192]")
+    data = reload_config()
+    assert data["client"]["base_endpoint"] == "http://gpu-box:11434"
+    assert data["client"]["model"] == "from-dotenv"
+    assert data["http"]["pool_maxsize"] == 32
+    assert data["runtime"]["num_ctx_buckets"] == [4096, 8192]
+
+
+def test_constructor_overrides():
+    client = OllamaClient(memory=InMemoryConversationMemory(), local_router=False, config_overrides={
+        "client": {"model": "llama3.1:8b", "base_endpoint": "http://10.0.0.5:11434"},
+        "http": {"read_timeout": 42},
+    })
+    assert client.model == "llama3.1:8b"
+    assert client.endpoint == "http://10.0.0.5:11434/api/chat"
+    assert client.timeout[1] == 42
+    assert get_config()["client"]["model"] != "llama3.1:8b"
+
+
+def test_invalid_settings_are_reported_together():
+    with pytest.raises(ConfigError) as excinfo:
+        get_config({"client": {"base_endpoint": "localhost"}, "http": {"pool_maxsize": 0}, "router": {"mode": "xml"}})
+    message = str(excinfo.value)
+    assert "client.base_endpoint" in message and "http.pool_maxsize" in message and "router.mode" in message
+
+
+def test_env_overrides_ignore_unrelated_variables():
+    assert env_overrides({"FRIDAY": "1", "PATH": "/usr/bin", "FRIDAY_CACHE_ENABLED": "false"}) == {"cache": {"enabled": False}}
+
+
+def test_env_overrides_match_underscored_sections():
+    environ = {
+        "FRIDAY_SEMANTIC_CACHE_THRESHOLD": "0.9",
+        "FRIDAY_WRITE_BEHIND_ENABLED": "true",
+        "FRIDAY_CODE_INDEX_INDEX_PATH": "/tmp/code_index.json",
+        "FRIDAY_HTTP_READ_TIMEOUT": "60",
+    }
+    assert env_overrides(environ) == {
+        "semantic_cache": {"threshold": 0.9},
+        "write_behind": {"enabled": True},
+        "code_index": {"index_path": "/tmp/code_index.json"},
+        "http": {"read_timeout": 60},
+    }
+
+
+def test_env_overrides_skip_unknown_settings():
+    with patch("friday.config.settings.setup_logger") as setup_logger:
+        assert env_overrides({"FRIDAY_SEMANTIC_THRESHOLD": "0.9", "FRIDAY_HTTP_READTIMEOUT": "60"}) == {}
+    warnings = [call.args[0] for call in setup_logger.return_value.warning.call_args_list]
+    assert len(warnings) == 2 and "FRIDAY_SEMANTIC_THRESHOLD" in warnings[0]
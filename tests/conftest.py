@@ -0,0 +1,44 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+import logging
+import pytest
+from friday.config.settings import reload_config
+from friday.utils import logger as friday_logger
+
+
+@pytest.fixture(autouse=True, scope="session")
+def index_paths(tmp_path_factory):
+    # Clients index the working directory; keep their persisted indexes out of the repository's db/
+    index_dir = tmp_path_factory.mktemp("indexes")
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setenv("FRIDAY_WORKSPACE_INDEX_PATH", str(index_dir / "file_index.json"))
+        monkeypatch.setenv("FRIDAY_CODE_INDEX_INDEX_PATH", str(index_dir / "code_index.json"))
+        reload_config()
+        yield index_dir
+    reload_config()
+
+
+@pytest.fixture(autouse=True, scope="session")
+def log_dir(tmp_path_factory):
+    # The 'friday' logger may already be set up while tests are collected: reopen it under a temporary log directory
+    log_dir = tmp_path_factory.mktemp("logs")
+    logger = logging.getLogger('friday')
+
+    def drop_handlers():
+        for handler in logger.handlers[:]:
+            logger.removeHandler(handler)
+            handler.close()
+
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(friday_logger, "LOG_DIR", str(log_dir))
+        drop_handlers()
+        friday_logger.setup_logger('friday')
+        yield log_dir
+        drop_handlers()
+
+
+@pytest.fixture
+def conversation_db(tmp_path):
+    """Database for memories that would otherwise use the default db/conversation_memory.db."""
+    return str(tmp_path / "conversation_memory.db")
@@ -0,0 +1,195 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+import asyncio
+import json
+import threading
+import time
+import pytest
+import httpx
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from friday.llm_integration.async_ollama_client import AsyncOllamaClient
+from friday.llm_integration.endpoint_pool import EndpointPool
+from friday.llm_integration.ollama_client import OllamaClient
+from friday.memory.in_memory_conversation_memory import InMemoryConversationMemory
+
+MODEL = "qwen2.5-coder:7b"
+
+
+class ReplicaHandler(BaseHTTPRequestHandler):
+    """Stand-in Ollama replica; behaviour is set on the server object."""
+    protocol_version = "HTTP/1.1"
+
+    def _reply(self, data, status=200):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/api/tags":
+            self._reply({"models": [{"name": name} for name in self.server.available]})
+        else:
+            self._reply({"models": [{"name": name} for name in self.server.loaded]})
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        self.server.hits += 1
+        time.sleep(self.server.delay)
+        if self.server.status != 200:
+            self._reply({"error": f"model '{MODEL}' not found"}, self.server.status)
+            return
+        self._reply({"message": {"role": "assistant", "content": self.server.name}})
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def replicas():
+    servers = []
+
+    def start(name, delay=0.0, loaded=(), available=(MODEL,), status=200):
+        httpd = ThreadingHTTPServer(("127.0.0.1", 0), ReplicaHandler)
+        httpd.daemon_threads = True
+        httpd.name, httpd.delay, httpd.hits, httpd.status = name, delay, 0, status
+        httpd.loaded, httpd.available = list(loaded), list(available)
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        servers.append(httpd)
+        return httpd, f"http://127.0.0.1:{httpd.server_address[1]}"
+
+    yield start
+    for httpd in servers:
+        httpd.shutdown()
+        httpd.server_close()
+
+
+def send_with(session):
+    def send(url):
+        response = session.post(url, json={"model": MODEL}, timeout=5)
+        response.raise_for_status()
+        return response.json()["message"]["content"]
+    return send
+
+
+def test_least_outstanding_spreads_concurrent_requests(replicas):
+    a, url_a = replicas("a", delay=0.2, loaded=[MODEL])
+    b, url_b = replicas("b", delay=0.2, loaded=[MODEL])
+    pool = EndpointPool([url_a, url_b], health_interval=0)
+    pool.check_health()
+    send = send_with(requests.Session())
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        answers = list(executor.map(lambda _: pool.post(send, MODEL), range(4)))
+    assert sorted(answers) == ["a", "a", "b", "b"]
+    assert all(e["outstanding"] == 0 for e in pool.get_stats()["endpoints"])
+
+
+def test_affinity_prefers_replica_with_model_loaded(replicas):
+    a, url_a = replicas("a")
+    b, url_b = replicas("b", loaded=[MODEL])
+    c, url_c = replicas("c", loaded=[MODEL], available=["llama3:latest"])
+    pool = EndpointPool([url_a, url_b, url_c], health_interval=0)
+    pool.check_health()
+    send = send_with(requests.Session())
+    assert {pool.post(send, MODEL) for _ in range(5)} == {"b"}
+    # c reports the model as loaded but does not have it; a is never chosen while b is idle
+    assert a.hits == 0 and c.hits == 0
+
+
+def test_unhealthy_replica_is_skipped_and_failed_over(replicas):
+    a, url_a = replicas("a")
+    pool = EndpointPool(["http://127.0.0.1:9", url_a], health_interval=0, affinity_penalty=0)
+    send = send_with(requests.Session())
+    # Before any health check the dead replica is tried once and the request fails over
+    assert [pool.post(send, MODEL) for _ in range(3)] == ["a", "a", "a"]
+    stats = pool.get_stats()
+    assert stats["failovers"] == 1
+    assert stats["endpoints"][0]["healthy"] is False and stats["endpoints"][0]["failures"] == 1
+    pool.check_health()
+    assert pool.get_stats()["endpoints"][0]["healthy"] is False
+
+
+def test_rejected_request_is_not_failed_over(replicas):
+    # Only the first replica has the model loaded, so every request goes there first
+    first, url_first = replicas("first", loaded=[MODEL], status=404)
+    second, url_second = replicas("second")
+    pool = EndpointPool([url_first, url_second], health_interval=0, affinity_penalty=10)
+    pool.check_health()
+    send = send_with(requests.Session())
+
+    async def apost(pool):
+        async with httpx.AsyncClient() as http_client:
+            async def send(url):
+                response = await http_client.post(url, json={"model": MODEL})
+                response.raise_for_status()
+                return response.json()["message"]["content"]
+            return await pool.apost(send, MODEL)
+
+    # A 4xx would fail on every replica: it is raised at once and the replica stays in rotation
+    with pytest.raises(requests.HTTPError):
+        pool.post(send, MODEL)
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(apost(pool))
+    assert second.hits == 0
+    stats = pool.get_stats()
+    assert stats["failovers"] == 0 and stats["endpoints"][0]["healthy"] is True
+
+    # A 5xx counts against the replica and fails over
+    first.status = 500
+    assert pool.post(send, MODEL) == "second"
+    assert pool.get_stats()["endpoints"][0]["healthy"] is False
+    pool.check_health()
+    assert asyncio.run(apost(pool)) == "second"
+    # Failing over is not a hedge win when no hedge was sent
+    stats = pool.get_stats()
+    assert stats["failovers"] == 2 and stats["hedged"] == 0 and stats["hedge_wins"] == 0
+    pool.close()
+
+
+def test_slow_request_is_hedged(replicas):
+    slow, url_slow = replicas("slow", delay=1.0, loaded=[MODEL])
+    fast, url_fast = replicas("fast")
+    pool = EndpointPool([url_slow, url_fast], health_interval=0, hedge_percentile=90, hedge_min_samples=5)
+    pool.check_health()
+    assert pool.hedge_delay() is None
+    for _ in range(5):
+        pool._latencies.append(0.05)
+    start = time.perf_counter()
+    assert pool.post(send_with(requests.Session()), MODEL) == "fast"
+    assert time.perf_counter() - start < 0.8
+    stats = pool.get_stats()
+    assert stats["hedged"] == 1 and stats["hedge_wins"] == 1
+    assert slow.hits == 1 and fast.hits == 1
+    pool.close()
+
+
+def test_clients_use_configured_endpoints(replicas):
+    a, url_a = replicas("a", loaded=[MODEL])
+    b, url_b = replicas("b")
+    overrides = {"client": {"endpoints": [url_a, url_b]}, "pool": {"health_interval": 60}}
+    client = OllamaClient(memory=InMemoryConversationMemory(), cache=None, local_router=False, config_overrides=overrides)
+    client.endpoint_pool.check_health()
+    assert client._send_chat({"model": MODEL})["message"]["content"] == "a"
+    assert "".join(client._stream_chat({"model": MODEL, "stream": True})) == "a"
+    assert [e["requests"] for e in client.get_stats()["endpoint_pool"]["endpoints"]] == [2, 0]
+    client.close()
+
+    async def run():
+        async with httpx.AsyncClient() as http_client:
+            async_client = AsyncOllamaClient(memory=InMemoryConversationMemory(), cache=None, local_router=False, config_overrides=overrides, http_client=http_client)
+            async_client.endpoint_pool.check_health()
+            data = await async_client._send_chat({"model": MODEL})
+            await async_client.aclose()
+        return data
+
+    assert asyncio.run(run())["message"]["content"] == "a"
+
+
+def test_single_endpoint_has_no_pool():
+    client = OllamaClient(memory=InMemoryConversationMemory(), cache=None, local_router=False)
+    assert client.endpoint_pool is None
+    assert "endpoint_pool" not in client.get_stats()
@@ -0,0 +1,80 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from unittest.mock import MagicMock, patch
+from friday.llm_integration.http_session import create_session
+from friday.llm_integration.ollama_client import OllamaClient
+from friday.memory.in_memory_conversation_memory import InMemoryConversationMemory
+
+
+class ChatHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        body = json.dumps({"message": {"role": "assistant", "content": "pong"}}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), ChatHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}/api/chat"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_connections_are_reused(server):
+    client = OllamaClient(memory=InMemoryConversationMemory())
+    client.endpoint = server
+    for i in range(3):
+        assert client.generate_action(f"ping {i}") == "pong"
+    stats = client.get_stats()
+    assert stats["requests"] == 3
+    assert stats["errors"] == 0
+    assert stats["connections_opened"] == 1
+    assert stats["connections_reused"] == 2
+    client.close()
+
+
+def test_session_is_shared_between_clients(server):
+    first = OllamaClient(memory=InMemoryConversationMemory())
+    second = OllamaClient(memory=InMemoryConversationMemory(), http_session=first.session)
+    first.endpoint = second.endpoint = server
+    first.generate_action("ping")
+    second.generate_action("ping")
+    assert second.get_stats()["connections_opened"] == 1
+    assert second.get_stats()["connections_reused"] == 1
+    first.close()
+
+
+def test_read_timeouts_are_not_retried():
+    session = create_session(max_retries=3)
+    retry = session.get_adapter("http://localhost").max_retries
+    assert retry.total == 3 and retry.read == 0
+    assert "POST" in retry.allowed_methods and 503 in retry.status_forcelist
+    session.close()
+
+
+def test_responses_that_are_not_json_count_as_errors():
+    client = OllamaClient(memory=InMemoryConversationMemory(), cache=None)
+    response = MagicMock()
+    response.json.side_effect = ValueError("Expecting value")
+    with patch("requests.Session.post", return_value=response), pytest.raises(ValueError):
+        client.generate_action("ping")
+    assert client.get_stats()["errors"] == 1
+    client.close()
@@ -0,0 +1,104 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+import asyncio
+import json
+import httpx
+from unittest.mock import patch, MagicMock
+from friday.llm_integration.async_ollama_client import AsyncOllamaClient
+from friday.llm_integration.ollama_client import OllamaClient
+from friday.memory.hybrid_conversation_memory import HybridConversationMemory, rank_by_similarity
+from friday.memory.in_memory_conversation_memory import InMemoryConversationMemory
+
+TOPICS = [
+    ("How do I configure the postgres connection pool?", "Set pool_size and max_overflow on the engine."),
+    ("What does the retry decorator do?", "It retries the wrapped call with exponential backoff."),
+    ("Why is the websocket handler slow?", "It serializes every frame with the JSON encoder."),
+]
+
+
+def archived_memory(tmp_path):
+    memory = HybridConversationMemory(max_context_messages=3, db_path=str(tmp_path / "memory.db"))
+    for question, answer in TOPICS:
+        memory.add_to_history("user", question)
+        memory.add_to_history("assistant", answer)
+    return memory
+
+
+def test_retrieve_finds_evicted_messages(tmp_path):
+    memory = archived_memory(tmp_path)
+    recent = [msg["content"] for msg in memory.get_messages()]
+    assert TOPICS[0][0] not in recent
+    recalled = memory.retrieve("tune the postgres pool size", limit=2)
+    assert {msg["content"] for msg in recalled} == set(TOPICS[0])
+    assert all(msg["role"] in ("user", "assistant") and "timestamp" in msg for msg in recalled)
+    assert memory.retrieve("the and what", limit=2) == []
+    assert memory.retrieve("kubernetes", limit=2) == []
+
+
+def test_rerank_with_embeddings(tmp_path):
+    memory = archived_memory(tmp_path)
+
+    def embed(texts):
+        # "backoff" only appears in the retry answer: that message is the most similar
+        return [[1.0, 0.0]] + [[1.0, 0.0] if "backoff" in text else [0.0, 1.0] for text in texts[1:]]
+
+    candidates = memory.retrieve("retry decorator backoff", limit=6)
+    vectors = embed(["retry decorator backoff"] + [msg["content"] for msg in candidates])
+    recalled = rank_by_similarity(vectors[0], candidates, vectors[1:], limit=1)
+    assert recalled[0]["content"] == TOPICS[1][1]
+
+
+def test_clear_hides_old_archive(tmp_path):
+    memory = archived_memory(tmp_path)
+    memory.clear()
+    assert memory.retrieve("postgres pool", limit=2) == []
+    assert InMemoryConversationMemory().retrieve("postgres pool") == []
+
+
+def test_client_injects_recall_before_question(tmp_path):
+    client = OllamaClient(memory=archived_memory(tmp_path), cache=None, local_router=False)
+    payloads = []
+
+    def mock_post(*args, **kwargs):
+        payloads.append(kwargs["json"])
+        mock_resp = MagicMock()
+        if payloads[-1]["messages"][-1]["content"].endswith("Respond ONLY with JSON."):
+            content = json.dumps({"action": "generate_action", "question": "postgres pool"})
+        else:
+            content = "Raise pool_size."
+        mock_resp.json.return_value = {"message": {"role": "assistant", "content": content}}
+        return mock_resp
+
+    with patch("requests.Session.post", side_effect=mock_post):
+        client.handle_input("Remind me how the postgres pool was configured", bypass_cache=True)
+    messages = payloads[0]["messages"]
+    notes = [i for i, msg in enumerate(messages) if msg["content"].startswith("Relevant earlier conversation")]
+    assert len(notes) == 1
+    assert "pool_size and max_overflow" in messages[notes[0]]["content"]
+    assert messages[notes[0] + 1]["role"] == "user"
+    assert client.get_stats()["recalled_messages"] >= 1
+    assert client._recalled == []
+
+
+def test_async_client_recalls(tmp_path):
+    payloads = []
+
+    async def handler(request):
+        payload = json.loads(request.content)
+        payloads.append(payload)
+        if payload["messages"][-1]["content"].endswith("Respond ONLY with JSON."):
+            content = json.dumps({"action": "generate_action", "question": "retry"})
+        else:
+            content = "With backoff."
+        return httpx.Response(200, json={"message": {"role": "assistant", "content": content}})
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as http_client:
+            client = AsyncOllamaClient(memory=archived_memory(tmp_path), http_client=http_client, cache=None, local_router=False)
+            await client.handle_input("What did the retry decorator do again?", bypass_cache=True)
+            return client.get_stats()
+
+    stats = asyncio.run(run())
+    assert any("exponential backoff" in msg["content"] for msg in payloads[0]["messages"] if msg["role"] == "system")
+    assert stats["recalled_messages"] >= 1
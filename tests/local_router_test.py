@@ -0,0 +1,60 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+import pytest
+from unittest.mock import patch, MagicMock
+from friday.llm_integration.local_router import LocalRouter
+from friday.llm_integration.ollama_client import OllamaClient
+from friday.memory.in_memory_conversation_memory import InMemoryConversationMemory
+from friday.tooling.workspace_index import WorkspaceFileIndex
+
+@pytest.fixture
+def file_index(tmp_path):
+    for rel_path in ["src/cli.py", "src/main.py", "docs/memory_backends.md"]:
+        path = tmp_path / rel_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("# " + rel_path)
+    return WorkspaceFileIndex(tmp_path, index_path=None)
+
+@pytest.fixture
+def router(file_index):
+    return LocalRouter(file_index)
+
+
+def test_routes_existing_files(router):
+    assert router.route("Explain the driver() function in cli.py") == {
+        "action": "read_file", "file": "cli.py", "question": "Explain the driver() function in cli.py"
+    }
+    assert router.route("Compare cli.py and src/main.py.")["files"] == ["cli.py", "src/main.py"]
+
+
+def test_routes_plain_general_questions(router):
+    assert router.route("What is blockchain?") == {"action": "generate_action", "question": "What is blockchain?"}
+
+
+@pytest.mark.parametrize("user_input", [
+    "Explain missing.py",
+    "What is a .env file?",
+    "What does it do?",
+    "Summarize the project",
+    "see https://example.com/cli.py",
+])
+def test_falls_back_when_ambiguous(router, user_input):
+    assert router.route(user_input) is None
+
+
+def test_hit_rate(router):
+    router.route("What is blockchain?")
+    router.route("What does it do?")
+    assert router.get_stats() == {"routed": 2, "fast_path": 1, "fallback": 1, "hit_rate": 0.5}
+
+
+def test_client_skips_llm_routing(file_index):
+    client = OllamaClient(memory=InMemoryConversationMemory(), file_index=file_index)
+    mock_resp = MagicMock()
+    mock_resp.json.return_value = {"message": {"role": "assistant", "content": "It defines the CLI."}}
+    with patch("requests.Session.post", return_value=mock_resp) as mock_post:
+        response = client.handle_input("Explain cli.py")
+    assert response == "It defines the CLI."
+    mock_post.assert_called_once()
+    assert client.get_stats()["router"]["fast_path"] == 1
@@ -0,0 +1,63 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+import pytest
+import requests
+from unittest.mock import patch, MagicMock
+from friday.llm_integration.ollama_client import OllamaClient
+from friday.memory.in_memory_conversation_memory import InMemoryConversationMemory
+
+@pytest.fixture
+def client():
+    client = OllamaClient(memory=InMemoryConversationMemory(), cache=None, local_router=False, warm_up="none")
+    client.keep_alive = "30m"
+    client.num_ctx_buckets = [2048, 4096, 8192]
+    client.response_tokens = 512
+    return client
+
+
+def test_payload_pins_model_and_sizes_context(client):
+    small = client._chat_payload([{"role": "user", "content": "hi"}])
+    assert small["keep_alive"] == "30m"
+    assert small["options"] == {"num_ctx": 2048}
+    medium = client._chat_payload([{"role": "user", "content": "word " * 3000}])
+    assert medium["options"] == {"num_ctx": 4096}
+    huge = client._chat_payload([{"role": "user", "content": "word " * 100000}])
+    assert huge["options"] == {"num_ctx": 8192}
+
+
+def test_tools_count_towards_context(client):
+    messages = [{"role": "user", "content": "word " * 1200}]
+    assert client._chat_payload(messages)["options"]["num_ctx"] == 2048
+    assert client._tools_payload(messages)["options"]["num_ctx"] == 4096
+
+
+def test_no_buckets_keeps_ollama_default(client):
+    client.num_ctx_buckets = []
+    client.keep_alive = None
+    payload = client._chat_payload([{"role": "user", "content": "hi"}])
+    assert "options" not in payload and "keep_alive" not in payload
+
+
+def test_blocking_warm_up_loads_model():
+    mock_resp = MagicMock()
+    mock_resp.json.return_value = {"done": True}
+    with patch("requests.Session.post", return_value=mock_resp) as mock_post:
+        client = OllamaClient(memory=InMemoryConversationMemory(), warm_up="blocking")
+    payload = mock_post.call_args.kwargs["json"]
+    assert payload["messages"] == []
+    assert payload["keep_alive"] == client.keep_alive
+    assert payload["options"] == {"num_ctx": client.num_ctx_buckets[0]}
+    assert client.get_stats()["warm_up_time"] is not None
+
+
+def test_background_warm_up_failure_is_not_fatal(client):
+    with patch("requests.Session.post", side_effect=requests.ConnectionError("refused")):
+        thread = client.warm_up(background=True)
+        thread.join(timeout=5)
+    assert client.get_stats()["warm_up_time"] is None
+
+
+def test_unknown_warm_up_mode():
+    with pytest.raises(ValueError):
+        OllamaClient(memory=InMemoryConversationMemory(), warm_up="eager")
@@ -7,8 +7,8 @@ from friday.llm_integration.ollama_client import OllamaClient
 from friday.memory.hybrid_conversation_memory import HybridConversationMemory
 
 @pytest.fixture
-def client():
-    return OllamaClient(memory=HybridConversationMemory())
+def client(conversation_db):
+    return OllamaClient(memory=HybridConversationMemory(db_path=conversation_db))
 
 def mock_post_generate(*args, **kwargs):
     mock_resp = MagicMock()
@@ -27,7 +27,7 @@ def mock_post_read_file(*args, **kwargs):
     return mock_resp
 
 
-@patch("requests.post", side_effect=mock_post_generate)
+@patch("requests.Session.post", side_effect=mock_post_generate)
 def test_generate_action(mock_post, client):
     response = client.generate_action("What is Python?")
     assert "Python is a programming language." in response
@@ -45,7 +45,7 @@ def test_build_context_prompt(client):
 
 
 
-@patch("requests.post", side_effect=mock_post_generate)
+@patch("requests.Session.post", side_effect=mock_post_generate)
 def test_handle_input_generate_action(mock_post, client, monkeypatch):
     # Patch parse_json_from_model to return a valid action
     monkeypatch.setattr(
@@ -56,7 +56,7 @@ def test_handle_input_generate_action(mock_post, client, monkeypatch):
     assert "Python is a programming language." in response
 
 
-@patch("requests.post", side_effect=mock_post_generate)
+@patch("requests.Session.post", side_effect=mock_post_generate)
 def test_generate_natural_response(mock_post, client):
     client.memory.add_to_history("user", "What is Python?")
     response = client.generate_natural_response("What is Python?")
@@ -83,7 +83,7 @@ def test_get_context_messages(client):
     msgs = client.get_context_messages()
     assert any(m["role"] == "user" for m in msgs)
 
-@patch("requests.post", side_effect=mock_post_read_file)
+@patch("requests.Session.post", side_effect=mock_post_read_file)
 def test_read_file(mock_post, tmp_path, client):
     # Create a temporary file
     file_path = tmp_path / "test.txt"
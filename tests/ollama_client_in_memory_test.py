@@ -2,10 +2,12 @@ import sys
 from pathlib import Path
 sys.path.append(str(Path(__file__).resolve().parent.parent))
 import pytest
+import requests
 from unittest.mock import patch, MagicMock
 from friday.llm_integration.ollama_client import OllamaClient
 from friday.memory.in_memory_conversation_memory import InMemoryConversationMemory
 from friday.prompts import GENERAL_SYSTEM_PROMPT
+from friday.tooling.workspace_index import WorkspaceFileIndex
 
 @pytest.fixture
 def client():
@@ -28,7 +30,7 @@ def mock_post_read_file(*args, **kwargs):
     return mock_resp
 
 
-@patch("requests.post", side_effect=mock_post_generate)
+@patch("requests.Session.post", side_effect=mock_post_generate)
 def test_generate_action(mock_post, client):
     response = client.generate_action("What is Python?")
     assert "Python is a programming language." in response
@@ -46,7 +48,7 @@ def test_build_context_prompt(client):
 
 
 
-@patch("requests.post", side_effect=mock_post_generate)
+@patch("requests.Session.post", side_effect=mock_post_generate)
 def test_handle_input_generate_action(mock_post, client, monkeypatch):
     # Patch parse_json_from_model to return a valid action
     monkeypatch.setattr(
@@ -57,7 +59,7 @@ def test_handle_input_generate_action(mock_post, client, monkeypatch):
     assert "Python is a programming language." in response
 
 
-@patch("requests.post", side_effect=mock_post_generate)
+@patch("requests.Session.post", side_effect=mock_post_generate)
 def test_generate_natural_response(mock_post, client):
     client.memory.add_to_history("user", "What is Python?")
     response = client.generate_natural_response("What is Python?")
@@ -84,7 +86,7 @@ def test_get_context_messages(client):
     msgs = client.get_context_messages()
     assert any(m["role"] == "user" for m in msgs)
 
-@patch("requests.post", side_effect=mock_post_read_file)
+@patch("requests.Session.post", side_effect=mock_post_read_file)
 def test_read_file(mock_post, tmp_path, client):
     # Create a temporary file
     file_path = tmp_path / "test.txt"
@@ -93,3 +95,39 @@ def test_read_file(mock_post, tmp_path, client):
     response = client.read_file("Explain this file", str(file_path))
     assert "Python class" in response
     mock_post.assert_called_once()
+
+
+def test_handle_input_read_files_concurrent(tmp_path, client, monkeypatch):
+    for name in ["a.py", "b.py", "c.py"]:
+        (tmp_path / name).write_text(f"# {name}")
+    client.file_index = WorkspaceFileIndex(tmp_path, index_path=None)
+    monkeypatch.setattr(
+        "friday.llm_integration.ollama_client.parse_json_from_model",
+        lambda x: {"action": "read_files", "files": ["a.py", "missing.py", "b.py", "c.py"], "question": "Explain"}
+    )
+
+    def mock_post(*args, **kwargs):
+        content = kwargs["json"]["messages"][-1]["content"]
+        if "# b.py" in content:
+            raise requests.ConnectionError("connection refused")
+        mock_resp = MagicMock()
+        answer = content.split("\n")[2] if content.startswith("Here is a file") else "{}"
+        mock_resp.json.return_value = {"message": {"role": "assistant", "content": answer}}
+        return mock_resp
+
+    with patch("requests.Session.post", side_effect=mock_post):
+        response = client.handle_input("Explain a.py, missing.py, b.py and c.py")
+    assert response == (
+        "--- a.py ---\n# a.py\n\n"
+        "Could not find missing.py\n\n"
+        "--- b.py ---\nError reading b.py: connection refused\n\n"
+        "--- c.py ---\n# c.py"
+    )
+    metadata = client.memory.get_messages()[-1]["metadata"]
+    assert metadata == {
+        "action": "read_files",
+        "files": ["a.py", "missing.py", "b.py", "c.py"],
+        "found": ["a.py", "b.py", "c.py"],
+        "not_found": ["missing.py"],
+        "ambiguous": []
+    }
@@ -0,0 +1,73 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+import json
+import pytest
+from unittest.mock import patch, MagicMock
+from friday.llm_integration.base_client import AgentClient
+from friday.llm_integration.ollama_client import OllamaClient
+from friday.memory.in_memory_conversation_memory import InMemoryConversationMemory
+
+@pytest.fixture
+def client():
+    return OllamaClient(memory=InMemoryConversationMemory())
+
+def mock_post_stream(*args, **kwargs):
+    mock_resp = MagicMock()
+    mock_resp.status_code = 200
+    if kwargs.get("stream"):
+        chunks = [
+            {"message": {"role": "assistant", "content": "Python "}, "done": False},
+            {"message": {"role": "assistant", "content": "is a language."}, "done": False},
+            {"message": {"role": "assistant", "content": ""}, "done": True, "eval_count": 4},
+        ]
+        mock_resp.iter_lines.return_value = [json.dumps(chunk).encode() for chunk in chunks]
+        mock_resp.__enter__.return_value = mock_resp
+    else:
+        mock_resp.json.return_value = {
+            "message": {"role": "assistant", "content": '{"action": "generate_action", "question": "What is Python?"}'}
+        }
+    return mock_resp
+
+
+@patch("requests.Session.post", side_effect=mock_post_stream)
+def test_handle_input_stream_yields_tokens(mock_post, client):
+    tokens = list(client.handle_input_stream("What is Python?"))
+    assert tokens == ["Python ", "is a language."]
+    last = client.memory.get_messages()[-1]
+    assert last["role"] == "assistant"
+    assert last["content"] == "Python is a language."
+    assert last["metadata"] == {"action": "generate_action"}
+
+
+@patch("requests.Session.post", side_effect=mock_post_stream)
+def test_stream_records_time_to_first_token(mock_post, client):
+    "".join(client.stream_natural_response("What is Python?"))
+    stats = client.get_stats()
+    assert stats["streamed_requests"] == 1
+    assert stats["avg_time_to_first_token"] >= 0.0
+
+
+def test_clients_without_streaming_or_stats_still_work():
+    # A client written against the interface before streaming, batches and stats existed: it implements
+    # exactly the methods that were abstract then
+    methods = {name: (lambda self, *args, **kwargs: None) for name in [
+        "generate_action", "read_file", "_build_context_prompt", "generate_natural_response",
+        "get_conversation_summary", "clear_context", "get_context_messages", "set_context_limits",
+    ]}
+
+    def handle_input(self, user_input):
+        if user_input == "fail":
+            raise ValueError(user_input)
+        return f"echo {user_input}"
+
+    methods["handle_input"] = handle_input
+    LegacyClient = type("LegacyClient", (AgentClient,), methods)
+    client = LegacyClient(InMemoryConversationMemory())
+    assert list(client.handle_input_stream("hi")) == ["echo hi"]
+    assert client.handle_inputs(["a", "b"]) == ["echo a", "echo b"]
+    results = client.handle_inputs(["a", "fail"], return_exceptions=True)
+    assert results[0] == "echo a" and isinstance(results[1], ValueError)
+    with pytest.raises(ValueError):
+        client.handle_inputs(["fail"])
+    assert client.get_stats() == {}
@@ -0,0 +1,75 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+import json
+from unittest.mock import patch, MagicMock
+from friday.llm_integration.ollama_client import OllamaClient
+from friday.llm_integration.prompt_assembler import PromptAssembler
+from friday.memory.in_memory_conversation_memory import InMemoryConversationMemory
+from friday.utils.tokens import TokenCounter
+
+
+def run_turns(prompts, token_counter=None):
+    client = OllamaClient(memory=InMemoryConversationMemory(), cache=None, local_router=False, token_counter=token_counter)
+    payloads = []
+
+    def mock_post(*args, **kwargs):
+        payload = kwargs["json"]
+        payloads.append(payload)
+        last = payload["messages"][-1]["content"]
+        if last.endswith("Respond ONLY with JSON."):
+            content = json.dumps({"action": "generate_action", "question": "restated"})
+        else:
+            content = f"Answer {len(payloads)}"
+        mock_resp = MagicMock()
+        mock_resp.json.return_value = {"message": {"role": "assistant", "content": content}, "prompt_eval_count": 10, "prompt_eval_duration": 5000}
+        return mock_resp
+
+    with patch("requests.Session.post", side_effect=mock_post):
+        for prompt in prompts:
+            client.handle_input(prompt)
+    return client, [payload["messages"] for payload in payloads]
+
+
+def test_answer_prompt_is_prefix_of_routing_prompt():
+    _, (routing, answer) = run_turns(["What is a closure?"])
+    assert answer == routing[:-1]
+    assert answer[-1] == {"role": "user", "content": "What is a closure?"}
+
+
+def test_next_turn_extends_previous_prompt():
+    _, (routing1, answer1, routing2, answer2) = run_turns(["What is a closure?", "And a generator?"])
+    assert answer2[:len(answer1)] == answer1
+    assert answer2[len(answer1)] == {"role": "assistant", "content": "Answer 2"}
+    assert routing2[:len(answer2)] == answer2
+
+
+def test_prompt_eval_metrics():
+    client, _ = run_turns(["What is a closure?"])
+    stats = client.get_stats()
+    assert stats["prompt_eval_count"] == 20
+    assert stats["prompt_eval_duration"] == 10000
+    # An estimated prompt size is not compared against Ollama's count
+    assert stats["prompt_tokens"] == 0
+    assert stats["prompt_cache_reuse"] is None
+
+
+def test_prompt_cache_reuse_needs_an_exact_tokenizer():
+    client, _ = run_turns(["What is a closure?"], token_counter=TokenCounter(lambda text: len(text.split()), name="words"))
+    stats = client.get_stats()
+    assert stats["prompt_tokens"] > 20
+    assert 0.0 < stats["prompt_cache_reuse"] < 1.0
+
+
+def test_trimming_moves_the_prefix_in_steps():
+    assembler = PromptAssembler(TokenCounter(lambda text: len(text.split())), max_prompt_tokens=100)
+    history = []
+    first_messages = []
+    for i in range(30):
+        history.append({"role": "user" if i % 2 == 0 else "assistant", "content": f"turn {i} " + "word " * 8, "timestamp": str(i)})
+        messages = assembler.assemble(history, "system")
+        assert TokenCounter(lambda text: len(text.split())).count_messages(messages) <= 100
+        assert messages[1]["role"] == "user"
+        first_messages.append(messages[1]["content"])
+    # The conversation start changes only when the budget overflows, not on every turn
+    assert 1 < len(set(first_messages)) < 10
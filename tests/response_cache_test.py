@@ -0,0 +1,66 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from unittest.mock import patch, MagicMock
+from friday.llm_integration.ollama_client import OllamaClient
+from friday.llm_integration.response_cache import ResponseCache, SqliteCacheStore, cache_key
+from friday.memory.no_memory_conversation_memory import NoMemoryConversationMemory
+
+def payload(content, model="qwen2.5-coder:7b", **extra):
+    return {"model": model, "messages": [{"role": "user", "content": content}], "stream": False, **extra}
+
+def mock_post_generate(*args, **kwargs):
+    mock_resp = MagicMock()
+    mock_resp.status_code = 200
+    mock_resp.json.return_value = {
+        "message": {"role": "assistant", "content": "Python is a programming language."}
+    }
+    return mock_resp
+
+
+def test_cache_key_normalization():
+    assert cache_key(payload("What is Python?")) == cache_key(payload("  What is Python?\n", stream=True))
+    assert cache_key(payload("What is Python?")) != cache_key(payload("What is Python?", model="llama3"))
+    assert cache_key(payload("What is Python?")) != cache_key(payload("What is Python?", options={"num_ctx": 4096}))
+
+
+def test_lru_tier_evicts_least_recently_used():
+    cache = ResponseCache(max_entries=2)
+    cache.set(payload("a"), {"message": {"content": "A"}})
+    cache.set(payload("b"), {"message": {"content": "B"}})
+    cache.get(payload("a"))
+    cache.set(payload("c"), {"message": {"content": "C"}})
+    assert cache.get(payload("b")) is None
+    assert cache.get(payload("a")) == {"message": {"content": "A"}}
+    stats = cache.get_stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+
+
+def test_persistent_tier_ttl_and_size_bound(tmp_path):
+    store = SqliteCacheStore(str(tmp_path / "cache.db"), ttl_seconds=3600, max_entries=2)
+    for key in ["a", "b", "c"]:
+        store.set(key, {"value": key})
+    assert store.get("a") is None
+    assert store.get("c") == {"value": "c"}
+    expired = SqliteCacheStore(str(tmp_path / "cache.db"), ttl_seconds=-1, max_entries=2)
+    assert expired.get("c") is None
+
+
+def test_persistent_tier_survives_restart(tmp_path):
+    db_path = str(tmp_path / "cache.db")
+    ResponseCache(persistent=True, db_path=db_path).set(payload("a"), {"message": {"content": "A"}})
+    cache = ResponseCache(persistent=True, db_path=db_path)
+    assert cache.get(payload("a")) == {"message": {"content": "A"}}
+    assert cache.get_stats()["persistent_hits"] == 1
+
+
+@patch("requests.Session.post", side_effect=mock_post_generate)
+def test_client_cache_hit_and_bypass(mock_post):
+    client = OllamaClient(memory=NoMemoryConversationMemory(), cache=ResponseCache())
+    client.generate_action("What is Python?")
+    client.generate_action("What is Python?")
+    assert mock_post.call_count == 1
+    client.generate_action("What is Python?", bypass_cache=True)
+    assert mock_post.call_count == 2
+    assert client.get_stats()["cache"]["hits"] == 1
@@ -0,0 +1,104 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+import json
+import re
+import zlib
+import numpy as np
+from unittest.mock import patch, MagicMock
+from friday.llm_integration.ollama_client import OllamaClient
+from friday.llm_integration.semantic_cache import SemanticCache, create_semantic_cache
+from friday.memory.in_memory_conversation_memory import InMemoryConversationMemory
+from friday.utils.vector_index import VectorIndex
+
+
+def embed(text, dim=64):
+    # Bag-of-words hashing: paraphrases that share their words get nearly identical vectors
+    vector = np.zeros(dim)
+    for word in re.findall(r"\w+", text.lower()):
+        vector[zlib.crc32(word.encode()) % dim] += 1.0
+    return vector.tolist()
+
+
+def test_top_k_search_is_batched_and_grouped():
+    index = VectorIndex(max_entries=100)
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(40, 8))
+    for i, vector in enumerate(vectors):
+        index.add(vector, {"id": i}, group="a" if i % 2 == 0 else "b")
+    results = index.search(vectors[:4], k=3, group="a")
+    assert len(results) == 4
+    # Exact matches rank first within their group; other groups never appear
+    assert results[0][0][2]["id"] == 0 and results[2][0][2]["id"] == 2
+    assert all(hit[2]["id"] % 2 == 0 for hits in results for hit in hits)
+    assert all(hits[0][0] >= hits[1][0] >= hits[2][0] for hits in results)
+    assert index.search(vectors[:1], k=3, group="unknown") == [[]]
+
+
+def test_least_recently_used_entry_is_evicted():
+    index = VectorIndex(max_entries=3)
+    basis = np.eye(4)
+    for i in range(3):
+        index.add(basis[i], {"id": i})
+    index.touch(index.search(basis[0])[0][0][1])
+    index.add(basis[3], {"id": 3})
+    assert len(index) == 3 and index.evictions == 1
+    assert {hit[2]["id"] for hit in index.search(basis, k=3)[0]} == {0, 2, 3}
+
+
+def test_threshold_persistence_and_metrics(tmp_path):
+    path = str(tmp_path / "semantic.npz")
+    cache = SemanticCache(VectorIndex(10), threshold=0.9, path=path, save_every=100)
+    cache.store(embed("What is a closure in Python?"), "What is a closure in Python?", "A function with captured variables.", "m")
+    assert cache.lookup(embed("what is a python closure"), "m")["answer"] == "A function with captured variables."
+    assert cache.lookup(embed("How do I sort a dict by value?"), "m") is None
+    assert cache.lookup(embed("What is a closure in Python?"), "other-model") is None
+    stats = cache.get_stats()
+    assert stats["hits"] == 1 and stats["misses"] == 2 and abs(stats["hit_rate"] - 1 / 3) < 1e-9
+    cache.save()
+
+    reloaded = SemanticCache(VectorIndex(10), threshold=0.9, path=path)
+    assert reloaded.get_stats()["entries"] == 1
+    assert reloaded.lookup(embed("What is a closure in Python?"), "m")["question"] == "What is a closure in Python?"
+
+
+def test_client_answers_paraphrase_from_semantic_cache(tmp_path):
+    overrides = {"semantic_cache": {"enabled": True, "threshold": 0.9, "persistent": True, "path": str(tmp_path / "semantic.npz")}}
+    client = OllamaClient(memory=InMemoryConversationMemory(), cache=None, local_router=False, config_overrides=overrides)
+    chat_calls = []
+
+    def mock_post(url, *args, **kwargs):
+        payload = kwargs["json"]
+        mock_resp = MagicMock()
+        if url.endswith("/api/embed"):
+            mock_resp.json.return_value = {"embeddings": [embed(text) for text in payload["input"]]}
+            return mock_resp
+        chat_calls.append(payload)
+        last = payload["messages"][-1]["content"]
+        if last.endswith("Respond ONLY with JSON."):
+            content = json.dumps({"action": "generate_action", "question": "closures"})
+        else:
+            content = "A closure captures variables from its enclosing scope."
+        mock_resp.json.return_value = {"message": {"role": "assistant", "content": content}}
+        return mock_resp
+
+    with patch("requests.Session.post", side_effect=mock_post):
+        first = client.handle_input("What is a closure in Python?")
+        # A follow-up has context: it goes to the model, and is not stored
+        client.handle_input("what is a python closure")
+        assert len(chat_calls) == 4
+        client.clear_context()
+        second = client.handle_input("what is a python closure")
+    assert first == second
+    assert len(chat_calls) == 4
+    assert client.memory.get_messages()[-1]["metadata"]["semantic_cache"] > 0.9
+    stats = client.get_stats()["semantic_cache"]
+    assert stats["hits"] == 1 and stats["stores"] == 1 and stats["embedding_requests"] == 2
+    client.close()
+    assert (tmp_path / "semantic.npz").exists()
+
+
+def test_disabled_without_numpy():
+    assert create_semantic_cache({"enabled": False}) is None
+    with patch.dict(sys.modules, {"friday.utils.vector_index": None}):
+        assert create_semantic_cache({"enabled": True}) is None
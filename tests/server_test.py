@@ -0,0 +1,177 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+import asyncio
+import json
+import httpx
+from unittest.mock import patch
+from friday import main as friday_main
+from friday.interface.server import FridayServer
+from friday.llm_integration.async_ollama_client import AsyncOllamaClient
+from friday.memory.in_memory_conversation_memory import InMemoryConversationMemory
+
+
+def ollama_handler(request):
+    payload = json.loads(request.content)
+    last = payload["messages"][-1]["content"]
+    if last.endswith("Respond ONLY with JSON."):
+        content = json.dumps({"action": "generate_action", "question": last.split("\n")[0]})
+    else:
+        content = f"Answer to {last}"
+    if payload["stream"]:
+        lines = [
+            json.dumps({"message": {"role": "assistant", "content": content}, "done": False}),
+            json.dumps({"message": {"role": "assistant", "content": ""}, "done": True}),
+        ]
+        return httpx.Response(200, content="\n".join(lines).encode())
+    return httpx.Response(200, json={"message": {"role": "assistant", "content": content}})
+
+
+def run_server(scenario, **kwargs):
+    """Run scenario(api, server) against a FridayServer on a free port, backed by a mocked Ollama."""
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(ollama_handler)) as ollama:
+            # Sessions get their own memories; the client's own is never used
+            client = AsyncOllamaClient(http_client=ollama, memory=InMemoryConversationMemory(), cache=None, local_router=False)
+            server = FridayServer(client, port=0, **{"memory": "memory", **kwargs})
+            host, port = await server.start()
+            try:
+                async with httpx.AsyncClient(base_url=f"http://{host}:{port}", timeout=10) as api:
+                    return await scenario(api, server)
+            finally:
+                await server.close()
+    return asyncio.run(run())
+
+
+def test_sessions_are_served_concurrently_and_kept_apart():
+    async def scenario(api, server):
+        responses = await asyncio.gather(*(
+            api.post("/chat", json={"prompt": f"question {i}", "session_id": f"s{i % 3}", "user_id": "ana"})
+            for i in range(9)
+        ))
+        session = (await api.get("/sessions/s1", params={"user_id": "ana"})).json()
+        return responses, session, server.get_stats()
+
+    responses, session, stats = run_server(scenario, workers=2)
+    assert [r.status_code for r in responses] == [200] * 9
+    assert {r.json()["response"] for r in responses} == {f"Answer to question {i}" for i in range(9)}
+    user_turns = [m["content"] for m in session["messages"] if m["role"] == "user"]
+    assert sorted(user_turns) == ["question 1", "question 4", "question 7"]
+    assert stats["sessions"] == 3 and stats["turns"] == 9 and stats["active_turns"] == 0
+
+
+def test_streaming_chat():
+    async def scenario(api, server):
+        async with api.stream("POST", "/chat", json={"prompt": "What is Python?", "stream": True}) as response:
+            return response.headers["content-type"], [json.loads(line) async for line in response.aiter_lines() if line]
+
+    content_type, chunks = run_server(scenario)
+    assert content_type == "application/x-ndjson"
+    assert "".join(c.get("token", "") for c in chunks) == "Answer to What is Python?"
+    assert chunks[-1]["done"] is True
+    assert len({c["session_id"] for c in chunks}) == 1
+
+
+def test_errors_and_session_lifecycle():
+    async def scenario(api, server):
+        first = (await api.post("/chat", json={"prompt": "hi", "user_id": "ana"})).json()
+        session_id = first["session_id"]
+        return [
+            (await api.post("/chat", content=b"not json")).status_code,
+            (await api.post("/chat", json={"prompt": ""})).status_code,
+            (await api.get("/chat")).status_code,
+            (await api.post("/chat", json={"prompt": "hi", "session_id": session_id, "user_id": "bob"})).status_code,
+            (await api.get(f"/sessions/{session_id}")).status_code,
+            (await api.get(f"/sessions/{session_id}", params={"user_id": "bob"})).status_code,
+            (await api.delete(f"/sessions/{session_id}", params={"user_id": "bob"})).status_code,
+            (await api.delete(f"/sessions/{session_id}", params={"user_id": "ana"})).status_code,
+            (await api.get(f"/sessions/{session_id}", params={"user_id": "ana"})).status_code,
+            (await api.get("/health")).json(),
+        ]
+
+    assert run_server(scenario) == [400, 400, 405, 403, 403, 403, 403, 200, 404, {"status": "ok"}]
+
+
+def test_sqlite_sessions(tmp_path):
+    async def scenario(api, server):
+        first = (await api.post("/chat", json={"prompt": "first", "user_id": "ana"})).json()
+        await api.post("/chat", json={"prompt": "second", "session_id": first["session_id"], "user_id": "ana"})
+        return (await api.get(f"/sessions/{first['session_id']}", params={"user_id": "ana"})).json()
+
+    session = run_server(scenario, memory="sqlite", db_path=str(tmp_path / "memory.db"))
+    assert [m["content"] for m in session["messages"] if m["role"] == "user"] == ["first", "second"]
+
+
+def test_sessions_are_only_used_by_their_owner(tmp_path):
+    async def scenario(api, server):
+        owned = (await api.post("/chat", json={"prompt": "hi", "user_id": "ana"})).json()["session_id"]
+        anonymous = (await api.post("/chat", json={"prompt": "hi"})).json()["session_id"]
+        statuses = []
+        # Once while the sessions are open, once after eviction reopens them from the database
+        for _ in range(2):
+            statuses += [
+                (await api.post("/chat", json={"prompt": "again", "session_id": owned})).status_code,
+                (await api.post("/chat", json={"prompt": "again", "session_id": owned, "user_id": "bob"})).status_code,
+                (await api.post("/chat", json={"prompt": "again", "session_id": owned, "user_id": "ana"})).status_code,
+                (await api.post("/chat", json={"prompt": "again", "session_id": anonymous})).status_code,
+            ]
+            server.sessions.max_sessions = 1
+        statuses.append((await api.post("/chat", json={"prompt": "hi", "session_id": "999"})).status_code)
+        return statuses
+
+    statuses = run_server(scenario, memory="sqlite", db_path=str(tmp_path / "memory.db"))
+    assert statuses == [403, 403, 200, 200] * 2 + [404]
+
+
+def test_evicted_session_is_reopened_for_reads(tmp_path):
+    async def scenario(api, server):
+        first = (await api.post("/chat", json={"prompt": "first", "user_id": "ana"})).json()["session_id"]
+        await api.post("/chat", json={"prompt": "another conversation", "user_id": "bob"})
+        await server.sessions.wait_retired()
+        evicted = first not in server.sessions.sessions
+        return evicted, [
+            (await api.get(f"/sessions/{first}", params={"user_id": "bob"})).status_code,
+            (await api.get(f"/sessions/{first}", params={"user_id": "ana"})).json(),
+        ]
+
+    evicted, (forbidden, session) = run_server(scenario, memory="sqlite", db_path=str(tmp_path / "memory.db"), max_sessions=1)
+    assert evicted and forbidden == 403
+    assert [m["content"] for m in session["messages"] if m["role"] == "user"] == ["first"]
+
+
+def test_eviction_does_not_wait_for_a_running_turn(tmp_path):
+    async def scenario(api, server):
+        busy_id = (await api.post("/chat", json={"prompt": "first"})).json()["session_id"]
+        busy = server.sessions.sessions[busy_id]
+        # The session about to be evicted is in the middle of a long turn
+        await busy.lock.acquire()
+        other = await asyncio.wait_for(api.post("/chat", json={"prompt": "another conversation"}), timeout=5)
+        retiring = busy_id in server.sessions._retiring
+        busy.lock.release()
+        await server.sessions.wait_retired()
+        return other.status_code, retiring, busy_id in server.sessions._retiring
+
+    status, retiring, still_retiring = run_server(scenario, memory="sqlite", db_path=str(tmp_path / "memory.db"), max_sessions=1)
+    assert status == 200 and retiring and not still_retiring
+
+
+def test_evicted_hybrid_session_is_archived_and_reopened(tmp_path):
+    db_path = str(tmp_path / "memory.db")
+
+    async def scenario(api, server):
+        first = (await api.post("/chat", json={"prompt": "how do retries work", "user_id": "ana"})).json()["session_id"]
+        await api.post("/chat", json={"prompt": "another conversation", "user_id": "bob"})
+        evicted = first not in server.sessions.sessions
+        reopened = await api.post("/chat", json={"prompt": "and timeouts", "session_id": first, "user_id": "ana"})
+        memory = server.sessions.sessions[first].client.memory.memory
+        return evicted, reopened.status_code, [m["content"] for m in memory.get_evicted()]
+
+    evicted, status, archived = run_server(scenario, memory="hybrid", db_path=db_path, max_sessions=1)
+    assert evicted and status == 200
+    assert archived == ["how do retries work", "Answer to how do retries work"]
+
+
+def test_serve_command():
+    with patch("friday.interface.server.serve") as serve:
+        friday_main.main(["serve", "--port", "9000", "--workers", "8"])
+    serve.assert_called_once_with(None, 9000, 8, None)
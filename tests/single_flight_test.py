@@ -0,0 +1,122 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+import asyncio
+import json
+import threading
+import time
+import httpx
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch, MagicMock
+from friday.llm_integration.async_ollama_client import AsyncOllamaClient
+from friday.llm_integration.ollama_client import OllamaClient
+from friday.llm_integration.single_flight import SingleFlight
+from friday.memory.in_memory_conversation_memory import InMemoryConversationMemory
+
+PAYLOAD = {"model": "m", "messages": [{"role": "user", "content": "Explain main.py"}], "stream": False}
+
+
+def slow_tokens(tokens, delay=0.05):
+    for token in tokens:
+        time.sleep(delay)
+        yield token
+
+
+def test_concurrent_identical_posts_share_one_call():
+    client = OllamaClient(memory=InMemoryConversationMemory(), cache=None, local_router=False)
+    calls = []
+
+    def mock_post(*args, **kwargs):
+        calls.append(kwargs["json"])
+        time.sleep(0.2)
+        mock_resp = MagicMock()
+        mock_resp.json.return_value = {"message": {"role": "assistant", "content": "shared"}}
+        return mock_resp
+
+    with patch("requests.Session.post", side_effect=mock_post):
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            results = list(executor.map(lambda _: client._post_chat(dict(PAYLOAD), bypass_cache=True), range(5)))
+    assert len(calls) == 1
+    assert [r["message"]["content"] for r in results] == ["shared"] * 5
+    stats = client.get_stats()["single_flight"]
+    assert stats["flights"] == 1 and stats["coalesced"] == 4 and stats["in_flight"] == 0
+    assert client.get_stats()["requests"] == 1
+
+
+def test_stream_subscribers_receive_every_token():
+    flights = SingleFlight()
+    leader = flights.stream("k", lambda: slow_tokens(["a", "b", "c", "d"]))
+    received = [next(leader)]
+    # Joins after the first token: replays it, then follows the live stream
+    follower = flights.stream("k", lambda: pytest.fail("second call started"))
+    assert list(follower) == ["a", "b", "c", "d"]
+    assert received + list(leader) == ["a", "b", "c", "d"]
+    assert flights.get_stats()["coalesced_streams"] == 1
+
+
+def test_blocking_and_streaming_callers_share_a_flight():
+    flights = SingleFlight()
+    stream = flights.stream("k", lambda: slow_tokens(["Hello", " world"]))
+    first = next(stream)
+    result = {}
+    thread = threading.Thread(target=lambda: result.update(flights.call("k", lambda: pytest.fail("second call started"))))
+    thread.start()
+    assert first + "".join(stream) == "Hello world"
+    thread.join()
+    assert result["message"]["content"] == "Hello world"
+
+    def blocking():
+        time.sleep(0.1)
+        return {"message": {"role": "assistant", "content": "whole answer"}}
+
+    thread = threading.Thread(target=flights.call, args=("j", blocking))
+    thread.start()
+    time.sleep(0.02)
+    assert list(flights.stream("j", lambda: pytest.fail("second call started"))) == ["whole answer"]
+    thread.join()
+
+
+def test_errors_reach_every_waiter():
+    flights = SingleFlight()
+
+    def failing():
+        time.sleep(0.1)
+        raise ConnectionError("ollama down")
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        futures = [executor.submit(flights.call, "k", failing) for _ in range(3)]
+        for future in futures:
+            with pytest.raises(ConnectionError):
+                future.result()
+    assert flights.get_stats()["in_flight"] == 0
+
+
+def test_async_client_coalesces_posts_and_streams():
+    calls = []
+
+    async def handler(request):
+        payload = json.loads(request.content)
+        calls.append(payload["stream"])
+        await asyncio.sleep(0.1)
+        if payload["stream"]:
+            lines = [json.dumps({"message": {"content": token}, "done": False}) for token in ["one ", "two"]]
+            lines.append(json.dumps({"message": {"content": ""}, "done": True}))
+            return httpx.Response(200, content="\n".join(lines).encode())
+        return httpx.Response(200, json={"message": {"role": "assistant", "content": "shared"}})
+
+    async def collect(client):
+        return "".join([token async for token in client._stream_chat({**PAYLOAD, "stream": True}, bypass_cache=True)])
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as http_client:
+            client = AsyncOllamaClient(memory=InMemoryConversationMemory(), http_client=http_client, cache=None, local_router=False)
+            posts = await asyncio.gather(*(client._post_chat(dict(PAYLOAD), bypass_cache=True) for _ in range(4)))
+            streams = await asyncio.gather(*(collect(client) for _ in range(3)))
+            return posts, streams, client.get_stats()["single_flight"]
+
+    posts, streams, stats = asyncio.run(run())
+    assert calls == [False, True]
+    assert [p["message"]["content"] for p in posts] == ["shared"] * 4
+    assert streams == ["one two"] * 3
+    assert stats["flights"] == 2 and stats["coalesced"] == 5 and stats["coalesced_streams"] == 2
@@ -0,0 +1,66 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+import sqlite3
+import threading
+import pytest
+from friday.memory.hybrid_conversation_memory import HybridConversationMemory
+from friday.memory.sqlite_conversation_memory import SqliteConversationMemory
+from friday.memory.sqlite_pool import SqliteConnectionPool
+
+
+def test_connection_is_configured_once_and_reused_per_thread(tmp_path):
+    with SqliteConnectionPool(str(tmp_path / "nested" / "memory.db"), busy_timeout_ms=1234) as pool:
+        conn = pool.connection()
+        assert pool.connection() is conn
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1
+        assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 1234
+
+        other = []
+        thread = threading.Thread(target=lambda: other.append(pool.connection()))
+        thread.start()
+        thread.join()
+        assert other[0] is not conn
+        assert pool.get_stats() == {"connections_opened": 2, "open_connections": 2}
+    assert pool.closed and pool.get_stats()["open_connections"] == 0
+    with pytest.raises(sqlite3.ProgrammingError):
+        pool.connection()
+
+
+def test_unknown_pragma_values_are_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        SqliteConnectionPool(str(tmp_path / "memory.db"), journal_mode="fast")
+    with pytest.raises(ValueError):
+        SqliteConnectionPool(str(tmp_path / "memory.db"), synchronous="sometimes")
+
+
+def test_memories_share_a_pool_and_close_their_own(tmp_path):
+    db_path = str(tmp_path / "memory.db")
+    pool = SqliteConnectionPool(db_path)
+    first = SqliteConversationMemory(db_path=db_path, pool=pool)
+    second = HybridConversationMemory(db_path=db_path, pool=pool, max_context_messages=2)
+    for i in range(4):
+        first.add_to_history("user", f"question {i}")
+        second.add_to_history("user", f"retry question {i}")
+    first.close()
+    second.close()
+    # A shared pool stays open until its owner closes it
+    assert not pool.closed and pool.get_stats()["connections_opened"] == 1
+    assert len(first.get_messages()) == 5
+    assert second.retrieve("retry")
+    pool.close()
+
+    with SqliteConversationMemory(session_id=first.session_id, db_path=db_path) as reopened:
+        assert [m["content"] for m in reopened.get_messages()][1:] == [f"question {i}" for i in range(4)]
+    assert reopened._pool.closed
+
+
+def test_failed_write_is_rolled_back(tmp_path):
+    memory = SqliteConversationMemory(db_path=str(tmp_path / "memory.db"))
+    memory.add_to_history("user", "kept")
+    with pytest.raises(sqlite3.Error):
+        memory.add_to_history("user", object())
+    memory.add_to_history("assistant", "also kept")
+    assert [m["content"] for m in memory.get_messages()][1:] == ["kept", "also kept"]
+    memory.close()
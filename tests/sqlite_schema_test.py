@@ -0,0 +1,143 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+import json
+import sqlite3
+from unittest.mock import patch
+from friday.memory.hybrid_conversation_memory import HybridConversationMemory
+from friday.memory.sqlite_conversation_memory import SqliteConversationMemory
+from friday.memory.sqlite_schema import MIGRATIONS, SCHEMA_VERSION, has_metadata_columns, migrate, schema_version
+
+
+def create_unversioned_db(db_path):
+    # The layout databases had before schema versioning: no indexes, no summaries table
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE sessions (session_id INTEGER PRIMARY KEY AUTOINCREMENT, user_id TEXT, created_at REAL)")
+    conn.execute(
+        "CREATE TABLE messages (id INTEGER PRIMARY KEY AUTOINCREMENT, session_id INTEGER, role TEXT, content TEXT, metadata TEXT, timestamp REAL, "
+        "FOREIGN KEY(session_id) REFERENCES sessions(session_id))"
+    )
+    conn.execute("INSERT INTO sessions (user_id, created_at) VALUES ('alice', 1.0)")
+    rows = [
+        ("system", "You are Friday.", None),
+        ("user", "read cli.py", json.dumps({"action": "read_file", "file": "cli.py"})),
+        ("assistant", "done", "{not json"),
+        ("user", "read cli.py again", json.dumps({"action": "read_file", "file": "cli.py"})),
+        ("user", "read main.py", json.dumps({"action": "read_file", "file": "main.py"})),
+        ("assistant", "answer", json.dumps({"action": "generate_action"})),
+    ]
+    for i, (role, content, metadata) in enumerate(rows):
+        conn.execute("INSERT INTO messages (session_id, role, content, metadata, timestamp) VALUES (1, ?, ?, ?, ?)", (role, content, metadata, 100.0 + i))
+    conn.commit()
+    conn.close()
+
+
+def test_existing_database_is_upgraded_in_place(tmp_path):
+    db_path = str(tmp_path / "conversation_memory.db")
+    create_unversioned_db(db_path)
+
+    with SqliteConversationMemory(session_id=1, db_path=db_path, system_prompt="You are Friday.") as memory:
+        assert [m["content"] for m in memory.get_messages()][:2] == ["You are Friday.", "read cli.py"]
+        summary = memory.get_summary()
+        assert summary["total_messages"] == 6
+        assert summary["unique_files_accessed"] == 2 and summary["last_action"] == "generate_action"
+        memory.set_running_summary("earlier turns", "2024-01-01T00:00:00")
+
+    conn = sqlite3.connect(db_path)
+    assert schema_version(conn) == SCHEMA_VERSION
+    assert [row[0] for row in conn.execute("SELECT version FROM schema_version ORDER BY version")] == list(range(1, SCHEMA_VERSION + 1))
+    indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert {"idx_messages_session_timestamp", "idx_sessions_user_id", "idx_messages_session_action_file"} <= indexes
+    assert has_metadata_columns(conn)
+    assert conn.execute("SELECT action, file FROM messages WHERE id = 2").fetchone() == ("read_file", "cli.py")
+    assert conn.execute("SELECT action FROM messages WHERE id = 3").fetchone() == (None,)
+    # Up to date: a second run applies nothing
+    assert migrate(conn) == SCHEMA_VERSION
+    conn.close()
+
+
+def test_session_queries_use_the_indexes(tmp_path):
+    db_path = str(tmp_path / "conversation_memory.db")
+    SqliteConversationMemory(db_path=db_path).close()
+    conn = sqlite3.connect(db_path)
+
+    def plan(query, *params):
+        return " ".join(row[-1] for row in conn.execute("EXPLAIN QUERY PLAN " + query, params))
+
+    assert "idx_messages_session_timestamp" in plan("SELECT role, content FROM messages WHERE session_id = ? ORDER BY timestamp ASC LIMIT ?", 1, -1)
+    assert "idx_messages_session_timestamp" in plan("SELECT action FROM messages WHERE session_id = ? ORDER BY timestamp DESC LIMIT 1", 1)
+    assert "idx_messages_session_action_file" in plan("SELECT COUNT(DISTINCT COALESCE(file, '')) FROM messages WHERE session_id = ? AND action = 'read_file'", 1)
+    assert "idx_sessions_user_id" in plan("SELECT session_id FROM sessions WHERE user_id = ?", "alice")
+    conn.close()
+
+
+def test_falls_back_to_parsing_metadata_without_generated_columns(tmp_path):
+    db_path = str(tmp_path / "conversation_memory.db")
+    create_unversioned_db(db_path)
+    with patch("friday.memory.sqlite_schema.supports_generated_columns", return_value=False):
+        memory = SqliteConversationMemory(session_id=1, db_path=db_path, system_prompt="You are Friday.")
+    assert not memory._metadata_columns
+    summary = memory.get_summary()
+    assert summary["unique_files_accessed"] == 2 and summary["last_action"] == "generate_action"
+    memory.close()
+
+
+def test_messages_archived_before_the_full_text_index_are_recalled(tmp_path):
+    db_path = str(tmp_path / "conversation_memory.db")
+    create_unversioned_db(db_path)
+    # A database at version 3: archived messages, no full-text index yet
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE schema_version (version INTEGER PRIMARY KEY, applied_at REAL)")
+    for version in range(1, 4):
+        MIGRATIONS[version - 1](conn)
+        conn.execute("INSERT INTO schema_version (version, applied_at) VALUES (?, 0)", (version,))
+    conn.commit()
+    conn.close()
+
+    with HybridConversationMemory(session_id=1, db_path=db_path) as memory:
+        assert memory._fts
+        assert [m["content"] for m in memory.retrieve("main")] == ["read main.py"]
+
+
+def test_skipped_migration_is_not_recorded(tmp_path):
+    db_path = str(tmp_path / "conversation_memory.db")
+    create_unversioned_db(db_path)
+    conn = sqlite3.connect(db_path)
+    with patch("friday.memory.sqlite_schema.supports_generated_columns", return_value=False):
+        migrate(conn)
+    assert not has_metadata_columns(conn)
+    assert 3 not in [row[0] for row in conn.execute("SELECT version FROM schema_version")]
+    # Later migrations ran, but the version stops at the gap
+    assert schema_version(conn) == 2
+    # Applied once SQLite supports it
+    migrate(conn)
+    assert has_metadata_columns(conn)
+    assert [row[0] for row in conn.execute("SELECT version FROM schema_version ORDER BY version")] == list(range(1, SCHEMA_VERSION + 1))
+    conn.close()
+
+
+def test_hybrid_memory_migrates_the_same_database(tmp_path):
+    db_path = str(tmp_path / "conversation_memory.db")
+    create_unversioned_db(db_path)
+    with HybridConversationMemory(db_path=db_path, max_context_messages=2) as memory:
+        for i in range(4):
+            memory.add_to_history("user", f"question about retries {i}")
+        assert memory.retrieve("retries")
+    conn = sqlite3.connect(db_path)
+    assert schema_version(conn) == SCHEMA_VERSION
+    conn.close()
+
+
+def test_only_hybrid_archives_are_full_text_indexed(tmp_path):
+    db_path = str(tmp_path / "conversation_memory.db")
+    with SqliteConversationMemory(db_path=db_path) as memory:
+        memory.add_to_history("user", "question about retries from the plain backend")
+    with HybridConversationMemory(db_path=db_path, max_context_messages=2) as memory:
+        for i in range(4):
+            memory.add_to_history("user", f"question about retries {i}")
+        archived = len(memory.retrieve("retries", limit=10))
+    conn = sqlite3.connect(db_path)
+    indexed = [row[0] for row in conn.execute("SELECT rowid FROM messages_fts WHERE messages_fts MATCH 'retries'")]
+    assert archived and len(indexed) == archived
+    assert {row[0] for row in conn.execute(f"SELECT archived FROM messages WHERE id IN ({', '.join('?' * len(indexed))})", indexed)} == {1}
+    conn.close()
@@ -0,0 +1,43 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+import logging
+import pytest
+from unittest.mock import patch, MagicMock
+from friday import main as friday_main
+from friday.utils.benchmark import import_times
+from friday.utils.logger import LazyFileHandler
+
+
+def test_entry_point_imports_lazily():
+    times = import_times("import friday.main")
+    assert "friday.main" in times
+    for module in ["rich", "pyfiglet", "requests", "yaml", "httpx", "friday.llm_integration.ollama_client"]:
+        assert module not in times
+
+
+def test_log_directory_created_on_first_record(tmp_path):
+    log_file = tmp_path / "logs" / "friday.log"
+    handler = LazyFileHandler(str(log_file))
+    assert not log_file.parent.exists()
+    handler.emit(logging.LogRecord("friday", logging.INFO, __file__, 1, "hello", None, None))
+    handler.close()
+    assert log_file.read_text().strip() == "hello"
+
+
+def test_one_shot_prompt(capsys):
+    client = MagicMock()
+    client.handle_input.return_value = "Python is a programming language."
+    with patch.object(friday_main, "create_client", return_value=client) as create_client:
+        friday_main.main(["-p", "What is Python?"])
+    create_client.assert_called_once_with(warm=False)
+    client.handle_input.assert_called_once_with("What is Python?")
+    assert capsys.readouterr().out == "Python is a programming language.\n"
+
+
+def test_interactive_session_closes_the_client():
+    client = MagicMock()
+    with patch.object(friday_main, "create_client", return_value=client), patch("friday.interface.cli.driver", side_effect=KeyboardInterrupt):
+        with pytest.raises(KeyboardInterrupt):
+            friday_main.main(["--no-banner"])
+    client.close.assert_called_once_with()
@@ -0,0 +1,77 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+import json
+import sqlite3
+import pytest
+from friday.memory.hybrid_conversation_memory import HybridConversationMemory
+from friday.memory.in_memory_conversation_memory import InMemoryConversationMemory
+from friday.utils.tokens import TokenCounter, approximate_tokens, create_token_counter
+
+
+def test_code_is_not_underestimated():
+    code = "if (a[i] != b[j]) { return -1; }\n" * 10
+    prose = "the quick brown fox jumps over it " * 10
+    assert approximate_tokens(code) / len(code) > approximate_tokens(prose) / len(prose)
+    assert approximate_tokens(code) > len(code) // 4
+
+
+def test_counts_are_cached_per_text():
+    calls = []
+    counter = TokenCounter(lambda text: calls.append(text) or len(text.split()), max_entries=2)
+    assert counter.count("a b c") == 3
+    assert counter.count("a b c") == 3
+    assert calls == ["a b c"]
+    counter.count("d")
+    counter.count("e")
+    counter.count("a b c")
+    assert counter.get_stats()["hits"] == 1
+    assert counter.get_stats()["entries"] == 2
+
+
+def test_truncate_fits_budget():
+    counter = TokenCounter()
+    text = "token " * 500
+    truncated = counter.truncate(text, 100)
+    assert truncated.endswith("...[truncated]")
+    assert approximate_tokens(truncated[:-len("...[truncated]")]) <= 100
+    assert counter.truncate("short", 100) == "short"
+
+
+def test_fit_messages_keeps_system_and_newest():
+    counter = TokenCounter(lambda text: len(text.split()))
+    messages = [{"role": "system", "content": "sys"}] + [{"role": "user", "content": f"m{i} " * 10} for i in range(5)]
+    fitted = counter.fit_messages(messages, 1 + 4 + 2 * 14)
+    assert fitted == [messages[0]] + messages[-2:]
+    assert counter.fit_messages(messages, 1)[-1] == messages[-1]
+
+
+def test_unknown_or_missing_tokenizer():
+    with pytest.raises(ValueError):
+        create_token_counter({"counter": "sentencepiece"})
+    assert create_token_counter({"counter": "huggingface:/nonexistent/tokenizer.json"}).name == "approximate"
+
+
+def test_in_memory_enforces_token_budget():
+    memory = InMemoryConversationMemory(max_context_messages=100, max_context_tokens=300, token_counter=TokenCounter(lambda text: len(text.split())))
+    for i in range(20):
+        memory.add_to_history("user", f"message {i} " + "word " * 48)
+    messages = memory.get_messages()
+    assert messages[0]["role"] == "system"
+    assert memory.token_counter.count_messages(messages) <= 300
+    assert messages[-1]["content"].startswith("message 19 ")
+
+
+def test_hybrid_archives_evicted_messages(tmp_path):
+    db_path = tmp_path / "memory.db"
+    memory = HybridConversationMemory(max_context_messages=3, db_path=str(db_path))
+    memory.add_to_history("user", "first", {"action": "read_file", "file": "cli.py"})
+    memory.add_to_history("assistant", "second")
+    memory.add_to_history("user", "third")
+    assert [m["content"] for m in memory.get_messages()] == [memory.system_prompt, "second", "third"]
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute("SELECT content, metadata FROM messages").fetchall()
+    conn.close()
+    assert rows == [("first", json.dumps({"action": "read_file", "file": "cli.py"}))]
+    memory.set_limits(max_context_messages=2)
+    assert [m["content"] for m in memory.get_messages()][1:] == ["third"]
@@ -0,0 +1,48 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+import pytest
+from unittest.mock import patch, MagicMock
+from friday.llm_integration.ollama_client import OllamaClient
+from friday.memory.in_memory_conversation_memory import InMemoryConversationMemory
+from friday.tooling.workspace_index import WorkspaceFileIndex
+
+@pytest.fixture
+def client(tmp_path):
+    (tmp_path / "cli.py").write_text("def driver(): pass")
+    return OllamaClient(
+        memory=InMemoryConversationMemory(),
+        file_index=WorkspaceFileIndex(tmp_path, index_path=None),
+        local_router=False,
+        routing_mode="tools",
+    )
+
+def response(message):
+    mock_resp = MagicMock()
+    mock_resp.json.return_value = {"message": {"role": "assistant", **message}}
+    return mock_resp
+
+
+def test_direct_answer_in_one_call(client):
+    with patch("requests.Session.post", return_value=response({"content": "Blockchain is a ledger."})) as mock_post:
+        assert client.handle_input("Tell me something about blockchain") == "Blockchain is a ledger."
+    mock_post.assert_called_once()
+    assert "tools" in mock_post.call_args.kwargs["json"]
+    assert client.memory.get_messages()[-1]["metadata"] == {"action": "generate_action"}
+
+
+def test_tool_call_reads_file_in_second_call(client):
+    tool_call = {"content": "", "tool_calls": [
+        {"function": {"name": "read_file", "arguments": {"file_name": "cli.py", "question": "Explain driver()"}}}
+    ]}
+    responses = [response(tool_call), response({"content": "driver() starts the CLI."})]
+    with patch("requests.Session.post", side_effect=responses) as mock_post:
+        assert client.handle_input("Explain driver() in the cli module") == "driver() starts the CLI."
+    assert mock_post.call_count == 2
+    assert "def driver(): pass" in mock_post.call_args.kwargs["json"]["messages"][-1]["content"]
+    assert client.memory.get_messages()[-1]["metadata"] == {"action": "read_file", "file": "cli.py", "found": True, "ambiguous": False}
+
+
+def test_unknown_routing_mode_is_rejected():
+    with pytest.raises(ValueError):
+        OllamaClient(memory=InMemoryConversationMemory(), routing_mode="magic")
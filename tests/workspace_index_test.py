@@ -0,0 +1,114 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+import os
+import json
+import pytest
+from unittest.mock import patch, MagicMock
+from friday.llm_integration.ollama_client import OllamaClient
+from friday.memory.in_memory_conversation_memory import InMemoryConversationMemory
+from friday.tooling.workspace_index import WorkspaceFileIndex
+
+@pytest.fixture
+def workspace(tmp_path):
+    for rel_path in [
+        "main.py",
+        "src/friday/interface/cli.py",
+        "src/friday/llm_integration/ollama_client.py",
+        "tests/interface/cli.py",
+        "node_modules/pkg/cli.py",
+        ".git/config",
+        "build/generated.py",
+    ]:
+        path = tmp_path / rel_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("# " + rel_path)
+    (tmp_path / ".gitignore").write_text("build/\n")
+    return tmp_path
+
+
+def relative(index, paths):
+    return [p.relative_to(index.root_dir).as_posix() for p in paths]
+
+
+def test_resolve_honors_ignore_rules(workspace):
+    index = WorkspaceFileIndex(workspace, index_path=None)
+    # Shallower paths rank first
+    assert relative(index, index.resolve("cli.py")) == ["tests/interface/cli.py", "src/friday/interface/cli.py"]
+    assert index.resolve("config") == []
+    assert index.resolve("generated.py") == []
+
+
+def test_resolve_ranks_path_suffix_and_partial_names(workspace):
+    index = WorkspaceFileIndex(workspace, index_path=None)
+    assert relative(index, index.resolve("friday/interface/cli.py")) == ["src/friday/interface/cli.py"]
+    assert relative(index, index.resolve("ollama_client")) == ["src/friday/llm_integration/ollama_client.py"]
+    assert relative(index, index.resolve("MAIN.PY")) == ["main.py"]
+
+
+def test_partial_names_are_suggested_not_resolved(workspace):
+    index = WorkspaceFileIndex(workspace, index_path=None)
+    # test.py must not silently become some other *test.py / *client.py file
+    assert index.resolve("client.py") == []
+    assert index.resolve("olama_client.py") == []
+    assert relative(index, index.suggest("client.py"))[0] == "src/friday/llm_integration/ollama_client.py"
+    assert relative(index, index.suggest("olama_client.py")) == ["src/friday/llm_integration/ollama_client.py"]
+    assert index.suggest("nothing_like_it.rs") == []
+
+
+def test_incremental_refresh_picks_up_changes(workspace):
+    index = WorkspaceFileIndex(workspace, index_path=None, refresh_interval=0)
+    assert index.resolve("new_module.py") == []
+    (workspace / "src/friday/new_module.py").write_text("")
+    assert relative(index, index.resolve("new_module.py")) == ["src/friday/new_module.py"]
+    os.remove(workspace / "main.py")
+    assert index.refresh() is True
+    assert index.resolve("main.py") == []
+
+
+def test_miss_refreshes_before_giving_up(workspace):
+    index = WorkspaceFileIndex(workspace, index_path=None, refresh_interval=3600)
+    assert relative(index, index.resolve("main.py")) == ["main.py"]
+    # Created within refresh_interval: found exactly and by name alone
+    (workspace / "src/friday/just_created.py").write_text("")
+    assert relative(index, index.resolve("just_created.py", fuzzy=False)) == ["src/friday/just_created.py"]
+
+
+def test_persisted_index_is_warm(workspace, tmp_path_factory):
+    index_path = str(tmp_path_factory.mktemp("index") / "file_index.json")
+    WorkspaceFileIndex(workspace, index_path=index_path).build()
+    warm = WorkspaceFileIndex(workspace, index_path=index_path)
+    warm._load()
+    assert warm.get_stats()["files"] == 5
+    warm.build()
+    assert warm.refresh() is False
+
+
+def test_client_offers_candidates_instead_of_reading_another_file(tmp_path):
+    (tmp_path / "foo_test.py").write_text("def test_foo(): pass")
+    client = OllamaClient(memory=InMemoryConversationMemory(), cache=None, local_router=False, file_index=WorkspaceFileIndex(tmp_path, index_path=None))
+    mock_resp = MagicMock()
+    mock_resp.json.return_value = {"message": {"role": "assistant", "content": json.dumps({"action": "read_file", "file": "test.py", "question": "What does test.py do?"})}}
+    with patch("requests.Session.post", return_value=mock_resp) as mock_post:
+        response = client.handle_input("What does test.py do?")
+    assert response == "Could not find test.py. Did you mean: foo_test.py?"
+    # Only the routing call: foo_test.py was never sent to the model
+    mock_post.assert_called_once()
+    client.close()
+
+
+def test_client_asks_which_file_when_several_match(tmp_path):
+    (tmp_path / "app").mkdir()
+    (tmp_path / "lib").mkdir()
+    (tmp_path / "app" / "utils.py").write_text("def app(): pass")
+    (tmp_path / "lib" / "utils.py").write_text("def lib(): pass")
+    client = OllamaClient(memory=InMemoryConversationMemory(), cache=None, local_router=False, file_index=WorkspaceFileIndex(tmp_path, index_path=None))
+    mock_resp = MagicMock()
+    mock_resp.json.return_value = {"message": {"role": "assistant", "content": json.dumps({"action": "read_file", "file": "utils.py", "question": "What does utils.py do?"})}}
+    with patch("requests.Session.post", return_value=mock_resp) as mock_post:
+        response = client.handle_input("What does utils.py do?")
+    assert response == "Several files match utils.py: app/utils.py, lib/utils.py. Which one do you mean?"
+    # Neither candidate was sent to the model
+    mock_post.assert_called_once()
+    assert client.memory.get_messages()[-1]["metadata"]["ambiguous"] is True
+    client.close()
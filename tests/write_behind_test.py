@@ -0,0 +1,135 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+import sqlite3
+import subprocess
+import textwrap
+import pytest
+from friday.memory.hybrid_conversation_memory import HybridConversationMemory
+from friday.memory.sqlite_conversation_memory import SqliteConversationMemory
+from friday.memory.sqlite_pool import SqliteConnectionPool
+from friday.memory.write_behind import WriteBehindQueue, create_write_behind
+
+
+def stored_contents(db_path, session_id):
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute("SELECT content FROM messages WHERE session_id = ? ORDER BY timestamp", (session_id,)).fetchall()
+    conn.close()
+    return [row[0] for row in rows]
+
+
+def test_reads_see_queued_writes_and_batches_commit_together(tmp_path):
+    db_path = str(tmp_path / "memory.db")
+    # A long interval keeps writes queued until flush()
+    queue = WriteBehindQueue(flush_interval_ms=60000)
+    memory = SqliteConversationMemory(db_path=db_path, system_prompt="You are Friday.", write_behind=queue)
+    for i in range(10):
+        memory.add_to_history("user", f"question {i}", {"action": "read_file", "file": f"file_{i % 3}.py"})
+    assert stored_contents(db_path, memory.session_id) == []
+    messages = memory.get_messages()
+    assert [m["content"] for m in messages] == ["You are Friday."] + [f"question {i}" for i in range(10)]
+    assert messages[1]["metadata"] == {"action": "read_file", "file": "file_0.py"}
+    assert [m["content"] for m in memory.get_messages(limit=2)] == ["You are Friday.", "question 0", "question 1"]
+    # The one-system-message check counts queued messages
+    memory.add_to_history("system", "You are Friday.")
+    memory.add_to_history("system", "You are Friday.")
+    assert queue.get_stats()["pending"] == 11
+
+    # get_summary flushes first
+    summary = memory.get_summary()
+    assert summary["total_messages"] == 11 and summary["unique_files_accessed"] == 3
+    stats = queue.get_stats()
+    assert stats["writes"] == 11 and stats["batches"] == 1 and stats["pending"] == 0
+    assert len(stored_contents(db_path, memory.session_id)) == 11
+
+    memory.clear()
+    memory.add_to_history("user", "after clear")
+    assert [m["content"] for m in memory.get_messages()] == ["You are Friday.", "after clear"]
+    memory.close()
+    assert stored_contents(db_path, memory.session_id) == ["You are Friday.", "after clear"]
+    queue.close()
+
+
+def test_full_queue_applies_backpressure(tmp_path):
+    db_path = str(tmp_path / "memory.db")
+    queue = WriteBehindQueue(max_pending=4, batch_size=4, flush_interval_ms=60000)
+    with SqliteConversationMemory(db_path=db_path, system_prompt="", write_behind=queue) as memory:
+        for i in range(20):
+            memory.add_to_history("user", f"message {i}")
+            assert queue.get_stats()["pending"] <= 4
+    stats = queue.get_stats()
+    assert stats["backpressure_waits"] >= 4 and stats["writes"] == 20
+    assert stored_contents(db_path, memory.session_id) == [f"message {i}" for i in range(20)]
+    queue.close()
+
+
+def test_hybrid_eviction_is_archived_in_the_background(tmp_path):
+    db_path = str(tmp_path / "memory.db")
+    queue = WriteBehindQueue(flush_interval_ms=60000)
+    pool = SqliteConnectionPool(db_path)
+    memory = HybridConversationMemory(max_context_messages=3, db_path=db_path, pool=pool, write_behind=queue)
+    for i in range(8):
+        memory.add_to_history("user", f"how do retries work, attempt {i}")
+    assert queue.get_stats()["pending"] == 6
+    # retrieve() and get_evicted() read the archive after flushing it
+    assert len(memory.retrieve("retries", limit=10)) == 6
+    assert len(memory.get_evicted()) == 6
+    assert queue.get_stats()["batches"] == 1
+    memory.close()
+    queue.close()
+    pool.close()
+
+
+def test_failed_batch_is_reported_by_flush(tmp_path):
+    pool = SqliteConnectionPool(str(tmp_path / "memory.db"))
+    queue = WriteBehindQueue()
+    queue.submit(pool, "INSERT INTO missing_table VALUES (?)", (1,))
+    with pytest.raises(sqlite3.OperationalError):
+        queue.flush()
+    assert queue.get_stats()["dropped_writes"] == 1
+    queue.close()
+    with pytest.raises(RuntimeError):
+        queue.submit(pool, "SELECT ?", (1,))
+    pool.close()
+
+
+def test_sessions_only_flush_their_own_writes(tmp_path):
+    pool = SqliteConnectionPool(str(tmp_path / "memory.db"))
+    queue = WriteBehindQueue(flush_interval_ms=60000)
+    memory = HybridConversationMemory(max_context_messages=2, db_path=pool.db_path, pool=pool, write_behind=queue)
+    other = SqliteConversationMemory(db_path=pool.db_path, system_prompt="", pool=pool, write_behind=queue)
+    # Another session's write fails in the same batch as this session's archive
+    queue.submit(pool, "INSERT INTO missing_table VALUES (?)", (1,), key=other._pending_key())
+    for i in range(4):
+        memory.add_to_history("user", f"how do retries work, attempt {i}")
+    assert len(memory.retrieve("retries", limit=10)) == 3
+    assert len(memory.get_evicted()) == 3
+    with pytest.raises(sqlite3.OperationalError):
+        other.flush()
+    # Only the failing write is dropped, and reported once, to the session that made it
+    assert queue.get_stats()["dropped_writes"] == 1
+    queue.flush()
+    memory.close()
+    other.close()
+    queue.close()
+    pool.close()
+
+
+def test_queued_writes_are_flushed_at_exit(tmp_path):
+    db_path = str(tmp_path / "memory.db")
+    script = textwrap.dedent(f"""
+        from friday.memory.sqlite_conversation_memory import SqliteConversationMemory
+        from friday.memory.write_behind import WriteBehindQueue
+        memory = SqliteConversationMemory(db_path={db_path!r}, system_prompt="", write_behind=WriteBehindQueue(flush_interval_ms=60000))
+        memory.add_to_history("user", "written at exit")
+        print(memory.session_id)
+    """)
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True)
+    assert stored_contents(db_path, int(result.stdout)) == ["written at exit"]
+
+
+def test_disabled_by_default():
+    assert create_write_behind({}) is None
+    queue = create_write_behind({"enabled": True, "max_pending": 8, "batch_size": 4})
+    assert queue.max_pending == 8 and queue.batch_size == 4
+    queue.close()